@@ -0,0 +1,125 @@
+"""
+Deterministic stand-in for Stockfish that speaks enough UCI for python-chess.
+
+Every `go` "thinks" for a fixed time and then plays a move chosen from the
+position's Zobrist key, so the same position always gets the same reply and
+round-trip benchmarks run without a real engine. `stop` answers at once.
+
+    python benchmarks/fake_uci.py --think-ms 20
+
+Usable wherever an engine path is accepted, as a command list:
+    StockfishEngine([sys.executable, "benchmarks/fake_uci.py", "--think-ms", "20"])
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import chess
+import chess.polyglot
+
+INFO_INTERVAL = 0.01
+
+_out_lock = threading.Lock()
+
+
+def send(line: str):
+    with _out_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def choose(board: chess.Board) -> chess.Move | None:
+    moves = sorted(board.legal_moves, key=chess.Move.uci)
+    if not moves:
+        return None
+    return moves[chess.polyglot.zobrist_hash(board) % len(moves)]
+
+
+class Search:
+    """One `go`: replies after `think_s` or on `stop`, whichever comes first, exactly once."""
+
+    def __init__(self, board: chess.Board, think_s: float):
+        self.board = board
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(think_s,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self, think_s: float):
+        move = choose(self.board)
+        if move is None:
+            send("info depth 0 score mate 0")
+            send("bestmove (none)")
+            return
+        # Report a deeper "iteration" every INFO_INTERVAL like a real engine, so
+        # clients that check their stop flag per info line can interrupt us.
+        deadline = time.monotonic() + think_s
+        depth = 1
+        while True:
+            send(f"info depth {depth} seldepth {depth} score cp 0 nodes {depth} pv {move.uci()}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopped.wait(min(INFO_INTERVAL, remaining)):
+                break
+            depth += 1
+        send(f"bestmove {move.uci()}")
+
+
+def parse_position(tokens: list[str]) -> chess.Board:
+    if tokens[0] == "startpos":
+        board, rest = chess.Board(), tokens[1:]
+    else:
+        idx = tokens.index("moves") if "moves" in tokens else len(tokens)
+        board, rest = chess.Board(" ".join(tokens[1:idx])), tokens[idx:]
+    if rest and rest[0] == "moves":
+        for uci in rest[1:]:
+            board.push_uci(uci)
+    return board
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Deterministic fake UCI engine.")
+    ap.add_argument("--think-ms", type=float, default=0.0, help="time spent on every `go`")
+    args = ap.parse_args(argv)
+    think_s = args.think_ms / 1000.0
+
+    board = chess.Board()
+    search = None
+    for line in sys.stdin:
+        tokens = line.split()
+        if not tokens:
+            continue
+        cmd = tokens[0]
+        if cmd == "uci":
+            send("id name FakeUCI")
+            send("id author chess_system benchmarks")
+            send("option name Threads type spin default 1 min 1 max 512")
+            send("option name Hash type spin default 16 min 1 max 33554432")
+            send("uciok")
+        elif cmd == "isready":
+            send("readyok")
+        elif cmd == "ucinewgame":
+            board = chess.Board()
+        elif cmd == "position" and len(tokens) > 1:
+            board = parse_position(tokens[1:])
+        elif cmd == "go":
+            if search is not None:
+                search.stop()
+            search = Search(board.copy(), think_s)
+        elif cmd == "stop":
+            if search is not None:
+                search.stop()
+                search = None
+        elif cmd == "quit":
+            break
+        # setoption / debug / register: accepted silently.
+    if search is not None:
+        search.stop()
+
+
+if __name__ == "__main__":
+    main()
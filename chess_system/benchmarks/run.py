@@ -0,0 +1,390 @@
+"""
+Benchmark suite for the hot paths of the voice → board loop.
+
+Each benchmark reports the time per operation in µs (median / min / max over
+repeats) after a warm-up run, with the garbage collector off while timing
+and every input generated from a fixed seed, so two runs on the same
+machine are directly comparable. Results can be written as JSON and checked
+against budgets (thresholds.json) and/or a previous run (--baseline);
+both checks use the fastest repeat ("min"), which is the least noisy.
+
+    python -m benchmarks.run                          # from chess_system/
+    python -m benchmarks.run --quick --json out.json
+    python -m benchmarks.run --baseline out.json --tolerance 0.2
+
+Benchmarks that need something missing here (a display for Tk, cairo for
+board rendering) are reported as skipped instead of failing the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import chess
+
+from chess_engine.board_manager import BoardManager
+from chess_engine.imagine_simulator import ImagineSimulator
+from chess_engine.move_history import MoveHistory
+from chess_engine.stockfish_engine import StockfishEngine
+from voice_recog.grammar import load_grammar_for
+from voice_recog.parser import extract_command, parse_move
+
+HERE = Path(__file__).resolve().parent
+FAKE_UCI = HERE / "fake_uci.py"
+THRESHOLDS = HERE / "thresholds.json"
+SEED = 1234
+
+
+class Skipped(Exception):
+    """Raised by a benchmark that cannot run in this environment."""
+
+
+def _stats(samples_us: list[float], ops: int, **extra) -> dict:
+    median = statistics.median(samples_us)
+    return {
+        "unit": "us/op",
+        "median": round(median, 3),
+        "min": round(min(samples_us), 3),
+        "max": round(max(samples_us), 3),
+        "samples": len(samples_us),
+        "ops": ops,
+        "ops_per_s": round(1e6 / median, 1) if median > 0 else None,
+        **extra,
+    }
+
+
+def _time_calls(fn, number: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter_ns() - start) / 1e9
+
+
+def measure(fn, repeat: int, number: int | None = None, min_time: float = 0.05, **extra) -> dict:
+    """
+    Time `number` calls of fn() `repeat` times; one sample = mean µs per call of a repeat.
+    number=None calibrates it (doubling, which doubles as warm-up) so a repeat lasts >= min_time.
+    """
+    if number is None:
+        number = 1
+        while _time_calls(fn, number) < min_time:
+            number *= 2
+    else:
+        _time_calls(fn, number)  # warm-up
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            samples.append(_time_calls(fn, number) / number * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return _stats(samples, number * repeat, **extra)
+
+
+def random_game(plies: int, seed: int) -> list[chess.Move]:
+    """`plies` legal moves from the initial position, chosen with a seeded RNG (never ends early)."""
+    rng = random.Random(seed)
+    board = chess.Board()
+    while len(board.move_stack) < plies:
+        moves = sorted(board.legal_moves, key=chess.Move.uci)
+        # Avoid moves that end the game so every requested length is reachable.
+        rng.shuffle(moves)
+        for move in moves:
+            board.push(move)
+            if not board.is_game_over(claim_draw=False):
+                break
+            board.pop()
+        else:
+            board = chess.Board()  # dead end: start over with the RNG state advanced
+    return list(board.move_stack)
+
+
+# =========================================================
+# Benchmarks
+# =========================================================
+def bench_grammar(opts) -> dict:
+    results = {}
+    for state in ("WAIT_WAKE", "ROOT", "IMAGINE"):
+        phrases = len(load_grammar_for(state))
+        results[f"grammar.load_grammar_for[{state}]"] = measure(
+            lambda: load_grammar_for(state), repeat=opts.repeat, min_time=opts.min_time, phrases=phrases
+        )
+    return results
+
+
+def phrase_corpus(size: int, seed: int = SEED) -> list[tuple[str, str]]:
+    """(state, phrase) pairs: grammar phrases, the same with filler words, and noise."""
+    rng = random.Random(seed)
+    grammar = [("ROOT", p) for p in load_grammar_for("ROOT")] + [("IMAGINE", p) for p in load_grammar_for("IMAGINE")]
+    fillers = ["to", "takes", "on", "uh", "please"]
+    noise = ["hello there", "what is the best move", "play", "evaluate", "explain", "take back please", ""]
+    corpus = []
+    while len(corpus) < size:
+        roll = rng.random()
+        state, phrase = rng.choice(grammar)
+        if roll < 0.6:
+            corpus.append((state, phrase))
+        elif roll < 0.9:
+            words = phrase.split()
+            words.insert(rng.randrange(1, len(words) + 1), rng.choice(fillers))
+            corpus.append((state, " ".join(words)))
+        else:
+            corpus.append((state, rng.choice(noise)))
+    return corpus
+
+
+def bench_parser(opts) -> dict:
+    corpus = phrase_corpus(opts.scale(20_000))
+    word_lists = [phrase.split() for _state, phrase in corpus]
+
+    def run_extract():
+        for state, phrase in corpus:
+            extract_command(phrase, state)
+
+    def run_parse():
+        for words in word_lists:
+            parse_move(words)
+
+    results = {}
+    for name, fn in (("parser.extract_command", run_extract), ("parser.parse_move", run_parse)):
+        stats = measure(fn, repeat=opts.repeat, number=1)
+        # Report per phrase rather than per corpus pass.
+        for field in ("median", "min", "max"):
+            stats[field] = round(stats[field] / len(corpus), 3)
+        stats["ops"] = len(corpus) * opts.repeat
+        stats["ops_per_s"] = round(1e6 / stats["median"], 1) if stats["median"] > 0 else None
+        stats["corpus"] = len(corpus)
+        results[name] = stats
+    return results
+
+
+def bench_history(opts) -> dict:
+    results = {}
+    for plies in (40, 100, 300):
+        moves = random_game(plies, SEED + plies)
+        start = chess.Board()
+        results[f"history.from_moves[{plies}]"] = measure(
+            lambda: MoveHistory.from_moves(start, moves).text(), repeat=opts.repeat, min_time=opts.min_time
+        )
+    return results
+
+
+def explore(imagine: ImagineSimulator, nodes: int, seed: int):
+    """Grow imagine's variation tree to `nodes` nodes with random moves, undos and line switches."""
+    rng = random.Random(seed)
+    while len(imagine.tree) < nodes:
+        roll = rng.random()
+        if roll < 0.6 and not imagine.board.is_game_over():
+            imagine.make_bestmove(rng.choice(sorted(imagine.board.legal_moves, key=chess.Move.uci)).uci())
+        elif roll < 0.85:
+            imagine.back()
+        else:
+            imagine.switch_line(1)
+
+
+def bench_imagine(opts) -> dict:
+    imagine = ImagineSimulator()  # the engine is never asked; only the tree is timed
+    imagine.engine.close()
+    imagine.start(chess.Board())
+    explore(imagine, opts.scale(5000), SEED)
+    rng = random.Random(SEED)
+    targets = [rng.randrange(len(imagine.tree)) for _ in range(256)]
+    branches = [n for n in range(1, len(imagine.tree)) if len(imagine.tree.children(imagine.tree.parent(n))) > 1]
+    state = {"i": 0}
+
+    def jump():
+        state["i"] += 1
+        imagine.goto(targets[state["i"] % len(targets)])
+
+    def switch():
+        state["i"] += 1
+        imagine.goto(branches[state["i"] % len(branches)])
+        imagine.switch_line(1)
+
+    nodes = len(imagine.tree)
+    return {
+        "imagine.goto[random]": measure(jump, repeat=opts.repeat, min_time=opts.min_time, nodes=nodes),
+        # Includes the goto to a branch point; see the line above for its cost.
+        "imagine.switch_line": measure(switch, repeat=opts.repeat, min_time=opts.min_time, nodes=nodes),
+    }
+
+
+def bench_render(opts) -> dict:
+    try:
+        import tkinter as tk
+
+        from gui.gui_tk import ChessGUI
+    except (ImportError, OSError) as e:
+        raise Skipped(f"GUI unavailable: {str(e).splitlines()[0]}")
+    from fsm.states import State
+    from headless import HeadlessSession
+
+    moves = random_game(opts.scale(120), SEED)
+    results = {}
+    for state in (State.ROOT, State.IMAGINE):
+        samples = []
+        for _ in range(opts.repeat):
+            try:
+                root = tk.Tk()
+            except tk.TclError as e:
+                raise Skipped(f"no display: {e}")
+            root.withdraw()
+            session = HeadlessSession(engine=None)
+            try:
+                session.feed("hey chess")
+                if state == State.IMAGINE:
+                    session.feed("imagine")
+                gui = ChessGUI(root, session.fsm, session.timer)
+                board = session.imagine if state == State.IMAGINE else session.board
+                for move in moves:
+                    # Only the redraw is timed; the move is applied directly, not via the FSM.
+                    board.move(move.uci())
+                    start = time.perf_counter_ns()
+                    gui.update_board()
+                    samples.append((time.perf_counter_ns() - start) / 1e3)
+                root.update()
+            finally:
+                session.close()
+                root.destroy()
+        results[f"gui.update_board[{state.name}]"] = _stats(samples, len(samples))
+    return results
+
+
+def bench_engine(opts) -> dict:
+    results = {}
+    for think_ms in opts.think_ms:
+        engine = StockfishEngine([sys.executable, str(FAKE_UCI), "--think-ms", str(think_ms)], depth=8)
+        if engine._engine is None:
+            raise Skipped("fake UCI engine failed to start")
+        try:
+            board = BoardManager(engine=engine)
+
+            def reply():
+                nonlocal board
+                if board.engine_reply() is None or board.board.is_game_over():
+                    board = BoardManager(engine=engine)
+
+            stats = measure(reply, repeat=opts.repeat, number=opts.scale(10), think_ms=think_ms)
+            # Time spent outside the (simulated) search: UCI I/O, parsing, board update.
+            stats["overhead_median"] = round(stats["median"] - think_ms * 1e3, 3)
+            results[f"engine.engine_reply[think={think_ms}ms]"] = stats
+        finally:
+            engine.close()
+    return results
+
+
+BENCHMARKS = {
+    "grammar": bench_grammar,
+    "parser": bench_parser,
+    "history": bench_history,
+    "imagine": bench_imagine,
+    "render": bench_render,
+    "engine": bench_engine,
+}
+
+
+# =========================================================
+# Regression checks
+# =========================================================
+def check_thresholds(results: dict, thresholds: dict) -> list[str]:
+    """Budget per benchmark: {"name": {"max_us": N}}; skipped or missing benchmarks are not checked."""
+    failures = []
+    for name, budget in thresholds.items():
+        stats = results.get(name)
+        if not isinstance(budget, dict) or stats is None or "min" not in stats:
+            continue
+        limit = budget.get("max_us")
+        if limit is not None and stats["min"] > limit:
+            failures.append(f"{name}: {stats['min']} us > budget {limit} us")
+    return failures
+
+
+def check_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Fail benchmarks more than `tolerance` slower than in `baseline`."""
+    failures = []
+    for name, old in baseline.get("results", {}).items():
+        new = results.get(name)
+        if not new or "min" not in new or "min" not in old or old["min"] <= 0:
+            continue
+        ratio = new["min"] / old["min"]
+        if ratio > 1 + tolerance:
+            failures.append(f"{name}: {new['min']} us vs {old['min']} us baseline (x{ratio:.2f})")
+    return failures
+
+
+def _print_results(results: dict):
+    print(f"{'benchmark':<40}{'median':>12}{'min':>12}{'max':>12}  us/op")
+    for name, stats in results.items():
+        if "skipped" in stats:
+            print(f"{name:<40}  skipped: {stats['skipped']}")
+            continue
+        print(f"{name:<40}{stats['median']:>12}{stats['min']:>12}{stats['max']:>12}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the chess_system hot paths.")
+    ap.add_argument("only", nargs="*", help=f"benchmark groups to run: {', '.join(BENCHMARKS)} (default: all)")
+    ap.add_argument("--repeat", type=int, default=7, help="timed repeats per benchmark")
+    ap.add_argument("--quick", action="store_true", help="smaller inputs and fewer repeats")
+    ap.add_argument("--think-ms", type=lambda s: [int(x) for x in s.split(",")], default=[0, 20],
+                    help="fake engine think times, comma separated")
+    ap.add_argument("--json", metavar="PATH", help="write results as JSON")
+    ap.add_argument("--thresholds", default=str(THRESHOLDS), help="budget file ('' to disable)")
+    ap.add_argument("--baseline", metavar="PATH", help="previous --json output to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown vs --baseline (0.3 = 30%%)")
+    opts = ap.parse_args(argv)
+    unknown = [group for group in opts.only if group not in BENCHMARKS]
+    if unknown:
+        ap.error(f"unknown benchmark group(s): {', '.join(unknown)}")
+    if opts.quick:
+        opts.repeat = min(opts.repeat, 3)
+    factor = 0.2 if opts.quick else 1.0
+    opts.min_time = 0.05 * factor
+    opts.scale = lambda n: max(1, int(n * factor))
+
+    results = {}
+    for group in opts.only or BENCHMARKS:
+        try:
+            results.update(BENCHMARKS[group](opts))
+        except Skipped as e:
+            results[group] = {"skipped": str(e)}
+
+    failures = []
+    if opts.thresholds:
+        failures += check_thresholds(results, json.loads(Path(opts.thresholds).read_text(encoding="utf-8")))
+    if opts.baseline:
+        failures += check_baseline(results, json.loads(Path(opts.baseline).read_text(encoding="utf-8")), opts.tolerance)
+
+    _print_results(results)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if opts.json:
+        report = {
+            "meta": {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "chess": chess.__version__,
+                "repeat": opts.repeat,
+                "quick": opts.quick,
+            },
+            "results": results,
+            "failures": failures,
+        }
+        Path(opts.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
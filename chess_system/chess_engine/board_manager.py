@@ -1,57 +1,65 @@
 import chess
 
+from .move_history import MoveHistory
+from .move_index import MOVE_INDEXES, MoveIndex, engine_preference
+from .zobrist import ZobristTracker
+
 
 class BoardManager:
-    def __init__(self, engine=None):
+    def __init__(self, engine=None, journal=None):
         self.board = chess.Board()
         self.engine = engine
+        self.journal = journal  # SessionJournal, or None
+        self._zobrist = ZobristTracker(self.board)
+        self.history = MoveHistory(self.board)
+
+    @property
+    def zobrist(self) -> int:
+        """Polyglot Zobrist key of the current position (maintained incrementally)."""
+        return self._zobrist.key
 
     def move(self, uci_or_san):
         move = self._parse_move(uci_or_san)
-        san = self.board.san(move)
-        uci = move.uci()
-        self.board.push(move)
-        return {"uci": uci, "san": san}
+        san = self._push(move)
+        return {"uci": move.uci(), "san": san}
 
     def engine_reply(self):
         if not self.engine:
             return None
-        reply_uci = self.engine.get_bestmove(self.board)
+        return self.apply_engine_move(self.engine.get_bestmove(self.board, key=self.zobrist))
+
+    def apply_engine_move(self, reply_uci):
+        """Push an engine-chosen move (e.g. delivered by EngineService) if it is legal."""
         if not reply_uci:
             return None
         move = chess.Move.from_uci(reply_uci)
-        if move not in self.board.legal_moves:
+        if move not in self.move_index():
             return None
-        san = self.board.san(move)
-        self.board.push(move)
+        san = self._push(move)
         return {"uci": reply_uci, "san": san}
 
-    def _parse_move(self, text):
-        text = text.strip()
-        if text.lower() == "castle":
-            return self._castle_move(self.board)
+    def _push(self, move: chess.Move) -> str:
+        """Push `move`, updating the Zobrist key and SAN history; returns its SAN."""
+        san = self.board.san(move)
+        self._zobrist.push(self.board, move)
+        self.history.push(san)
+        if self.journal is not None:
+            self.journal.main_push(move)
+        return san
+
+    def restore(self, moves):
+        """Replay recovered moves (journal) onto the current board; they are not re-journaled."""
+        journal, self.journal = self.journal, None
         try:
-            move = self.board.parse_san(text)
-        except Exception:
-            move = chess.Move.from_uci(text)
-
-        if move not in self.board.legal_moves:
-            raise ValueError("Illegal move")
-        return move
-
-    def _castle_move(self, board: chess.Board) -> chess.Move:
-        """Try short (kingside) castle first, then long (queenside)."""
-        if board is None:
-            raise ValueError("Illegal move")
-
-        # Build candidate UCIs based on side to move.
-        if board.turn == chess.WHITE:
-            candidates = ["e1g1", "e1c1"]
-        else:
-            candidates = ["e8g8", "e8c8"]
-
-        for uci in candidates:
-            move = chess.Move.from_uci(uci)
-            if move in board.legal_moves and board.is_castling(move):
-                return move
-        raise ValueError("Illegal move")
+            for move in moves:
+                self._push(move)
+        finally:
+            self.journal = journal
+
+    def move_index(self) -> MoveIndex:
+        """Spoken-move index of the current position (shared cache, keyed by Zobrist)."""
+        return MOVE_INDEXES.get(self.board, self.zobrist)
+
+    def _parse_move(self, text):
+        # Ambiguous spoken moves fall back to the engine's cached choice, else AmbiguousMove.
+        return self.move_index().resolve(text, prefer=engine_preference(self.engine, self.zobrist))
@@ -0,0 +1,235 @@
+"""
+Pool of UCI engine processes with a priority scheduler.
+
+Interactive requests (main-game replies, imagine `take`) are always served
+before background work (analysis, pre-computation). If every process is busy
+with background work when an interactive request arrives, one background
+search is stopped and put back in the queue so the player never waits on it.
+
+Within a priority, jobs are ordered by owner (e.g. one game-server session)
+with start-time fair queueing: each owner's next job is tagged one step after
+its previous one, but never behind the tag currently being served, so an
+owner with a long backlog cannot starve one that just submitted. With a
+single owner (the GUI) this is plain FIFO.
+
+EnginePool exposes the same `get_bestmove` / `search` API as StockfishEngine,
+so it can be passed anywhere a single engine is used today.
+"""
+
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+
+import chess
+import chess.polyglot
+
+from .eval_cache import EvalCache
+from .opening_book import OpeningBook
+from .stockfish_engine import SearchResult, StockfishEngine
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class _AnyEvent:
+    """`is_set()` view over several events (user stop + scheduler preemption)."""
+
+    def __init__(self, *events):
+        self._events = [e for e in events if e is not None]
+
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self._events)
+
+
+class _Job:
+    def __init__(self, board, depth, stop_event, priority, order, key):
+        self.board = board.copy()
+        self.depth = depth
+        self.key = key
+        self.stop_event = stop_event
+        self.priority = priority
+        self.order = order  # (fair-queueing tag, seq)
+        self.future: Future = Future()
+        self.preempt = threading.Event()
+
+
+class EnginePool:
+    def __init__(
+        self,
+        size: int = 2,
+        path: str = "/usr/games/stockfish",
+        depth: int = 12,
+        threads: int = 1,
+        hash_mb: int = 16,
+        engines: list | None = None,
+        cache: EvalCache | None = None,
+        book: OpeningBook | None = None,
+        logger=None,
+    ):
+        """
+        size / threads / hash_mb: number of UCI processes and their Threads/Hash options.
+        engines: use these already-started engines instead of spawning new ones.
+        cache: optional EvalCache consulted before a search is queued.
+        book: optional OpeningBook consulted before the cache; in-book positions never reach an engine.
+        logger: where spawned engines report start-up failures.
+        """
+        if engines is None:
+            options = {"Threads": threads, "Hash": hash_mb}
+            engines = [StockfishEngine(path, depth=depth, options=options, logger=logger) for _ in range(size)]
+        self.engines = engines
+        self.depth = depth
+        self.cache = cache
+        self.book = book
+
+        # Entries are (priority, (tag, seq), job); see the module docstring for tags.
+        self._queue: queue.PriorityQueue[tuple[int, tuple[int, int], _Job | None]] = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._vtime = 0  # tag of the job most recently started
+        self._owner_tags: dict = {}
+        self._running: list[_Job | None] = [None] * len(self.engines)
+        self._workers = [
+            threading.Thread(target=self._worker, args=(i,), daemon=True)
+            for i in range(len(self.engines))
+        ]
+        for t in self._workers:
+            t.start()
+
+    @classmethod
+    def from_engine(cls, engine) -> "EnginePool":
+        """Wrap a single existing engine (keeps the old one-process behaviour)."""
+        return cls(engines=[engine], depth=getattr(engine, "depth", 12))
+
+    # -----------------------------------------------------
+    # Public API
+    # -----------------------------------------------------
+    def submit(
+        self,
+        board: chess.Board,
+        depth: int | None = None,
+        stop_event: threading.Event | None = None,
+        priority: int = INTERACTIVE,
+        key: int | None = None,
+        owner=None,
+    ) -> Future:
+        """
+        Queue a search; the returned Future resolves to a SearchResult.
+        key: Zobrist key of `board` if the caller already tracks it (skips a full rehash).
+        owner: hashable id of the submitter; owners share the processes fairly.
+        """
+        depth = depth or self.depth
+        if key is None and (self.book is not None or self.cache is not None):
+            key = chess.polyglot.zobrist_hash(board)
+        instant = None
+        if self.book is not None:
+            instant = self.book.pick(board, key)
+        if instant is None and self.cache is not None:
+            instant = self.cache.get(key, depth)
+        if instant is not None:
+            future: Future = Future()
+            future.set_result(instant)
+            return future
+
+        job = _Job(board, depth, stop_event, priority, (self._fair_tag(owner), next(self._seq)), key)
+        self._queue.put((priority, job.order, job))
+        if priority == INTERACTIVE:
+            self._preempt_background()
+        return job.future
+
+    def search(
+        self,
+        board: chess.Board,
+        depth: int | None = None,
+        stop_event: threading.Event | None = None,
+        priority: int = INTERACTIVE,
+        key: int | None = None,
+    ) -> SearchResult:
+        return self.submit(board, depth, stop_event, priority, key).result()
+
+    def get_bestmove(
+        self, board: chess.Board, priority: int = INTERACTIVE, key: int | None = None
+    ) -> str | None:
+        return self.search(board, priority=priority, key=key).move
+
+    def shutdown(self):
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None and not job.future.cancel():
+                # Preempted jobs are already RUNNING and cannot be cancelled.
+                job.future.set_result(SearchResult(move=None))
+        for _ in self._workers:
+            # Sentinels sort ahead of any job submitted after shutdown started.
+            self._queue.put((-1, (0, next(self._seq)), None))
+        for t in self._workers:
+            t.join(timeout=1.0)
+        for engine in self.engines:
+            engine.close()
+        if self.book is not None:
+            self.book.close()
+
+    # -----------------------------------------------------
+    # Scheduling
+    # -----------------------------------------------------
+    def _fair_tag(self, owner) -> int:
+        with self._lock:
+            tag = max(self._owner_tags.get(owner, 0), self._vtime) + 1
+            self._owner_tags[owner] = tag
+            return tag
+
+    def _advance_vtime(self, job: _Job):
+        with self._lock:
+            self._vtime = max(self._vtime, job.order[0])
+            if len(self._owner_tags) > 1024:
+                # Owners at or behind the clock would get vtime + 1 anyway.
+                self._owner_tags = {o: t for o, t in self._owner_tags.items() if t > self._vtime}
+
+    def _preempt_background(self):
+        with self._lock:
+            if any(job is None for job in self._running):
+                return
+            for job in self._running:
+                if job.priority != INTERACTIVE and not job.preempt.is_set():
+                    job.preempt.set()
+                    return
+
+    def _worker(self, idx: int):
+        engine = self.engines[idx]
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            # Preempted jobs come back with a RUNNING future; only fresh ones need the transition.
+            if not job.preempt.is_set() and not job.future.set_running_or_notify_cancel():
+                continue
+            job.preempt.clear()
+            self._advance_vtime(job)
+            with self._lock:
+                self._running[idx] = job
+            try:
+                result = engine.search(
+                    job.board,
+                    depth=job.depth,
+                    stop_event=_AnyEvent(job.stop_event, job.preempt),
+                )
+            except Exception as e:
+                job.future.set_exception(e)
+                continue
+            finally:
+                with self._lock:
+                    self._running[idx] = None
+
+            target_depth = job.depth or getattr(engine, "depth", 0)
+            stopped_by_user = job.stop_event is not None and job.stop_event.is_set()
+            if job.preempt.is_set() and result.depth < target_depth and not stopped_by_user:
+                # Yield to the interactive request; rerun this one later from scratch.
+                self._queue.put((job.priority, job.order, job))
+                continue
+            if self.cache is not None and job.key is not None:
+                self.cache.put(job.key, result)
+            job.future.set_result(result)
@@ -0,0 +1,164 @@
+"""
+Asynchronous front end for the engine pool.
+
+Searches run on the pool's worker threads so the Tk main loop keeps running
+while the engine thinks. Each request returns an `EngineRequest` (future +
+stop flag); its callback is handed to `dispatch` so the result arrives on the
+thread the caller chose (the Tk thread in the GUI, the session's event queue
+when headless, the asyncio loop in the server). There is no default: running
+FSM callbacks on a pool worker must be asked for with `call_on_worker`.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+import chess
+
+from .engine_pool import INTERACTIVE, EnginePool
+from .stockfish_engine import SearchResult
+
+
+def call_on_worker(fn: Callable[[], None]):
+    """Dispatch that runs the callback on the pool worker thread (only for thread-safe consumers)."""
+    fn()
+
+
+class EngineRequest:
+    """Handle for one queued/in-flight search."""
+
+    def __init__(self, board: chess.Board, callback, tag: str | None, key: int | None = None):
+        self.board = board.copy()
+        self.callback = callback
+        self.tag = tag
+        self.key = key
+        self.future: Future | None = None
+        # stop_event reaches the engine; _cancelled additionally suppresses delivery.
+        self.stop_event = threading.Event()
+        self._cancelled = False
+        self._completed = False
+        self._result: SearchResult | None = None
+
+    def cancel(self):
+        """Drop the request; a running search is told to stop and its result is discarded."""
+        self._cancelled = True
+        self.stop_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def finish_now(self):
+        """Ask a running search to return its best move so far (still delivered)."""
+        self.stop_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def result(self, timeout: float | None = None) -> SearchResult | None:
+        return self.future.result(timeout=timeout)
+
+
+class EngineService:
+    def __init__(self, engine, dispatch: Callable[[Callable[[], None]], None], owner=None):
+        """
+        engine: EnginePool, or a single StockfishEngine (wrapped in a one-process pool)
+        dispatch: called with a zero-arg function to run it on the consumer thread.
+                  Required; pass call_on_worker to run it on the pool worker itself.
+        owner: id passed to the pool's fair scheduler when several services share it.
+        """
+        self.pool = engine if isinstance(engine, EnginePool) else EnginePool.from_engine(engine)
+        if dispatch is None:
+            raise TypeError("EngineService needs an explicit dispatch (e.g. TkDispatcher.post or call_on_worker)")
+        self._dispatch = dispatch
+        self.owner = owner
+        self._pending: list[EngineRequest] = []
+        self._lock = threading.Lock()
+
+    # -----------------------------------------------------
+    # Public API
+    # -----------------------------------------------------
+    def request_bestmove(
+        self,
+        board: chess.Board,
+        callback: Callable[[SearchResult | None], None] | None = None,
+        depth: int | None = None,
+        tag: str | None = None,
+        priority: int = INTERACTIVE,
+        key: int | None = None,
+    ) -> EngineRequest:
+        """Queue a search of `board`; `callback(result)` runs via dispatch unless cancelled."""
+        req = EngineRequest(board, callback, tag, key)
+        with self._lock:
+            self._pending.append(req)
+        req.future = self.pool.submit(req.board, depth, req.stop_event, priority, key, owner=self.owner)
+        req.future.add_done_callback(lambda fut, r=req: self._on_done(r, fut))
+        return req
+
+    def adopt(self, req: EngineRequest, callback: Callable[[SearchResult | None], None]) -> bool:
+        """
+        Take over a running or finished request (e.g. a background speculation):
+        `callback` receives its result, and a running search returns its best move so far.
+        Returns False if the request has not started yet; it is cancelled and the caller
+        should submit a fresh search instead.
+        """
+        with self._lock:
+            if req.cancelled:
+                return False
+            if not req._completed and not req.future.running():
+                queued = True
+            else:
+                queued = False
+                req.callback = callback
+                completed = req._completed
+        if queued:
+            req.cancel()
+            return False
+        if completed:
+            self._dispatch(lambda: self._deliver(req, req._result))
+        else:
+            req.finish_now()
+        return True
+
+    def cancel(self, tag: str | None = None):
+        """Cancel every pending request (or only those with `tag`)."""
+        with self._lock:
+            targets = [r for r in self._pending if tag is None or r.tag == tag]
+        for req in targets:
+            req.cancel()
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return any(not r.cancelled for r in self._pending)
+
+    def shutdown(self):
+        self.cancel()
+        self.pool.shutdown()
+
+    # -----------------------------------------------------
+    # Internal
+    # -----------------------------------------------------
+    def _on_done(self, req: EngineRequest, fut: Future):
+        # Runs on a pool worker thread (or the cancelling thread).
+        # A failed search is reported as "no result" so callers never wait forever.
+        result = None if fut.cancelled() or fut.exception() else fut.result()
+        with self._lock:
+            if req in self._pending:
+                self._pending.remove(req)
+            req._result = result
+            req._completed = True
+            callback = req.callback
+        if fut.cancelled() or req.cancelled or not callback:
+            return
+        self._dispatch(lambda: self._deliver(req, result))
+
+    @staticmethod
+    def _deliver(req: EngineRequest, result: SearchResult | None):
+        # Re-check on the consumer thread: cancel() may have raced with the search.
+        if not req.cancelled:
+            req.callback(result)
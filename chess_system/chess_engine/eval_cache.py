@@ -0,0 +1,108 @@
+"""
+LRU cache of engine results keyed by Polyglot Zobrist hash.
+
+An entry searched to depth d satisfies any request for depth <= d, so a
+depth-12 result is reused by later depth-12 (or shallower) requests.
+Eviction is by entry count and by an approximate memory budget.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .stockfish_engine import SearchResult
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    move: str | None
+    score: int | None
+    depth: int
+
+    def to_result(self) -> SearchResult:
+        return SearchResult(move=self.move, score=self.score, depth=self.depth)
+
+
+class EvalCache:
+    def __init__(self, max_entries: int = 50_000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: int, depth: int) -> SearchResult | None:
+        """Return a cached result searched at least to `depth`, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.depth < depth:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.to_result()
+
+    def peek(self, key: int) -> SearchResult | None:
+        """Cached result at any depth, without counting a lookup or refreshing its LRU position."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry.to_result() if entry is not None else None
+
+    def put(self, key: int, result: SearchResult):
+        """Store `result` unless a deeper entry for the same position is already cached."""
+        if result.move is None:
+            return
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                if old.depth > result.depth:
+                    self._entries.move_to_end(key)
+                    return
+                self._bytes -= self._entry_size(key, old)
+            entry = CacheEntry(result.move, result.score, result.depth)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._bytes += self._entry_size(key, entry)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # -----------------------------------------------------
+    # Internal
+    # -----------------------------------------------------
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(key, entry)
+            self.evictions += 1
+
+    @staticmethod
+    def _entry_size(key: int, entry: CacheEntry) -> int:
+        # Key + entry object + move string; dict slot overhead is roughly constant.
+        return sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry.move) + 64
@@ -1,42 +1,74 @@
 import chess
+from .move_history import MoveHistory
+from .move_index import MOVE_INDEXES, MoveIndex, engine_preference
 from .stockfish_engine import StockfishEngine
+from .variation_tree import CHECKPOINT, NONE, ROOT, VariationTree
+from .zobrist import ZobristTracker
 
 
 class ImagineSimulator:
-    def __init__(self, engine: StockfishEngine | None = None):
+    def __init__(self, engine: StockfishEngine | None = None, journal=None):
         self.engine = engine or StockfishEngine()
+        self.journal = journal  # SessionJournal, or None
         self.base_board: chess.Board | None = None
         self.board: chess.Board | None = None
         self._history: list[chess.Move] = []
+        self._zobrist = ZobristTracker()
+        self._base_key = 0
+        self.history = MoveHistory()
+        # Every line explored from base_board; `node` is the current position in it.
+        self.tree: VariationTree | None = None
+        self.node = ROOT
 
-    def start(self, board: chess.Board):
-        """Capture the current real board as the base for imagination."""
+    @property
+    def zobrist(self) -> int:
+        """Polyglot Zobrist key of the imagined position (maintained incrementally)."""
+        return self._zobrist.key
+
+    def start(self, board: chess.Board, key: int | None = None):
+        """Capture the current real board as the base for imagination (`key`: its Zobrist key, if known)."""
         self.base_board = board.copy()
         self.board = board.copy()
         self._history = []
+        self._zobrist.reset(self.board, key)
+        self._base_key = self._zobrist.key
+        self.history.reset(self.board)
+        # Lines explored earlier from the same position are kept (reachable with forward()).
+        if self.tree is None or self.tree.key(ROOT) != self._base_key:
+            self.tree = VariationTree(self.board, self._base_key)
+        self.node = ROOT
+        if self.journal is not None:
+            self.journal.imagine_start()
 
     def reset(self):
         if self.base_board:
             self.board = self.base_board.copy()
+            self._zobrist.reset(self.board, self._base_key)
+            self.history.reset(self.board)
         self._history = []
+        self.node = ROOT  # the tree is kept
+        if self.journal is not None:
+            self.journal.imagine_reset()
 
     def move(self, mov: str):
         if self.board is None:
             raise RuntimeError("ImagineSimulator not started")
 
-        mov = mov.strip()
-        candidate = self._parse_move(mov)
-
-        if candidate not in self.board.legal_moves:
-            raise ValueError("Illegal imagine move")
-
-        self.board.push(candidate)
-        self._history.append(candidate)
+        self._push(self._parse_move(mov.strip()))
 
     def bestmove(self):
         if self.board is None:
             raise RuntimeError("ImagineSimulator not started")
-        return self.engine.get_bestmove(self.board)
+        cached = self.tree.result(self.node)
+        if cached is not None:
+            return cached
+        return self.engine.get_bestmove(self.board, key=self.zobrist)
+
+    def cached_bestmove(self) -> str | None:
+        """Engine best move already found for the current node (e.g. on an earlier visit)."""
+        if self.tree is None:
+            return None
+        return self.tree.result(self.node)
 
     def make_bestmove(self, move_uci: str):
         if self.board is None:
@@ -44,39 +76,86 @@ class ImagineSimulator:
         if move_uci is None:
             return
         move = chess.Move.from_uci(move_uci)
-        if move not in self.board.legal_moves:
+        if move not in self.move_index():
             return
-        self.board.push(move)
-        self._history.append(move)
+        self.tree.set_result(self.node, move_uci)
+        self._push(move)
 
     def back(self):
-        if self.board is None or not self._history:
+        """Go to the parent node; the line stays in the tree."""
+        if self.board is None or self.node == ROOT:
             return False
-        self.board.pop()
-        self._history.pop()
+        self.goto(self.tree.parent(self.node))
         return True
 
-    def _parse_move(self, mov: str) -> chess.Move:
+    def forward(self):
+        """Go back down the child visited last (undoes `back`)."""
+        if self.board is None or self.tree.last_child(self.node) == NONE:
+            return False
+        self.goto(self.tree.last_child(self.node))
+        return True
+
+    def switch_line(self, step: int = 1):
+        """Move to the next (step=1) / previous (step=-1) sibling line at the current ply."""
+        if self.board is None or self.node == ROOT:
+            return False
+        siblings = self.tree.children(self.tree.parent(self.node))
+        if len(siblings) < 2:
+            return False
+        self.goto(siblings[(siblings.index(self.node) + step) % len(siblings)])
+        return True
+
+    def goto(self, node: int):
+        """
+        Jump to any node of the tree. Short routes pop / push along the path
+        through the common ancestor; longer ones copy the nearest cached board.
+        SANs and Zobrist keys come from the tree, nothing is recomputed.
+        """
         if self.board is None:
             raise RuntimeError("ImagineSimulator not started")
-        if mov.lower() == "castle":
-            return self._castle_move()
-        try:
-            return self.board.parse_san(mov)
-        except Exception:
-            candidate = chess.Move.from_uci(mov)
-        return candidate
-
-    def _castle_move(self) -> chess.Move:
-        """Try short castle first, then long castle for the imagined board."""
-        assert self.board is not None
-        if self.board.turn == chess.WHITE:
-            candidates = ["e1g1", "e1c1"]
+        tree = self.tree
+        _ancestor, ups, downs = tree.route(self.node, node)
+        if ups <= len(self._zobrist) and len(downs) <= CHECKPOINT:
+            for _ in range(ups):
+                self._zobrist.pop(self.board)
+            for child in downs:
+                self._zobrist.push(self.board, tree.move(child))
         else:
-            candidates = ["e8g8", "e8c8"]
+            self.board = tree.board_at(node)
+            self._zobrist.reset(self.board, tree.key(node))
+        for _ in range(ups):
+            self._history.pop()
+            self.history.pop()
+            if self.journal is not None:
+                self.journal.imagine_pop()
+        for child in downs:
+            move = tree.move(child)
+            tree.select(child)
+            self._history.append(move)
+            self.history.push(tree.san(child))
+            if self.journal is not None:
+                self.journal.imagine_push(move)
+        self.node = node
+
+    def _push(self, move: chess.Move):
+        san = self.board.san(move)
+        self.history.push(san)
+        self._zobrist.push(self.board, move)
+        self.node = self.tree.add(self.node, move, san, self.board, self._zobrist.key)
+        self._history.append(move)
+        if self.journal is not None:
+            self.journal.imagine_push(move)
 
-        for uci in candidates:
-            move = chess.Move.from_uci(uci)
-            if move in self.board.legal_moves and self.board.is_castling(move):
-                return move
-        raise ValueError("Illegal imagine move")
+    def restore(self, moves):
+        """Replay a recovered imagine line (journal) after start(); start() began a new line, so it is journaled again."""
+        for move in moves:
+            self._push(move)
+
+    def move_index(self) -> MoveIndex:
+        """Spoken-move index of the imagined position (shared cache, keyed by Zobrist)."""
+        if self.board is None:
+            raise RuntimeError("ImagineSimulator not started")
+        return MOVE_INDEXES.get(self.board, self.zobrist)
+
+    def _parse_move(self, mov: str) -> chess.Move:
+        return self.move_index().resolve(mov, prefer=engine_preference(self.engine, self.zobrist))
@@ -0,0 +1,342 @@
+"""
+Crash-safe, append-only session journal.
+
+Every main-game move, imagine move / undo / start / reset and FSM state
+change is appended as one fixed-width 8-byte record:
+
+    type u8 | arg u8 | move u16 | crc32 u32
+
+`move` is the 16-bit encoding from move_codec, `arg` the FSM state value for
+STATE records. The CRC covers the first four bytes plus the record's index
+in the file, so a torn or stale tail is detected and cut off on open.
+
+Records are buffered in memory and written by a background thread with
+group commit: whatever accumulated during `commit_interval` is written and
+fsync'ed together. That thread is the only one touching the files, and it
+never holds the lock `_append` takes while doing I/O, so the GUI thread
+never waits on the disk. Every
+`snapshot_every` records the whole session (a few bytes per move) is written
+to `<path>.snap` (tmp + fsync + rename) and the journal restarts empty under
+the next generation number, which keeps replay short no matter how long the
+session runs. A journal older than the snapshot (crash between the two
+renames) is ignored because the snapshot already contains it.
+
+    journal = SessionJournal(".journal/session")
+    board = BoardManager(engine, journal=journal)
+    ...
+    fsm = FSMController(board, imagine, ..., journal=journal)
+    fsm.restore(journal.recovered)
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+
+import chess
+
+from .move_codec import decode_move, encode_move
+
+MAIN_PUSH = 1
+IMAGINE_START = 2
+IMAGINE_PUSH = 3
+IMAGINE_POP = 4
+IMAGINE_RESET = 5
+STATE = 6
+
+_RECORD = struct.Struct("<BBHI")
+_HEADER = struct.Struct("<4sII")  # magic, format version, generation
+_SNAP_HEADER = struct.Struct("<4sIIBBHII")  # magic, version, generation, state, imagining, pad, n_main, n_imagine
+_MAGIC = b"CHJ1"
+_SNAP_MAGIC = b"CHS1"
+_VERSION = 1
+
+
+@dataclass
+class Recovered:
+    """Session contents rebuilt from the snapshot + journal."""
+
+    main_moves: list[chess.Move]
+    imagine_moves: list[chess.Move] | None  # None: not in an imagine line
+    state: int | None  # last FSM state value, if any was recorded
+    board: chess.Board = field(default_factory=chess.Board)  # main board after main_moves
+
+    @property
+    def empty(self) -> bool:
+        return not self.main_moves and self.imagine_moves is None and self.state is None
+
+    @property
+    def game_over(self) -> bool:
+        return self.board.is_game_over()
+
+
+class _Mirror:
+    """Encoded session contents, kept in step with the records (used for snapshots)."""
+
+    __slots__ = ("main", "imagine", "state")
+
+    def __init__(self, main=None, imagine=None, state=None):
+        self.main: list[int] = main or []
+        self.imagine: list[int] | None = imagine
+        self.state: int | None = state
+
+    def apply(self, kind: int, arg: int, move: int):
+        if kind == MAIN_PUSH:
+            self.main.append(move)
+        elif kind == IMAGINE_START or kind == IMAGINE_RESET:
+            self.imagine = []
+        elif kind == IMAGINE_PUSH and self.imagine is not None:
+            self.imagine.append(move)
+        elif kind == IMAGINE_POP and self.imagine:
+            self.imagine.pop()
+        elif kind == STATE:
+            self.state = arg
+
+
+def _crc(head: bytes, index: int) -> int:
+    return zlib.crc32(head + index.to_bytes(4, "little"))
+
+
+class SessionJournal:
+    def __init__(self, path, commit_interval: float = 0.05, snapshot_every: int = 512):
+        """
+        path: journal file; the snapshot lives next to it as `<path>.snap`.
+        commit_interval: group-commit window in seconds.
+        snapshot_every: records after which a snapshot replaces the journal.
+        """
+        self.path = str(path)
+        self.snap_path = self.path + ".snap"
+        self.commit_interval = commit_interval
+        self.snapshot_every = snapshot_every
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._pending: list[bytes] = []
+        self._reset_requested = False
+        self._closed = False
+        self._flush_requested = 0
+        self._flushed = 0
+
+        started = time.perf_counter()
+        self._generation, self._mirror = self._load_snapshot()
+        self._fd, self._count = self._open_journal()
+        self.recovered = self._recovered()
+        self.replay_ms = (time.perf_counter() - started) * 1000
+
+        self._thread = threading.Thread(target=self._writer, daemon=True, name="journal")
+        self._thread.start()
+
+    # -----------------------------------------------------
+    # Recording
+    # -----------------------------------------------------
+    def main_push(self, move: chess.Move):
+        self._append(MAIN_PUSH, 0, encode_move(move))
+
+    def imagine_start(self):
+        self._append(IMAGINE_START, 0, 0)
+
+    def imagine_push(self, move: chess.Move):
+        self._append(IMAGINE_PUSH, 0, encode_move(move))
+
+    def imagine_pop(self):
+        self._append(IMAGINE_POP, 0, 0)
+
+    def imagine_reset(self):
+        self._append(IMAGINE_RESET, 0, 0)
+
+    def state(self, value: int):
+        self._append(STATE, value, 0)
+
+    # -----------------------------------------------------
+    # Lifecycle
+    # -----------------------------------------------------
+    def flush(self, timeout: float = 2.0):
+        """Commit everything recorded so far and wait for the fsync."""
+        with self._cond:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._cond.notify()
+            self._cond.wait_for(lambda: self._flushed >= target or self._closed, timeout)
+
+    def reset(self):
+        """Forget the session (e.g. the game is over): empty snapshot, empty journal. Waits for the disk."""
+        with self._cond:
+            self._pending = []
+            self._mirror = _Mirror()
+            self._reset_requested = True
+        self.flush()
+        self.recovered = Recovered([], None, None)
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=2.0)
+        os.close(self._fd)
+
+    # -----------------------------------------------------
+    # Internal: appending
+    # -----------------------------------------------------
+    def _append(self, kind: int, arg: int, move: int):
+        head = _RECORD.pack(kind, arg, move, 0)[:4]
+        with self._cond:
+            self._mirror.apply(kind, arg, move)
+            self._pending.append(head + _crc(head, self._count).to_bytes(4, "little"))
+            self._count += 1
+            if len(self._pending) == 1:
+                self._cond.notify()
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed or self._flushed < self._flush_requested)
+                if self._closed and not self._pending:
+                    return
+            # Group commit: let records that arrive shortly after the first share one fsync.
+            if self._flushed >= self._flush_requested:
+                time.sleep(self.commit_interval)
+            with self._cond:
+                batch, self._pending = self._pending, []
+                target = self._flush_requested
+                snapshot = None
+                if self._count >= self.snapshot_every or self._reset_requested:
+                    # The snapshot includes `batch`, so it never reaches the old journal.
+                    snapshot = self._begin_snapshot_locked()
+                    self._reset_requested = False
+                    batch = []
+            # Disk I/O without the lock. Records appended meanwhile already belong
+            # to the new generation and go out with the next batch.
+            if snapshot is not None:
+                self._write_snapshot(*snapshot)
+            if batch:
+                os.write(self._fd, b"".join(batch))
+                os.fsync(self._fd)
+            with self._cond:
+                self._flushed = max(self._flushed, target)
+                self._cond.notify_all()
+
+    def _begin_snapshot_locked(self) -> tuple[int, bytes]:
+        """Encode the mirror as the next generation's snapshot and restart record numbering (under _cond)."""
+        generation = self._generation + 1
+        mirror = self._mirror
+        imagine = mirror.imagine or []
+        body = _SNAP_HEADER.pack(
+            _SNAP_MAGIC,
+            _VERSION,
+            generation,
+            mirror.state or 0,
+            mirror.imagine is not None,
+            0,
+            len(mirror.main),
+            len(imagine),
+        ) + struct.pack(f"<{len(mirror.main)}H{len(imagine)}H", *mirror.main, *imagine)
+        self._generation = generation
+        self._count = 0
+        return generation, body + zlib.crc32(body).to_bytes(4, "little")
+
+    def _write_snapshot(self, generation: int, data: bytes):
+        """Writer thread: snapshot first, then an empty journal of the same generation."""
+        _write_atomic(self.snap_path, data)
+        # A crash here leaves the old journal, which its older generation makes us ignore.
+        _write_atomic(self.path, _HEADER.pack(_MAGIC, _VERSION, generation))
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+
+    # -----------------------------------------------------
+    # Internal: recovery
+    # -----------------------------------------------------
+    def _load_snapshot(self) -> tuple[int, _Mirror]:
+        try:
+            with open(self.snap_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0, _Mirror()
+        body, crc = data[:-4], data[-4:]
+        if len(data) < _SNAP_HEADER.size + 4 or zlib.crc32(body).to_bytes(4, "little") != crc:
+            # Snapshots are renamed into place whole, so this is not a torn write.
+            raise ValueError(f"Corrupt journal snapshot: {self.snap_path}")
+        magic, _version, generation, state, imagining, _pad, n_main, n_imagine = _SNAP_HEADER.unpack_from(body)
+        if magic != _SNAP_MAGIC:
+            raise ValueError(f"Not a journal snapshot: {self.snap_path}")
+        codes = struct.unpack_from(f"<{n_main + n_imagine}H", body, _SNAP_HEADER.size)
+        mirror = _Mirror(list(codes[:n_main]), list(codes[n_main:]) if imagining else None, state or None)
+        return generation, mirror
+
+    def _open_journal(self) -> tuple[int, int]:
+        """Replay the journal into the mirror; returns (fd, record count) with any bad tail cut off."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        header_ok = len(data) >= _HEADER.size
+        if header_ok:
+            magic, _version, generation = _HEADER.unpack_from(data)
+            header_ok = magic == _MAGIC
+        if not header_ok or generation != self._generation:
+            # Missing, or superseded by the snapshot (crash between the two renames).
+            _write_atomic(self.path, _HEADER.pack(_MAGIC, _VERSION, self._generation))
+            return os.open(self.path, os.O_WRONLY | os.O_APPEND), 0
+
+        records = memoryview(data)[_HEADER.size :]
+        usable = len(records) - len(records) % _RECORD.size
+        count = 0
+        apply = self._mirror.apply
+        for kind, arg, move, crc in _RECORD.iter_unpack(records[:usable]):
+            offset = count * _RECORD.size
+            if _crc(bytes(records[offset : offset + 4]), count) != crc:
+                break
+            apply(kind, arg, move)
+            count += 1
+        end = _HEADER.size + count * _RECORD.size
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+        if end < len(data):
+            os.ftruncate(fd, end)
+            os.fsync(fd)
+        return fd, count
+
+    def _recovered(self) -> Recovered:
+        """Decode the mirror, replaying the main moves; an illegal one ends the game there."""
+        mirror = self._mirror
+        board = chess.Board()
+        main_moves = []
+        for code in mirror.main:
+            move = decode_move(code)
+            if not board.is_legal(move):
+                # CRC-valid but not a game (e.g. a journal from another build): keep the
+                # legal prefix, and drop the imagine line, which started from the lost end.
+                del mirror.main[len(main_moves) :]
+                mirror.imagine = None
+                break
+            board.push(move)
+            main_moves.append(move)
+        return Recovered(
+            main_moves=main_moves,
+            imagine_moves=None if mirror.imagine is None else [decode_move(c) for c in mirror.imagine],
+            state=mirror.state,
+            board=board,
+        )
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    # Make the rename itself durable.
+    dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,18 @@
+"""
+16-bit move encoding: from square (6 bits) | to square (6 bits) << 6 | promotion piece type (3 bits) << 12.
+
+0 is never a legal move (a1 → a1), so it can mark "no move".
+"""
+
+import chess
+
+NO_MOVE = 0
+
+
+def encode_move(move: chess.Move) -> int:
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code: int) -> chess.Move:
+    promotion = (code >> 12) & 7
+    return chess.Move(code & 63, (code >> 6) & 63, promotion or None)
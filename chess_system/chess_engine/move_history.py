@@ -0,0 +1,87 @@
+"""
+SAN move list for one line of play, kept up to date from push/pop calls.
+
+Each ply's SAN is computed once (by the owner, before pushing) and stored.
+The list is grouped into two-ply lines ("12. e4 e5" or "12... e5 Nf3" when
+the line starts with Black), and subscribers are told which line changed,
+so a push or pop costs O(1) regardless of game length.
+"""
+
+from __future__ import annotations
+
+from typing import Callable
+
+import chess
+
+# subscriber(line_index, text); text is None when the line was removed.
+Listener = Callable[[int, "str | None"], None]
+
+
+class MoveHistory:
+    def __init__(self, board: chess.Board | None = None):
+        self._sans: list[str] = []
+        self._listeners: list[Listener] = []
+        self._base_fullmove = 1
+        self._base_white = True
+        if board is not None:
+            self.reset(board)
+
+    @classmethod
+    def from_moves(cls, base_board: chess.Board, moves: list[chess.Move]) -> "MoveHistory":
+        """Build a history by replaying `moves` from `base_board` (one SAN per ply)."""
+        history = cls(base_board)
+        board = base_board.copy(stack=False)
+        for move in moves:
+            history.push(board.san(move))
+            board.push(move)
+        return history
+
+    def subscribe(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def reset(self, board: chess.Board):
+        """Start an empty line whose first ply is played from `board`."""
+        for idx in reversed(range(self.line_count())):
+            self._emit(idx, None)
+        self._sans = []
+        self._base_fullmove = board.fullmove_number
+        self._base_white = board.turn == chess.WHITE
+
+    def push(self, san: str):
+        self._sans.append(san)
+        self._emit(self.line_count() - 1, self._line_text(self.line_count() - 1))
+
+    def pop(self) -> str | None:
+        if not self._sans:
+            return None
+        san = self._sans.pop()
+        idx = len(self._sans) // 2
+        self._emit(idx, self._line_text(idx) if idx < self.line_count() else None)
+        return san
+
+    def line_count(self) -> int:
+        return (len(self._sans) + 1) // 2
+
+    def lines(self) -> list[str]:
+        return [self._line_text(i) for i in range(self.line_count())]
+
+    def text(self) -> str:
+        """PGN-like lines (e.g. '1. e4 e5') joined with newlines."""
+        return "\n".join(self.lines())
+
+    def __len__(self) -> int:
+        return len(self._sans)
+
+    # -----------------------------------------------------
+    # Internal
+    # -----------------------------------------------------
+    def _line_text(self, idx: int) -> str:
+        first_ply = 2 * idx
+        # Fullmove number of the line's first ply, counted from the base position.
+        move_num = self._base_fullmove + (first_ply + (0 if self._base_white else 1)) // 2
+        prefix = f"{move_num}." if self._base_white else f"{move_num}..."
+        return " ".join([prefix, *self._sans[first_ply : first_ply + 2]])
+
+    def _emit(self, idx: int, text: str | None):
+        for listener in self._listeners:
+            listener(idx, text)
@@ -0,0 +1,165 @@
+"""
+Spoken-move index: every way a move can be named, built once per position.
+
+Voice commands arrive as a destination ("e4"), piece + destination ("Ne4"),
+from → to ("g1f3") or "castle". MoveIndex maps each of these to the legal
+moves of one position, so resolving a command is a dict lookup instead of
+parse_san + from_uci + a legal-move scan. Indexes are cached by Polyglot
+Zobrist key in a small LRU shared by BoardManager, ImagineSimulator and the
+voice parser (MOVE_INDEXES).
+
+When a spoken form matches several moves ("Ne4" with knights on c3 and g3),
+resolve() asks an optional `prefer` policy (e.g. the engine's cached best
+move) and otherwise raises AmbiguousMove listing the candidates, so the
+caller can ask for the from-square.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import chess
+import chess.polyglot
+
+_PIECE_DEST = re.compile(r"^([nbrqk]?)([a-h][1-8])$")
+_CASTLE_SHORT = {"castle short", "castle kingside", "short castle", "o-o", "0-0"}
+_CASTLE_LONG = {"castle long", "castle queenside", "long castle", "o-o-o", "0-0-0"}
+
+Prefer = Callable[[list[chess.Move]], "chess.Move | None"]
+
+
+class AmbiguousMove(ValueError):
+    def __init__(self, text: str, candidates: list[chess.Move], sans: list[str]):
+        self.text = text
+        self.candidates = candidates
+        self.sans = sans
+        super().__init__(f"Ambiguous move '{text}': {' / '.join(sans)}")
+
+
+class MoveIndex:
+    __slots__ = ("board", "legal", "by_uci", "by_dest", "by_piece_dest", "short", "long")
+
+    def __init__(self, board: chess.Board):
+        # Private copy: the index outlives the caller's next push.
+        self.board = board.copy(stack=False)
+        self.legal: list[chess.Move] = list(self.board.legal_moves)
+        self.by_uci: dict[str, chess.Move] = {}
+        self.by_dest: dict[str, list[chess.Move]] = {}
+        self.by_piece_dest: dict[tuple[str, str], list[chess.Move]] = {}
+        self.short: chess.Move | None = None
+        self.long: chess.Move | None = None
+
+        for move in self.legal:
+            uci = move.uci()
+            self.by_uci[uci] = move
+            if move.promotion == chess.QUEEN:
+                # "e7e8" means the queen promotion.
+                self.by_uci.setdefault(uci[:4], move)
+            elif move.promotion:
+                continue  # under-promotions only by explicit UCI / SAN
+            dest = chess.square_name(move.to_square)
+            piece = self.board.piece_type_at(move.from_square)
+            letter = "" if piece == chess.PAWN else chess.piece_symbol(piece)
+            self.by_dest.setdefault(dest, []).append(move)
+            self.by_piece_dest.setdefault((letter, dest), []).append(move)
+            if self.board.is_kingside_castling(move):
+                self.short = move
+            elif self.board.is_queenside_castling(move):
+                self.long = move
+
+    def __contains__(self, move: chess.Move) -> bool:
+        return self.by_uci.get(move.uci()) == move
+
+    def candidates(self, text: str) -> list[chess.Move]:
+        """Legal moves `text` can mean (empty if none)."""
+        spoken = text.strip().lower()
+        if spoken == "castle":
+            # Short castle first, then long (as the old "castle" command did).
+            return [m for m in (self.short, self.long) if m is not None][:1]
+        if spoken in _CASTLE_SHORT:
+            return [self.short] if self.short else []
+        if spoken in _CASTLE_LONG:
+            return [self.long] if self.long else []
+
+        move = self.by_uci.get(spoken)
+        if move is not None:
+            return [move]
+
+        m = _PIECE_DEST.match(spoken)
+        if m:
+            letter, dest = m.groups()
+            moves = self.by_piece_dest.get((letter, dest))
+            if moves:
+                return moves
+            if not letter:
+                # Bare destination with no pawn move there: any piece that can go.
+                return self.by_dest.get(dest, [])
+            return []
+
+        # Full SAN typed in the GUI ("exd5", "Nbd7", "e8=N", "O-O").
+        try:
+            return [self.board.parse_san(text.strip())]
+        except ValueError:
+            return []
+
+    def resolve(self, text: str, prefer: Prefer | None = None) -> chess.Move:
+        """The single legal move `text` names; raises ValueError / AmbiguousMove."""
+        moves = self.candidates(text)
+        if len(moves) == 1:
+            return moves[0]
+        if not moves:
+            raise ValueError("Illegal move")
+        if prefer is not None:
+            move = prefer(moves)
+            if move is not None and move in moves:
+                return move
+        raise AmbiguousMove(text, moves, [self.board.san(m) for m in moves])
+
+
+class MoveIndexCache:
+    """LRU of MoveIndex by Zobrist key; thread-safe (the voice thread reads it too)."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[int, MoveIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board: chess.Board, key: int | None = None) -> MoveIndex:
+        if key is None:
+            key = chess.polyglot.zobrist_hash(board)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+        index = MoveIndex(board)
+        with self._lock:
+            self._entries[key] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+
+def engine_preference(engine, key: int) -> Prefer:
+    """Policy: pick the candidate the engine already chose for this position, if cached."""
+
+    def prefer(moves: list[chess.Move]) -> chess.Move | None:
+        cache = getattr(engine, "cache", None)
+        # peek: a tie-break is not an engine lookup, so stats and LRU order stay untouched.
+        result = cache.peek(key) if cache is not None else None
+        if result is None or result.move is None:
+            return None
+        return next((m for m in moves if m.uci() == result.move), None)
+
+    return prefer
+
+
+# Shared by BoardManager, ImagineSimulator and the voice parser.
+MOVE_INDEXES = MoveIndexCache()
@@ -0,0 +1,92 @@
+"""
+Optional Polyglot opening book consulted before the engine.
+
+The `.bin` file is memory-mapped and looked up by binary search on its
+sorted Zobrist keys (python-chess MemoryMappedReader), so a probe costs a
+handful of page reads and no engine round trip. Positions that are not in
+the book (or past `max_ply`), or whose entries all have weight 0, return
+None and fall through to the engine.
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import chess
+import chess.polyglot
+
+from .stockfish_engine import SearchResult
+
+DEFAULT_BOOK = Path(__file__).resolve().parent.parent / "books" / "book.bin"
+
+
+class OpeningBook:
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "weighted",
+        max_ply: int = 30,
+        rng: random.Random | None = None,
+    ):
+        """
+        mode: "weighted" (random, proportional to entry weight) or "best" (highest weight)
+        max_ply: stop probing after this many plies; books rarely go deeper
+        """
+        if mode not in ("weighted", "best"):
+            raise ValueError(f"unknown book mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.max_ply = max_ply
+        self._rng = rng or random.Random()
+        self._reader = chess.polyglot.open_reader(self.path)
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str | Path = DEFAULT_BOOK, **kwargs) -> "OpeningBook | None":
+        """Open the book if the file exists; the book layer is optional."""
+        if not Path(path).is_file():
+            return None
+        return cls(path, **kwargs)
+
+    def pick(self, board: chess.Board, key: int | None = None) -> SearchResult | None:
+        """Return a book move for `board` (Zobrist `key` if already known), or None if out of book."""
+        if board.ply() >= self.max_ply:
+            return None
+        if key is None:
+            key = chess.polyglot.zobrist_hash(board)
+
+        candidates = []
+        for entry in self._reader.find_all(key):
+            if entry.weight == 0:
+                continue  # Polyglot: weight 0 means "known, but never play it"
+            move = _normalize_castling(board, entry.move)
+            if board.is_legal(move):
+                candidates.append((move, entry.weight))
+        if not candidates:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if self.mode == "best":
+            move = max(candidates, key=lambda c: c[1])[0]
+        else:
+            moves, weights = zip(*candidates)
+            move = self._rng.choices(moves, weights=weights)[0]
+        return SearchResult(move=move.uci())
+
+    def close(self):
+        self._reader.close()
+
+
+def _normalize_castling(board: chess.Board, move: chess.Move) -> chess.Move:
+    """Polyglot stores castling as king-takes-rook (e1h1); convert to e1g1/e1c1."""
+    if board.piece_type_at(move.from_square) != chess.KING:
+        return move
+    rook = board.piece_at(move.to_square)
+    if rook is None or rook.piece_type != chess.ROOK or rook.color != board.turn:
+        return move
+    rank = chess.square_rank(move.from_square)
+    file = 6 if move.to_square > move.from_square else 2
+    return chess.Move(move.from_square, chess.square(file, rank))
@@ -1,37 +1,131 @@
 import random
+import sys
+import threading
+from dataclasses import dataclass
 
 import chess
 import chess.engine
 
+from util.logger import WARNING
+
 # Note: The path to the Stockfish executable varies by operating system.
 #   Linux:    /usr/games/stockfish
-#   macOS:    /usr/local/bin/stockfish 
+#   macOS:    /usr/local/bin/stockfish
 #   Windows:  "C:\\Program Files\\Stockfish\\stockfish.exe"
 # Update the `path` argument as needed for your environment.
 
+MATE_SCORE = 100000
+# How often a running search checks its stop_event (seconds).
+STOP_POLL = 0.01
+
+
+@dataclass
+class SearchResult:
+    """Outcome of one search: best move (UCI), score in cp for the side to move, depth reached."""
+
+    move: str | None
+    score: int | None = None
+    depth: int = 0
+
+
 class StockfishEngine:
-    def __init__(self, path="/usr/games/stockfish", depth: int = 12):
+    def __init__(self, path="/usr/games/stockfish", depth: int = 12, options: dict | None = None, logger=None):
+        """
+        options: UCI options applied after start-up, e.g. {"Threads": 2, "Hash": 64}.
+        logger: util.logger.Logger for start-up failures; stderr if omitted.
+        A missing executable silently selects the random-move fallback.
+        """
         self.depth = depth
         self._engine = None
         try:
             self._engine = chess.engine.SimpleEngine.popen_uci(path)
         except (FileNotFoundError, chess.engine.EngineError, OSError):
-            self._engine = None
+            return
+        if options:
+            try:
+                self._engine.configure(options)
+            except (chess.engine.EngineError, OSError) as e:
+                # Don't leave the process running behind a disabled engine.
+                self.close()
+                _warn(logger, f"Engine options {options} rejected ({e}); using random moves instead")
 
-    def get_bestmove(self, board: chess.Board) -> str | None:
+    def get_bestmove(self, board: chess.Board, key: int | None = None) -> str | None:
+        """`key` (Zobrist) is accepted for parity with EnginePool, which uses it for its cache."""
+        return self.search(board).move
+
+    def search(
+        self,
+        board: chess.Board,
+        depth: int | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> SearchResult:
+        """
+        Search `board` to `depth` (default: self.depth).
+        If `stop_event` is set while searching, the engine is told to stop
+        within STOP_POLL seconds and the best move found so far is returned.
+        """
+        depth = depth or self.depth
         if self._engine:
-            result = self._engine.play(board, chess.engine.Limit(depth=self.depth))
-            return result.move.uci()
+            limit = chess.engine.Limit(depth=depth)
+            with self._engine.analysis(board, limit) as analysis:
+                finished = threading.Event()
+                if stop_event is not None:
+                    # Watch the flag on its own thread: the engine may print nothing
+                    # for a long time, so checking it per info line is too late.
+                    threading.Thread(
+                        target=_stop_when_set,
+                        args=(analysis, stop_event, finished),
+                        daemon=True,
+                        name="engine-stop",
+                    ).start()
+                try:
+                    best = analysis.wait()
+                    info = analysis.info
+                finally:
+                    finished.set()
+            if best.move is None:
+                return SearchResult(move=None)
+            score = info.get("score")
+            return SearchResult(
+                move=best.move.uci(),
+                score=score.pov(board.turn).score(mate_score=MATE_SCORE) if score else None,
+                depth=info.get("depth", 0),
+            )
 
         # Fallback: return a random legal move so that imagine mode keeps moving.
         legal_moves = list(board.legal_moves)
         if not legal_moves:
-            return None
-        return random.choice(legal_moves).uci()
+            return SearchResult(move=None)
+        return SearchResult(move=random.choice(legal_moves).uci())
 
-    def __del__(self):
+    def close(self):
         if self._engine:
             try:
                 self._engine.quit()
             except Exception:
                 pass
+            self._engine = None
+
+    def __del__(self):
+        self.close()
+
+
+def _stop_when_set(analysis, stop_event, finished: threading.Event):
+    """
+    Tell the engine to stop as soon as `stop_event` is set, until the search has finished.
+    `stop_event` only needs is_set() (EnginePool passes a view over several events).
+    """
+    while not finished.wait(STOP_POLL):
+        if stop_event.is_set():
+            try:
+                analysis.stop()
+            except chess.engine.EngineTerminatedError:
+                pass
+            return
+
+
+def _warn(logger, text: str):
+    if logger is not None:
+        logger.write(text, tag="ENGINE", level=WARNING)
+    else:
+        print(f"[ENGINE] {text}", file=sys.stderr)
@@ -0,0 +1,184 @@
+"""
+Variation tree for IMAGINE mode.
+
+Every line explored from the imagine base position is kept: lines share
+their common prefix, and a node is one ply. Nodes are indices into parallel
+arrays (parent, 16-bit move from move_codec, Zobrist key, first child, next
+sibling, last visited child, depth) plus a reference to the move's interned
+SAN string: about 40 bytes per node, so thousands of explored nodes cost
+well under a megabyte (cached boards add ~600 bytes each).
+
+Boards are cached only at branch points and every CHECKPOINT plies;
+board_at() copies the nearest cached ancestor and pushes at most
+CHECKPOINT moves, so switching to a sibling line or jumping to any node
+never replays from the base board. Engine best moves are cached per node.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+
+import chess
+
+from .move_codec import decode_move, encode_move
+
+ROOT = 0
+NONE = -1
+# A board is cached at least every CHECKPOINT plies along any line.
+CHECKPOINT = 16
+
+
+class VariationTree:
+    def __init__(self, base_board: chess.Board, key: int):
+        """base_board: imagine base position (root node); key: its Zobrist key."""
+        self._parent = array("i", [NONE])
+        self._move = array("H", [0])
+        self._key = array("Q", [key])
+        self._first_child = array("i", [NONE])
+        self._next_sibling = array("i", [NONE])
+        self._last_child = array("i", [NONE])
+        self._depth = array("H", [0])
+        self._san: list[str] = [""]
+        # stack=1 keeps the last move, so the GUI can still highlight it.
+        self._boards: dict[int, chess.Board] = {ROOT: base_board.copy(stack=1)}
+        self._results: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    # -----------------------------------------------------
+    # Node accessors
+    # -----------------------------------------------------
+    def parent(self, node: int) -> int:
+        return self._parent[node]
+
+    def move(self, node: int) -> chess.Move:
+        """Move leading to `node` (not meaningful for ROOT)."""
+        return decode_move(self._move[node])
+
+    def key(self, node: int) -> int:
+        return self._key[node]
+
+    def depth(self, node: int) -> int:
+        return self._depth[node]
+
+    def san(self, node: int) -> str:
+        """SAN of the move leading to `node`."""
+        return self._san[node]
+
+    def children(self, node: int) -> list[int]:
+        """Children in the order they were first explored."""
+        result = []
+        child = self._first_child[node]
+        while child != NONE:
+            result.append(child)
+            child = self._next_sibling[child]
+        return result
+
+    def child(self, node: int, move: chess.Move) -> int:
+        """Child of `node` reached by `move`, or NONE."""
+        code = encode_move(move)
+        child = self._first_child[node]
+        while child != NONE and self._move[child] != code:
+            child = self._next_sibling[child]
+        return child
+
+    def last_child(self, node: int) -> int:
+        """Child of `node` visited most recently, or NONE."""
+        return self._last_child[node]
+
+    def moves(self, node: int) -> list[chess.Move]:
+        """Moves from ROOT to `node`."""
+        codes = []
+        while node != ROOT:
+            codes.append(self._move[node])
+            node = self._parent[node]
+        return [decode_move(code) for code in reversed(codes)]
+
+    # -----------------------------------------------------
+    # Growing the tree
+    # -----------------------------------------------------
+    def add(self, parent: int, move: chess.Move, san: str, board: chess.Board, key: int) -> int:
+        """
+        Child of `parent` for `move`, created if new (prefixes are shared).
+        board / key: the position after `move`, used for board caching.
+        """
+        child = self.child(parent, move)
+        if child == NONE:
+            child = len(self._parent)
+            if self._first_child[parent] == NONE:
+                self._first_child[parent] = child
+            else:
+                # `parent` becomes a branch point: cache its board (= `board` minus `move`).
+                if parent not in self._boards:
+                    before = board.copy(stack=2)
+                    before.pop()
+                    self._boards[parent] = before
+                sibling = self._first_child[parent]
+                while self._next_sibling[sibling] != NONE:
+                    sibling = self._next_sibling[sibling]
+                self._next_sibling[sibling] = child
+            depth = self._depth[parent] + 1
+            self._parent.append(parent)
+            self._move.append(encode_move(move))
+            self._key.append(key)
+            self._first_child.append(NONE)
+            self._next_sibling.append(NONE)
+            self._last_child.append(NONE)
+            self._depth.append(depth)
+            self._san.append(sys.intern(san))
+            if depth % CHECKPOINT == 0:
+                self._boards[child] = board.copy(stack=1)
+        self._last_child[parent] = child
+        return child
+
+    # -----------------------------------------------------
+    # Navigation
+    # -----------------------------------------------------
+    def route(self, src: int, dst: int) -> tuple[int, int, list[int]]:
+        """
+        Path from `src` to `dst` through their common ancestor:
+        (ancestor, plies to go up from src, nodes to go down to dst in order).
+        Costs O(length of the path), not O(depth).
+        """
+        ups = 0
+        downs = []
+        while self._depth[src] > self._depth[dst]:
+            src = self._parent[src]
+            ups += 1
+        while self._depth[dst] > self._depth[src]:
+            downs.append(dst)
+            dst = self._parent[dst]
+        while src != dst:
+            src = self._parent[src]
+            ups += 1
+            downs.append(dst)
+            dst = self._parent[dst]
+        downs.reverse()
+        return src, ups, downs
+
+    def select(self, node: int):
+        """Make `node` the last visited child of its parent (see last_child)."""
+        self._last_child[self._parent[node]] = node
+
+    def board_at(self, node: int) -> chess.Board:
+        """A new board at `node`: the nearest cached ancestor plus at most CHECKPOINT moves."""
+        codes = []
+        while node not in self._boards:
+            codes.append(self._move[node])
+            node = self._parent[node]
+        board = self._boards[node].copy()
+        for code in reversed(codes):
+            board.push(decode_move(code))
+        return board
+
+    # -----------------------------------------------------
+    # Engine results
+    # -----------------------------------------------------
+    def result(self, node: int) -> str | None:
+        """Cached engine best move (UCI) at `node`, if any."""
+        return self._results.get(node)
+
+    def set_result(self, node: int, move_uci: str):
+        self._results[node] = move_uci
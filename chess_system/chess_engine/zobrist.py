@@ -0,0 +1,73 @@
+"""
+Incremental Polyglot Zobrist hashing.
+
+`ZobristTracker` keeps the key of a board in sync across push/pop without
+rescanning the whole board: only the squares a move touches, the castling
+rights, the en-passant file and the side to move are re-hashed. Keys are
+identical to `chess.polyglot.zobrist_hash`.
+"""
+
+import chess
+import chess.polyglot
+
+_ARRAY = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_HASHER = chess.polyglot.ZobristHasher(_ARRAY)
+_TURN_KEY = _ARRAY[780]
+
+
+def _piece_key(piece: chess.Piece, square: chess.Square) -> int:
+    return _ARRAY[64 * ((piece.piece_type - 1) * 2 + int(piece.color)) + square]
+
+
+def _touched_squares(board: chess.Board, move: chess.Move) -> list[chess.Square]:
+    if board.is_castling(move):
+        # King and rook both move on the back rank; re-hash the whole rank.
+        rank = chess.square_rank(move.from_square)
+        return [chess.square(f, rank) for f in range(8)]
+    squares = [move.from_square, move.to_square]
+    if board.is_en_passant(move):
+        squares.append(chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square)))
+    return squares
+
+
+class ZobristTracker:
+    def __init__(self, board: chess.Board | None = None, key: int | None = None):
+        self._stack: list[int] = []
+        self.key = 0
+        if board is not None:
+            self.reset(board, key)
+
+    def reset(self, board: chess.Board, key: int | None = None):
+        """Full hash of `board` (or trust a known `key`, e.g. handed over from another tracker)."""
+        self._stack = []
+        self.key = key if key is not None else chess.polyglot.zobrist_hash(board)
+
+    def push(self, board: chess.Board, move: chess.Move):
+        """Push `move` onto `board` and update the key from the squares it touched."""
+        squares = _touched_squares(board, move)
+        before = [board.piece_at(sq) for sq in squares]
+        key = self.key ^ _HASHER.hash_castling(board) ^ _HASHER.hash_ep_square(board)
+
+        board.push(move)
+
+        key ^= _HASHER.hash_castling(board) ^ _HASHER.hash_ep_square(board) ^ _TURN_KEY
+        for sq, old in zip(squares, before):
+            new = board.piece_at(sq)
+            if old == new:
+                continue
+            if old:
+                key ^= _piece_key(old, sq)
+            if new:
+                key ^= _piece_key(new, sq)
+        self._stack.append(self.key)
+        self.key = key
+
+    def __len__(self) -> int:
+        """Number of pushes pop() can undo (since the last reset)."""
+        return len(self._stack)
+
+    def pop(self, board: chess.Board) -> chess.Move:
+        """Pop the last move from `board` and restore the previous key."""
+        move = board.pop()
+        self.key = self._stack.pop()
+        return move
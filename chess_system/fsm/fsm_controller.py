@@ -1,37 +1,66 @@
 import chess
 
+from chess_engine.engine_pool import BACKGROUND
+from chess_engine.move_index import AmbiguousMove
+from util.logger import DEBUG, Lazy
+from util.trace import TRACER, traced
+
 from .states import State
 
 
 class FSMController:
     ROOT_TIMEOUT = 10.0
     IMAGINE_TIMEOUT = 30.0
+    # Longest the player waits for an engine move; then the best move so far is played.
+    ENGINE_DEADLINE = 15.0
 
-    def __init__(self, board_manager, imagine_sim, logger, timer, wake_detector):
+    def __init__(self, board_manager, imagine_sim, logger, timer, wake_detector, engine_service=None, journal=None):
         self.board = board_manager
         self.imag = imagine_sim
         self.log = logger
         self.timer = timer
         self.wake_detector = wake_detector
+        # Optional EngineService: when present, engine searches run off the caller's thread.
+        self.engine_service = engine_service
+        # Optional SessionJournal: state transitions are recorded for crash recovery.
+        self.journal = journal
 
         self.state = None
+        self._pending_search = None
+        # Background search of the imagined board, started whenever it changes.
+        self._speculation = None
+        self._update_listeners = []
+        self._updates = 0  # notifications sent, to tell whether a command already sent one
         self.timer.on_timeout(self._handle_timeout)
         self._set_state(State.WAIT_WAKE)
 
     # ============================================================
     # External events
     # ============================================================
+    @traced("fsm.handle_input")
     def handle_input(self, text: str):
         text = text.strip()
         if text == "":
             return
 
+        if self.is_thinking():
+            if self.state == State.IMAGINE:
+                # A new imagine command makes the pending `take` stale.
+                self._cancel_search()
+            else:
+                self.log.write("Engine is thinking… please wait.", tag="ENGINE")
+                return
+
+        position, updates = (self.state, self.get_display_key()), self._updates
         if self.state == State.WAIT_WAKE:
             self._handle_wait_wake(text)
         elif self.state == State.ROOT:
             self._handle_root(text)
         elif self.state == State.IMAGINE:
             self._handle_imagine(text)
+        # A move / back / forward changes the displayed board without a state change.
+        if self._updates == updates and (self.state, self.get_display_key()) != position:
+            self._notify_update()
 
     def _handle_timeout(self):
         if self.state == State.ROOT:
@@ -85,38 +114,71 @@ class FSMController:
         if lowered == "back":
             if self.imag.back():
                 self.log.write("IMAGINE: reverted one imagined move", tag="INFO")
+                self._speculate()
             else:
                 self.log.write("IMAGINE: nothing to undo", tag="INFO")
             return
 
+        if lowered == "forward":
+            if self.imag.forward():
+                self.log.write("IMAGINE: replayed one imagined move", tag="INFO")
+                self._speculate()
+            else:
+                self.log.write("IMAGINE: nothing to redo", tag="INFO")
+            return
+
+        if lowered in ("next", "previous"):
+            if self.imag.switch_line(1 if lowered == "next" else -1):
+                self.log.write(f"IMAGINE: {lowered} line → {self.imag.tree.move(self.imag.node).uci()}", tag="INFO")
+                self._speculate()
+            else:
+                self.log.write("IMAGINE: no other line here", tag="INFO")
+            return
+
         if lowered == "take":
-            best = self.imag.bestmove()
-            if best:
-                self.imag.make_bestmove(best)
-                self.log.write(f"Engine best move (imagine) → {best}")
-                self.log.write_move(f"Imagine(Engine): {best}")
+            cached = self.imag.cached_bestmove()
+            if cached is not None:
+                # Already searched on an earlier visit to this node.
+                self._on_imagine_bestmove(cached)
+            elif self.engine_service:
+                self._start_search(
+                    self.imag.board,
+                    lambda result: self._on_imagine_bestmove(result.move if result else None),
+                    tag="imagine",
+                    key=self.imag.zobrist,
+                )
             else:
-                self.log.write("Engine best move unavailable.")
+                self._on_imagine_bestmove(self.imag.bestmove())
             return
 
         try:
             self.imag.move(text)
             self.log.write(f"Imagine move: {text}")
             self.log.write_move(f"Imagine: {text}")
+        except AmbiguousMove as e:
+            self._ask_disambiguation(e)
+            return
         except Exception:
             self.log.write(f"Invalid imagine move: {text}")
+            return
+        self._speculate()
 
     # ============================================================
     # Helpers
     # ============================================================
     def _process_play_move(self, move_text: str):
         self.timer.reset()
-        if not self._apply_main_move(move_text):
-            self.log.write("ROOT: invalid move, try again or say wake word later.", tag="INFO")
+        applied = self._apply_main_move(move_text)
+        if not applied:
+            if applied is False:
+                self.log.write("ROOT: invalid move, try again or say wake word later.", tag="INFO")
             return
 
         # Valid move was made; refresh ROOT timer budget so follow-up commands (if any) start fresh
         self._engine_counter_move()
+        if self.is_thinking():
+            # "Turn finished" is reported by _on_engine_reply once the search returns.
+            return
         self.timer.reset()
         self.log.write("Turn finished")
 
@@ -125,27 +187,141 @@ class FSMController:
             info = self.board.move(move_text)
             self.log.write(f"Move accepted: {info['san']} ({info['uci']})")
             self.log.write_move(f"Player: {info['san']} ({info['uci']})")
-            self.log.write(f"Board:\n{self.board.board}", tag="BOARD")
+            self.log.write("Board:\n%s", Lazy(self._board_snapshot), tag="BOARD", level=DEBUG)
             return True
+        except AmbiguousMove as e:
+            # None: not illegal, the player is asked which piece instead.
+            self._ask_disambiguation(e)
+            return None
         except Exception:
             self.log.write(f"Invalid move: {move_text}")
             return False
 
+    def _ask_disambiguation(self, e: AmbiguousMove):
+        froms = " / ".join(f"{san} ({m.uci()})" for san, m in zip(e.sans, e.candidates))
+        self.log.write(f"Which one? {froms} — say the from and to squares.", tag="INFO")
+
     def _engine_counter_move(self):
-        reply = self.board.engine_reply()
+        if self.engine_service:
+            self._start_search(
+                self.board.board, self._on_engine_reply, tag="main", key=self.board.zobrist
+            )
+            return
+        self._report_engine_reply(self.board.engine_reply())
+
+    def _on_engine_reply(self, result):
+        self._report_engine_reply(self.board.apply_engine_move(result.move if result else None))
+        self.log.write("Turn finished")
+
+    def _report_engine_reply(self, reply):
         if reply:
             self.log.write(f"Engine move: {reply['san']} ({reply['uci']})", tag="ENGINE")
             self.log.write_move(f"Engine: {reply['san']} ({reply['uci']})")
-            self.log.write(f"Board:\n{self.board.board}", tag="BOARD")
+            self.log.write("Board:\n%s", Lazy(self._board_snapshot), tag="BOARD", level=DEBUG)
         else:
             self.log.write("Engine move unavailable or illegal.", tag="ENGINE")
 
+    def _board_snapshot(self):
+        # Only called when BOARD logging is enabled; printed later by the log writer.
+        return chess.BaseBoard(self.board.board.board_fen())
+
+    def _on_imagine_bestmove(self, best):
+        if best:
+            self.imag.make_bestmove(best)
+            self.log.write(f"Engine best move (imagine) → {best}")
+            self.log.write_move(f"Imagine(Engine): {best}")
+            self._speculate()
+        else:
+            self.log.write("Engine best move unavailable.")
+
+    # ------------------------------------------------------------
+    # Asynchronous engine searches
+    # ------------------------------------------------------------
+    def _start_search(self, board, on_result, tag, key=None):
+        """Ask the EngineService for a best move; the timer is held while the engine thinks."""
+        self._cancel_search()
+        self.timer.pause()
+        uid, started = TRACER.current(), TRACER.now()
+
+        def _done(result):
+            # Runs on the dispatch thread; cancelled searches (e.g. state exit) never get here.
+            TRACER.record("engine.search", uid, started)
+            self.timer.scheduler.cancel("engine")
+            self._pending_search = None
+            self.timer.reset(restart=True)
+            with TRACER.use(uid):
+                on_result(result)
+                self._notify_update()
+
+        # Reuse the background search of this exact position if one is running or finished.
+        spec, self._speculation = self._speculation, None
+        if spec is not None and key is not None and spec.key == key and self.engine_service.adopt(spec, _done):
+            self._pending_search = spec
+        else:
+            if spec is not None:
+                spec.cancel()
+            self._pending_search = self.engine_service.request_bestmove(
+                board, callback=_done, tag=tag, key=key
+            )
+            self.log.write("Engine thinking…", tag="ENGINE")
+        self.timer.scheduler.schedule("engine", self.ENGINE_DEADLINE, self._on_engine_deadline)
+        self._notify_update()
+
+    def _on_engine_deadline(self):
+        if self._pending_search is not None:
+            self.log.write("Engine deadline reached → best move so far", tag="ENGINE")
+            self._pending_search.finish_now()
+
+    def _cancel_search(self):
+        if self._pending_search is None:
+            return
+        self.timer.scheduler.cancel("engine")
+        self._pending_search.cancel()
+        self._pending_search = None
+        self.timer.resume()
+        self._notify_update()
+
+    def _speculate(self):
+        """Search the imagined board in the background so a later `take` is instant."""
+        if not self.engine_service or self.imag.board is None:
+            return
+        self._cancel_speculation()
+        self._speculation = self.engine_service.request_bestmove(
+            self.imag.board, tag="speculate", priority=BACKGROUND, key=self.imag.zobrist
+        )
+
+    def _cancel_speculation(self):
+        if self._speculation is not None:
+            self._speculation.cancel()
+            self._speculation = None
+
+    def _notify_update(self):
+        self._updates += 1
+        for callback in self._update_listeners:
+            callback()
+
     def _set_state(self, new_state: State):
         if self.state == new_state:
             return
         self._on_exit_state(self.state)
         self.state = new_state
+        if self.journal is not None:
+            self.journal.state(new_state.value)
         self._on_enter_state(new_state)
+        self._notify_update()
+
+    def restore(self, saved):
+        """Resume a session recovered from the journal (journal.Recovered): moves, imagine line, state."""
+        self.board.restore(saved.main_moves)
+        state = State(saved.state) if saved.state in {s.value for s in State} else State.WAIT_WAKE
+        self._set_state(state)
+        if state == State.IMAGINE and saved.imagine_moves:
+            self.imag.restore(saved.imagine_moves)
+            self._speculate()
+        self.log.write(
+            f"Session restored: {len(saved.main_moves)} moves, state {state.name}", tag="JOURNAL"
+        )
+        self._notify_update()
 
     def _on_enter_state(self, state: State):
         if state == State.WAIT_WAKE:
@@ -156,11 +332,14 @@ class FSMController:
             self.timer.arm(self.ROOT_TIMEOUT, start=True)
             self.log.write("State → ROOT")
         elif state == State.IMAGINE:
-            self.imag.start(self.board.board)
+            self.imag.start(self.board.board, key=self.board.zobrist)
             self.timer.arm(self.IMAGINE_TIMEOUT, start=True)
             self.log.write("State → IMAGINE_MODE")
+            self._speculate()
 
     def _on_exit_state(self, state: State | None):
+        self._cancel_search()
+        self._cancel_speculation()
         if state == State.IMAGINE:
             self.imag.reset()
 
@@ -170,11 +349,28 @@ class FSMController:
     def get_state(self) -> State:
         return self.state
 
+    def is_thinking(self) -> bool:
+        """True while an asynchronous engine search is pending."""
+        return self._pending_search is not None
+
+    def on_update(self, callback):
+        """
+        Register a callback fired on state changes, when the displayed board changes,
+        and when an async search starts, finishes or is cancelled.
+        """
+        self._update_listeners.append(callback)
+
     def get_display_board(self):
         if self.state == State.IMAGINE and self.imag.board:
             return self.imag.board
         return self.board.board
 
+    def get_display_key(self) -> int:
+        """Zobrist key of get_display_board()."""
+        if self.state == State.IMAGINE and self.imag.board:
+            return self.imag.zobrist
+        return self.board.zobrist
+
     # ------------------------------------------------------------
     # History helpers for GUI
     # ------------------------------------------------------------
@@ -186,6 +382,14 @@ class FSMController:
         """Return a copy of the imagine move stack."""
         return list(self.imag._history)
 
+    def get_game_history(self):
+        """MoveHistory of the main game (SAN per ply, push/pop notifications)."""
+        return self.board.history
+
+    def get_imagine_history(self):
+        """MoveHistory of the imagine line."""
+        return self.imag.history
+
     def get_imagine_base_board(self) -> chess.Board | None:
         """Return the board state when IMAGINE started."""
         return self.imag.base_board
@@ -0,0 +1,224 @@
+# gui/board_canvas.py
+# --------------------------------------------------
+# tk.Canvas 上の盤面描画。
+# 64 マスの矩形と駒画像アイテムを一度だけ作り、局面が変わったら
+# 差分のあるマスだけ itemconfig する。駒画像はサイズごとに一度だけ
+# ラスタライズ（アトラス）し、IMAGINE の青み付けはパレット切替で行う。
+# 局面ごとの描画プランは RenderCache に保持する。
+# --------------------------------------------------
+
+import io
+import tkinter as tk
+from typing import NamedTuple
+
+import cairosvg
+import chess
+import chess.svg
+from PIL import Image, ImageTk
+
+from gui.render_cache import RenderCache
+
+COLORS = chess.svg.DEFAULT_COLORS
+CHECK_COLOR = "#e05050"
+# Same blend the old cv2 overlay used: 65% square colour + 35% light blue.
+IMAGINE_TINT = (80, 180, 255)
+IMAGINE_ALPHA = 0.35
+
+
+def _tint(hex_color: str) -> str:
+    r, g, b = (int(hex_color[i : i + 2], 16) for i in (1, 3, 5))
+    mixed = (
+        round(c * (1 - IMAGINE_ALPHA) + t * IMAGINE_ALPHA)
+        for c, t in zip((r, g, b), IMAGINE_TINT)
+    )
+    return "#{:02x}{:02x}{:02x}".format(*mixed)
+
+
+def _palette(imagine: bool) -> dict:
+    base = {
+        "light": COLORS["square light"],
+        "dark": COLORS["square dark"],
+        "light lastmove": COLORS["square light lastmove"],
+        "dark lastmove": COLORS["square dark lastmove"],
+        "check": CHECK_COLOR,
+    }
+    if imagine:
+        return {name: _tint(color) for name, color in base.items()}
+    return base
+
+
+PALETTES = {False: _palette(False), True: _palette(True)}
+ATLAS_SIZES_KEPT = 3
+
+
+def _shade(square: chess.Square) -> str:
+    return "light" if chess.BB_SQUARES[square] & chess.BB_LIGHT_SQUARES else "dark"
+
+
+class RenderPlan(NamedTuple):
+    """What each of the 64 squares should show: fill colour and piece symbol (or None)."""
+
+    fills: tuple[str, ...]
+    pieces: tuple[str | None, ...]
+
+
+def build_plan(board: chess.Board, imagine: bool) -> RenderPlan:
+    """Pure function of the position (no Tk calls)."""
+    palette = PALETTES[imagine]
+    lastmove = board.move_stack[-1] if board.move_stack else None
+    highlighted = {lastmove.from_square, lastmove.to_square} if lastmove else set()
+    check = board.king(board.turn) if board.is_check() else None
+
+    fills = []
+    for square in chess.SQUARES:
+        shade = _shade(square)
+        if square == check:
+            fills.append(palette["check"])
+        elif square in highlighted:
+            fills.append(palette[f"{shade} lastmove"])
+        else:
+            fills.append(palette[shade])
+    pieces = tuple(
+        piece.symbol() if piece else None
+        for piece in (board.piece_at(square) for square in chess.SQUARES)
+    )
+    return RenderPlan(tuple(fills), pieces)
+
+
+def render_key(board: chess.Board, imagine: bool, size: int) -> tuple:
+    """(FEN, last move, IMAGINE flag, size); the check square follows from the FEN."""
+    lastmove = board.move_stack[-1].uci() if board.move_stack else ""
+    return (board.fen(), lastmove, imagine, size)
+
+
+class BoardCanvas:
+    def __init__(self, parent, size: int = 400, cache: RenderCache | None = None):
+        self.canvas = tk.Canvas(parent, width=size, height=size, highlightthickness=0)
+        self.size = size - size % 8
+        self.cache = cache or RenderCache(build_plan)
+        self._atlas: dict[int, dict[str, ImageTk.PhotoImage]] = {}
+
+        # 現在表示中の状態（差分更新用）
+        self._fills: list[str | None] = [None] * 64
+        self._shown: list[str | None] = [None] * 64
+        self._imagine = False
+        self._board: chess.Board | None = None
+        self._key: tuple | None = None
+
+        sq = self.size // 8
+        self._square_items = []
+        self._piece_items = []
+        for square in chess.SQUARES:
+            x0, y0 = self._origin(square, sq)
+            self._square_items.append(
+                self.canvas.create_rectangle(x0, y0, x0 + sq, y0 + sq, width=0)
+            )
+        for square in chess.SQUARES:
+            x0, y0 = self._origin(square, sq)
+            self._piece_items.append(self.canvas.create_image(x0, y0, anchor="nw"))
+        self._coord_items = self._create_coords(sq)
+
+        self.canvas.bind("<Configure>", self._on_configure)
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+    def grid(self, **kwargs):
+        self.canvas.grid(**kwargs)
+
+    def render(self, board: chess.Board, imagine: bool = False):
+        """Bring the canvas in line with `board`, touching only squares that changed."""
+        self._board = board
+        key = render_key(board, imagine, self.size)
+        if key == self._key:
+            # Same frame as on screen (e.g. a redundant refresh): nothing to do.
+            return
+        self._key = key
+
+        if imagine != self._imagine:
+            self._imagine = imagine
+            for item, square in self._coord_items:
+                self.canvas.itemconfig(item, fill=self._coord_fill(square))
+
+        plan = self.cache.get(key, board, imagine)
+        for square, fill in enumerate(plan.fills):
+            if fill != self._fills[square]:
+                self.canvas.itemconfig(self._square_items[square], fill=fill)
+                self._fills[square] = fill
+
+        atlas = self._atlas_for(self.size // 8)
+        for square, symbol in enumerate(plan.pieces):
+            if symbol != self._shown[square]:
+                self.canvas.itemconfig(self._piece_items[square], image=atlas[symbol] if symbol else "")
+                self._shown[square] = symbol
+
+    # ---------------------------------------------------------
+    # Internal
+    # ---------------------------------------------------------
+    def _atlas_for(self, sq: int) -> dict[str, ImageTk.PhotoImage]:
+        """Rasterize the 12 piece images at `sq` pixels once; reused until the size changes."""
+        atlas = self._atlas.get(sq)
+        if atlas is None:
+            atlas = {}
+            for color in chess.COLORS:
+                for piece_type in chess.PIECE_TYPES:
+                    piece = chess.Piece(piece_type, color)
+                    svg = chess.svg.piece(piece, size=sq).encode("utf-8")
+                    png = cairosvg.svg2png(bytestring=svg, output_width=sq, output_height=sq)
+                    atlas[piece.symbol()] = ImageTk.PhotoImage(Image.open(io.BytesIO(png)))
+            self._atlas[sq] = atlas
+            while len(self._atlas) > ATLAS_SIZES_KEPT:
+                self._atlas.pop(next(iter(self._atlas)))
+        return atlas
+
+    def _on_configure(self, event):
+        # Canvas size is in device pixels, so HiDPI scaling is picked up here too.
+        size = min(event.width, event.height)
+        size -= size % 8
+        if size < 64 or size == self.size:
+            return
+        self.size = size
+        sq = size // 8
+        for square in chess.SQUARES:
+            x0, y0 = self._origin(square, sq)
+            self.canvas.coords(self._square_items[square], x0, y0, x0 + sq, y0 + sq)
+            self.canvas.coords(self._piece_items[square], x0, y0)
+        for item, _square in self._coord_items:
+            self.canvas.delete(item)
+        self._coord_items = self._create_coords(sq)
+        # New atlas: every occupied square needs the re-rasterized image.
+        self._shown = [None] * 64
+        self._key = None
+        if self._board is not None:
+            self.render(self._board, self._imagine)
+
+    def _create_coords(self, sq: int) -> list[tuple[int, chess.Square]]:
+        """File letters along rank 1 and rank digits along the a-file, inside the squares."""
+        font = ("TkDefaultFont", max(7, sq // 7))
+        items = []
+        for i, name in enumerate(chess.FILE_NAMES):
+            square = chess.square(i, 0)
+            item = self.canvas.create_text(
+                i * sq + sq - 2, 8 * sq - 1, text=name, anchor="se", font=font,
+                fill=self._coord_fill(square),
+            )
+            items.append((item, square))
+        for i, name in enumerate(chess.RANK_NAMES):
+            square = chess.square(0, i)
+            item = self.canvas.create_text(
+                2, (7 - i) * sq + 1, text=name, anchor="nw", font=font,
+                fill=self._coord_fill(square),
+            )
+            items.append((item, square))
+        # Keep labels above square fills; pieces are drawn over them.
+        for item, _square in items:
+            self.canvas.tag_lower(item, self._piece_items[0])
+        return items
+
+    def _coord_fill(self, square: chess.Square) -> str:
+        # Label in the opposite shade so it reads on its square.
+        return PALETTES[self._imagine]["dark" if _shade(square) == "light" else "light"]
+
+    @staticmethod
+    def _origin(square: chess.Square, sq: int) -> tuple[int, int]:
+        return chess.square_file(square) * sq, (7 - chess.square_rank(square)) * sq
@@ -5,18 +5,17 @@
 # 入力を FSM に流す構造になっている。
 # --------------------------------------------------
 
-import io
 import tkinter as tk
 from tkinter import ttk
 
-import chess
-import chess.svg
-import cairosvg
-import cv2
-import numpy as np
-from PIL import Image, ImageTk
-
 from fsm.states import State
+from gui.board_canvas import BoardCanvas
+from gui.history_panel import HistoryPanel
+from util.trace import traced
+
+
+# Shortest interval between message panel redraws (~60 fps).
+FRAME_MS = 16
 
 
 class ChessGUI:
@@ -29,15 +28,18 @@ class ChessGUI:
         self.root = root
         self.fsm = fsm_controller
         self.timer = timer
-        self._last_state = self.fsm.get_state()
+        self._timer_job = None
+        self._pending_message = None
+        self._message_job = None
 
         self.root.title("Chess Voice System")
         self.root.grid_columnconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=1)
+        self.root.grid_rowconfigure(0, weight=1)
 
-        # 盤面表示用ラベル
-        self.board_label = tk.Label(self.root)
-        self.board_label.grid(row=0, column=0, padx=10, pady=10)
+        # 盤面表示用 Canvas（ウィンドウに合わせてリサイズ）
+        self.board_view = BoardCanvas(self.root, size=400)
+        self.board_view.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
         # ----- 右側パネル -----
         side = tk.Frame(self.root)
@@ -47,6 +49,9 @@ class ChessGUI:
         tk.Label(side, text="History").pack(anchor="w")
         self.history_box = tk.Text(side, width=32, height=20, state="disabled")
         self.history_box.pack(pady=4)
+        self.history_panel = HistoryPanel(
+            self.history_box, self.fsm.get_game_history(), self.fsm.get_imagine_history()
+        )
 
         # コマンド入力欄 いつか消す
         tk.Label(side, text="Command Input").pack(anchor="w")
@@ -68,6 +73,10 @@ class ChessGUI:
         self.timer_label = tk.Label(side, text=f"{self.timer.remaining:.1f} s")
         self.timer_label.pack(anchor="w")
 
+        # エンジン思考中の表示
+        self.engine_label = tk.Label(side, text="", fg="gray30")
+        self.engine_label.pack(anchor="w")
+
         bottom = tk.Frame(self.root)
         bottom.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
         bottom.grid_columnconfigure(0, weight=1)
@@ -77,14 +86,15 @@ class ChessGUI:
         )
         self.message_box.grid(row=1, column=0, sticky="ew")
 
-        # 盤面画像保持
-        self.board_img = None
-
         # 初期描画
         self.update_board()
         self.refresh_history()
 
-        # タイマー更新開始
+        # 状態遷移・非同期エンジン探索の開始/終了を受け取る
+        self.fsm.on_update(self._on_fsm_update)
+
+        # タイマーの開始/停止を受け取る（止まっている間はバーを更新しない）
+        self.timer.subscribe(self._on_timer_change)
         self._update_timer_bar()
 
     # ---------------------------------------------------------
@@ -115,75 +125,56 @@ class ChessGUI:
     # ---------------------------------------------------------
     # ボード描画更新
     # ---------------------------------------------------------
+    @traced("gui.update_board")
     def update_board(self):
         board = self.fsm.get_display_board()
-
-        svg_data = chess.svg.board(board).encode("utf-8")
-        png_bytes = cairosvg.svg2png(bytestring=svg_data)
-
-        img = Image.open(io.BytesIO(png_bytes)).convert("RGB")
-        if self.fsm.get_state() == State.IMAGINE:
-            img = self._apply_imagine_tint(img)
-        img = img.resize((400, 400), Image.LANCZOS)
-
-        self.board_img = ImageTk.PhotoImage(img)
-        self.board_label.config(image=self.board_img)
+        # 変化したマスだけ更新される。IMAGINE の青みはパレット切替。
+        self.board_view.render(board, imagine=self.fsm.get_state() == State.IMAGINE)
 
     # ---------------------------------------------------------
     # Move履歴 / ログ追加
     # ---------------------------------------------------------
     def refresh_history(self):
-        """Rebuild the history panel using proper move numbering."""
-        main_moves = self.fsm.get_game_moves()
-        imagine_moves = self.fsm.get_imagine_moves()
-        history_parts = []
-
-        main_text = self._format_move_pairs(chess.Board(), main_moves)
-        if main_text:
-            history_parts.append(main_text)
-
-        base = self.fsm.get_imagine_base_board()
-        if base and imagine_moves:
-            imag_text = self._format_move_pairs(base, imagine_moves)
-            if imag_text:
-                history_parts.append("Imagine:\n" + imag_text)
-
-        if history_parts:
-            combined = "\n\n".join(history_parts)
-        else:
-            combined = ""
+        """Apply the history lines changed since the last refresh (no full SAN replay)."""
+        self.history_panel.flush()
 
-        self._write_text(self.history_box, combined, append=False)
+    def _on_fsm_update(self):
+        """FSM notification (Tk thread): state changed, or an engine search started, finished or was cancelled."""
+        self.engine_label.config(text="Engine: thinking…" if self.fsm.is_thinking() else "")
+        self.update_board()
+        self.refresh_history()
 
     def show_fsm_message(self, text: str, tag: str = "FSM"):
-        """Display only the latest FSM message (clears previous content)."""
-        self._write_text(self.message_box, f"[{tag}] {text}", append=False)
+        """Display only the latest FSM message; bursts are coalesced to one redraw per frame."""
+        self._pending_message = f"[{tag}] {text}"
+        if self._message_job is None:
+            self._message_job = self.root.after(FRAME_MS, self._flush_message)
+
+    def _flush_message(self):
+        self._message_job = None
+        self._write_text(self.message_box, self._pending_message, append=False)
 
     # ---------------------------------------------------------
     # タイマーとGUIバーの同期
     # ---------------------------------------------------------
+    def _on_timer_change(self):
+        if self._timer_job is not None:
+            self.root.after_cancel(self._timer_job)
+            self._timer_job = None
+        self._update_timer_bar()
+
     def _update_timer_bar(self):
-        # タイマー値更新
-        self.timer.tick(0.1)
+        # 残り時間を読むだけ（タイムアウト自体は DeadlineScheduler が起こす）
+        remaining = self.timer.remaining
         self.timer_bar.config(maximum=self.timer.max_time)
-        self.timer_var.set(self.timer.remaining)
-        self.timer_label.config(text=f"{self.timer.remaining:.1f} s")
-        current_state = self.fsm.get_state()
-        if current_state != self._last_state:
-            self._last_state = current_state
-            self.update_board()
-
-        # 100msごとに呼ぶ
-        self.root.after(100, self._update_timer_bar)
-
-    def _apply_imagine_tint(self, image: Image.Image) -> Image.Image:
-        """Apply a subtle blue overlay using OpenCV so IMAGINE mode is obvious."""
-        rgb_array = np.array(image)
-        bgr = cv2.cvtColor(rgb_array, cv2.COLOR_RGB2BGR)
-        overlay = np.full(bgr.shape, (255, 180, 80), dtype=np.uint8) 
-        tinted = cv2.addWeighted(bgr, 0.65, overlay, 0.35, 0)
-        tinted_rgb = cv2.cvtColor(tinted, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(tinted_rgb)
+        self.timer_var.set(remaining)
+        self.timer_label.config(text=f"{remaining:.1f} s")
+
+        # 動いている間だけ 100ms ごとに再描画。WAIT_WAKE などで止まっていれば何もしない
+        if self.timer.running:
+            self._timer_job = self.root.after(100, self._update_timer_bar)
+        else:
+            self._timer_job = None
 
     def _write_text(self, widget: tk.Text, text: str, append: bool):
         widget.config(state="normal")
@@ -192,49 +183,3 @@ class ChessGUI:
         widget.insert("end", text)
         widget.see("end")
         widget.config(state="disabled")
-
-    def _format_move_pairs(self, base_board: chess.Board, moves: list[chess.Move]) -> str:
-        """Return PGN-like lines (e.g., '1. e4 e5') for the given move list."""
-        if not moves:
-            return ""
-
-        board = base_board.copy()
-        lines = []
-        idx = 0
-
-        while idx < len(moves):
-            move_num = board.fullmove_number
-            if board.turn == chess.WHITE:
-                white_move = moves[idx]
-                white_san = board.san(white_move)
-                board.push(white_move)
-                idx += 1
-
-                black_san = ""
-                if idx < len(moves):
-                    black_move = moves[idx]
-                    black_san = board.san(black_move)
-                    board.push(black_move)
-                    idx += 1
-
-                line = f"{move_num}. {white_san}"
-                if black_san:
-                    line += f" {black_san}"
-            else:
-                # Black to move at this ply (rare but possible if starting mid-game)
-                black_move = moves[idx]
-                black_san = board.san(black_move)
-                board.push(black_move)
-                idx += 1
-
-                line = f"{move_num}... {black_san}"
-                if idx < len(moves):
-                    white_move = moves[idx]
-                    white_san = board.san(white_move)
-                    board.push(white_move)
-                    idx += 1
-                    line += f" {white_san}"
-
-            lines.append(line)
-
-        return "\n".join(lines)
@@ -0,0 +1,96 @@
+# gui/history_panel.py
+# --------------------------------------------------
+# History 欄 (tk.Text) の行単位更新。
+# MoveHistory から「何行目が変わったか」を受け取り、
+# その行だけを insert/delete する（全文の書き直しはしない）。
+#
+# レイアウト:
+#   本譜の行...
+#   (空行)          ← 本譜と Imagine の両方がある時だけ
+#   Imagine:
+#   Imagine の行...
+# --------------------------------------------------
+
+import tkinter as tk
+
+IMAGINE_HEADER = "Imagine:"
+
+
+class HistoryPanel:
+    def __init__(self, widget: tk.Text, main_history, imagine_history):
+        self.widget = widget
+        self._main = 0  # 表示中の本譜の行数
+        self._imag = 0  # 表示中の Imagine の行数
+        self._pending: list[tuple[str, int, str | None]] = []
+
+        main_history.subscribe(lambda idx, text: self._pending.append(("main", idx, text)))
+        imagine_history.subscribe(lambda idx, text: self._pending.append(("imagine", idx, text)))
+        for idx, line in enumerate(main_history.lines()):
+            self._pending.append(("main", idx, line))
+        for idx, line in enumerate(imagine_history.lines()):
+            self._pending.append(("imagine", idx, line))
+
+    def flush(self):
+        """Apply queued line changes to the widget (cost ~ number of changed lines)."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self.widget.config(state="normal")
+        for section, idx, text in pending:
+            if section == "main":
+                self._apply_main(idx, text)
+            else:
+                self._apply_imagine(idx, text)
+        self.widget.see("end")
+        self.widget.config(state="disabled")
+
+    # ---------------------------------------------------------
+    # Internal
+    # ---------------------------------------------------------
+    def _apply_main(self, idx: int, text: str | None):
+        row = idx + 1
+        if text is None:
+            self._delete_row(row)
+            self._main -= 1
+            if self._main == 0 and self._imag:
+                self._delete_row(1)  # 区切りの空行
+        elif idx < self._main:
+            self._replace_row(row, text)
+        else:
+            self._insert_row(row, text)
+            self._main += 1
+            if self._main == 1 and self._imag:
+                self._insert_row(2, "")
+
+    def _apply_imagine(self, idx: int, text: str | None):
+        if text is None:
+            self._delete_row(self._imagine_row(idx))
+            self._imag -= 1
+            if self._imag == 0:
+                for _ in range(self._header_rows()):
+                    self._delete_row(self._main + 1)
+        elif idx < self._imag:
+            self._replace_row(self._imagine_row(idx), text)
+        else:
+            if self._imag == 0:
+                if self._main:
+                    self._insert_row(self._main + 1, "")
+                self._insert_row(self._main + self._header_rows(), IMAGINE_HEADER)
+            self._insert_row(self._imagine_row(idx), text)
+            self._imag += 1
+
+    def _header_rows(self) -> int:
+        return 2 if self._main else 1
+
+    def _imagine_row(self, idx: int) -> int:
+        return self._main + self._header_rows() + idx + 1
+
+    def _insert_row(self, row: int, text: str):
+        self.widget.insert(f"{row}.0", text + "\n")
+
+    def _replace_row(self, row: int, text: str):
+        self.widget.delete(f"{row}.0", f"{row}.end")
+        self.widget.insert(f"{row}.0", text)
+
+    def _delete_row(self, row: int):
+        self.widget.delete(f"{row}.0", f"{row + 1}.0")
@@ -0,0 +1,63 @@
+# gui/render_cache.py
+# --------------------------------------------------
+# 描画プラン（64 マスの色＋駒）の LRU キャッシュ。
+# メモリ量でエビクションする。プランは数マイクロ秒で作れるので、
+# 先読みはせず Tk スレッドで必要になったときに作る。
+# --------------------------------------------------
+
+import sys
+from collections import OrderedDict
+
+
+class RenderCache:
+    def __init__(self, builder, max_bytes: int = 2 * 1024 * 1024):
+        """
+        builder: builder(board, imagine) -> plan; called on a miss.
+        max_bytes: approximate memory budget for cached plans.
+        Used from the Tk thread only.
+        """
+        self._builder = builder
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, board, imagine: bool):
+        """Cached plan for `key`, building (and caching) it from `board` on a miss."""
+        plan = self._entries.get(key)
+        if plan is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return plan
+        self.misses += 1
+        plan = self._builder(board, imagine)
+        self._put(key, plan)
+        return plan
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    # ---------------------------------------------------------
+    # Internal
+    # ---------------------------------------------------------
+    def _put(self, key, plan):
+        size = _approx_size(key, plan)
+        self._entries[key] = plan
+        self._sizes[key] = size
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            old, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old)
+
+
+def _approx_size(key, plan) -> int:
+    # Palette strings and piece symbols are shared, so the tuples dominate.
+    size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+    return size + sum(sys.getsizeof(field) for field in plan)
@@ -0,0 +1,310 @@
+"""
+Headless driver for the FSM core: no Tk, no audio.
+
+Builds BoardManager / ImagineSimulator / FSMController on a Timer that runs
+on virtual time and feeds command scripts through `handle_input`, one
+command per line, exactly as typed in the GUI. Each command is timed from
+`handle_input` until the engine reply (if any) has been applied, so the
+numbers cover the whole core loop. Scripts given on the command line run in
+parallel worker processes, each with its own engine.
+
+Script lines:
+    hey chess             any FSM command
+    # comment             ignored, as are blank lines
+    @wait 12              advance virtual time, firing ROOT/IMAGINE timeouts
+    @expect state ROOT    fail the script unless the FSM is in ROOT
+    @expect fen <fen>     compare with the displayed board (placement only if no spaces)
+    @expect move d4       last move on the displayed board, in SAN or UCI
+
+Usage (from chess_system/):
+    python headless.py scripts/*.txt -j 4 --repeat 10
+    cat game.txt | python headless.py --json -
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from chess_engine.board_manager import BoardManager
+from chess_engine.engine_pool import EnginePool
+from chess_engine.engine_service import EngineService
+from chess_engine.eval_cache import EvalCache
+from chess_engine.imagine_simulator import ImagineSimulator
+from fsm.fsm_controller import FSMController
+from fsm.states import State
+from input.wake_detector_mock import WakeDetectorMock
+from util.logger import Logger
+from util.scheduler import DeadlineScheduler
+from util.timer import Timer
+from util.trace import summarize
+
+# First words reported as their own latency bucket; other IMAGINE input is a move.
+_VERBS = {"play", "imagine", "take", "back", "forward", "next", "previous", "return", "stop"}
+
+
+class VirtualClock:
+    """Clock for DeadlineScheduler that only moves when told to."""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance_to(self, t: float):
+        self.now = max(self.now, t)
+
+
+class HeadlessSession:
+    """
+    One FSM with its boards, a virtual-time timer and no GUI.
+    engine: shared engine (EnginePool / StockfishEngine); the session never shuts it down.
+    async_engine: route searches through EngineService as the GUI does, instead of
+                  the FSM's synchronous fallback.
+    """
+
+    def __init__(self, engine, async_engine: bool = False, log_level="INFO", verbose: bool = False):
+        self.clock = VirtualClock()
+        self.scheduler = DeadlineScheduler(clock=self.clock, threaded=False)
+        self.timer = Timer(max_time=5.0, scheduler=self.scheduler)
+        self.logger = Logger(level=log_level, stdout=verbose)
+
+        # Engine callbacks are queued here and run on this thread by _settle().
+        self._events: queue.SimpleQueue = queue.SimpleQueue()
+        self.engine_service = EngineService(engine, dispatch=self._events.put) if async_engine else None
+        self.board = BoardManager(engine=engine)
+        self.imagine = ImagineSimulator(engine=engine)
+        self.fsm = FSMController(
+            self.board,
+            self.imagine,
+            self.logger,
+            self.timer,
+            WakeDetectorMock(),
+            engine_service=self.engine_service,
+        )
+
+        self.commands = 0
+        self.busy_ns = 0
+        self.latencies: dict[str, list[int]] = {}
+        self.failures: list[str] = []
+
+    # -----------------------------------------------------
+    # Public API
+    # -----------------------------------------------------
+    def run(self, lines, name: str = "<stdin>"):
+        for lineno, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("@"):
+                self._directive(line[1:].split(maxsplit=2), f"{name}:{lineno}")
+            else:
+                self.feed(line)
+
+    def feed(self, text: str):
+        """Run one command through the FSM, including the engine reply it triggers."""
+        kind = self._kind(text)
+        start = time.perf_counter_ns()
+        self.fsm.handle_input(text)
+        self._settle()
+        elapsed = time.perf_counter_ns() - start
+        self.latencies.setdefault(kind, []).append(elapsed)
+        self.busy_ns += elapsed
+        self.commands += 1
+
+    def wait(self, seconds: float):
+        """Advance virtual time, firing every timer due on the way in deadline order."""
+        target = self.clock() + seconds
+        while True:
+            deadline = self.scheduler.next_deadline()
+            if deadline is None or deadline > target:
+                break
+            self.clock.advance_to(deadline)
+            self.scheduler.run_due()
+        self.clock.advance_to(target)
+
+    def close(self):
+        if self.engine_service:
+            self.engine_service.cancel()
+        self.scheduler.close()
+        self.logger.close()
+
+    # -----------------------------------------------------
+    # Internal
+    # -----------------------------------------------------
+    def _settle(self):
+        # Engine searches take real time; their deadline is enforced in real
+        # time too, by jumping the virtual clock to it once it has passed.
+        while self.fsm.is_thinking():
+            try:
+                self._events.get(timeout=self.fsm.ENGINE_DEADLINE)()
+            except queue.Empty:
+                remaining = self.scheduler.remaining("engine")
+                if remaining is not None:
+                    self.wait(remaining)
+        while True:
+            try:
+                self._events.get_nowait()()
+            except queue.Empty:
+                break
+
+    def _directive(self, parts: list[str], where: str):
+        if parts[0] == "wait" and len(parts) == 2:
+            self.wait(float(parts[1]))
+        elif parts[0] == "expect" and len(parts) == 3 and parts[1] == "state":
+            state = self.fsm.get_state().name
+            if state != parts[2].upper():
+                self.failures.append(f"{where}: expected state {parts[2]}, got {state}")
+        elif parts[0] == "expect" and len(parts) == 3 and parts[1] == "fen":
+            board = self.fsm.get_display_board()
+            fen = board.fen() if " " in parts[2] else board.board_fen()
+            if fen != parts[2]:
+                self.failures.append(f"{where}: expected fen {parts[2]}, got {fen}")
+        elif parts[0] == "expect" and len(parts) == 3 and parts[1] == "move":
+            board = self.fsm.get_display_board()
+            got = "none"
+            if board.move_stack:
+                last = board.peek()
+                before = board.copy()
+                before.pop()
+                got = before.san(last)
+                if parts[2] == last.uci():
+                    got = parts[2]
+            if got != parts[2]:
+                self.failures.append(f"{where}: expected move {parts[2]}, got {got}")
+        else:
+            raise ValueError(f"{where}: unknown directive @{' '.join(parts)}")
+
+    def _kind(self, text: str) -> str:
+        state = self.fsm.get_state()
+        verb = text.split()[0].lower()
+        if state == State.WAIT_WAKE:
+            verb = "wake"
+        elif verb not in _VERBS:
+            verb = "move" if state == State.IMAGINE else "other"
+        return f"{state.name} {verb}"
+
+
+# =========================================================
+# Batch runs
+# =========================================================
+def make_engine(options) -> EnginePool:
+    # Without Stockfish at `path` every search falls back to a random legal move (seeded below).
+    size = 2 if options.async_engine else 1
+    return EnginePool(size=size, path=options.engine, depth=options.depth, cache=EvalCache())
+
+
+def run_script(name: str, lines: list[str], options, engine=None) -> dict:
+    """Run `lines` `options.repeat` times, each in a fresh session; returns picklable results."""
+    own_engine = engine is None
+    if own_engine:
+        engine = make_engine(options)
+    result = {"script": name, "commands": 0, "busy_ns": 0, "latency_ns": {}, "failures": []}
+    try:
+        for _ in range(options.repeat):
+            random.seed(options.seed)
+            session = HeadlessSession(
+                engine, async_engine=options.async_engine, log_level=options.log_level, verbose=options.verbose
+            )
+            try:
+                session.run(lines, name)
+            finally:
+                session.close()
+            result["commands"] += session.commands
+            result["busy_ns"] += session.busy_ns
+            for kind, values in session.latencies.items():
+                result["latency_ns"].setdefault(kind, []).extend(values)
+            result["failures"].extend(session.failures)
+    finally:
+        if own_engine:
+            engine.shutdown()
+    return result
+
+
+def _run_file(path: str, options) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return run_script(path, f.readlines(), options)
+
+
+def report(results: list[dict], wall_s: float) -> dict:
+    """Aggregate per-script results into throughput and latency percentiles (ms)."""
+    merged: dict[str, list[int]] = {}
+    for r in results:
+        for kind, values in r["latency_ns"].items():
+            merged.setdefault(kind, []).extend(values)
+    everything = [v for values in merged.values() for v in values]
+    commands = sum(r["commands"] for r in results)
+    busy_s = sum(r["busy_ns"] for r in results) / 1e9
+    latency = {kind: summarize(values) for kind, values in sorted(merged.items())}
+    if everything:
+        latency["all"] = summarize(everything)
+    return {
+        "scripts": len(results),
+        "commands": commands,
+        "wall_s": round(wall_s, 3),
+        "commands_per_s": round(commands / wall_s, 1) if wall_s > 0 else None,
+        # Throughput of one process with no idle time between commands.
+        "commands_per_s_per_process": round(commands / busy_s, 1) if busy_s > 0 else None,
+        "latency_ms": latency,
+        "failures": [f for r in results for f in r["failures"]],
+    }
+
+
+def _print_report(summary: dict):
+    print(f"scripts: {summary['scripts']}  commands: {summary['commands']}  wall: {summary['wall_s']} s")
+    print(
+        f"throughput: {summary['commands_per_s']} commands/s "
+        f"({summary['commands_per_s_per_process']} per process)"
+    )
+    print(f"{'latency (ms)':<22}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for kind, s in summary["latency_ms"].items():
+        print(f"{kind:<22}{s['count']:>8}{s['p50']:>10}{s['p95']:>10}{s['p99']:>10}{s['max']:>10}")
+    for failure in summary["failures"]:
+        print(f"FAIL {failure}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Run FSM command scripts without a GUI.")
+    ap.add_argument("scripts", nargs="*", help="command scripts (default / '-': stdin)")
+    ap.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+    ap.add_argument("--repeat", type=int, default=1, help="runs per script, each from the initial position")
+    ap.add_argument("--engine", default="/usr/games/stockfish", help="Stockfish path")
+    ap.add_argument("--depth", type=int, default=8)
+    ap.add_argument("--async", dest="async_engine", action="store_true", help="search through EngineService")
+    ap.add_argument("--seed", type=int, default=0, help="seed for the no-engine random fallback")
+    ap.add_argument("--log-level", default="INFO")
+    ap.add_argument("-v", "--verbose", action="store_true", help="print the FSM log")
+    ap.add_argument("--json", metavar="PATH", help="also write the summary as JSON ('-': stdout only)")
+    options = ap.parse_args(argv)
+
+    paths = options.scripts or ["-"]
+    started = time.perf_counter()
+    if paths == ["-"]:
+        results = [run_script("<stdin>", sys.stdin.readlines(), options)]
+    elif options.jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=options.jobs) as pool:
+            results = list(pool.map(partial(_run_file, options=options), paths))
+    else:
+        results = [_run_file(path, options) for path in paths]
+    summary = report(results, time.perf_counter() - started)
+
+    if options.json == "-":
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        _print_report(summary)
+        if options.json:
+            with open(options.json, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,81 @@
+import os
+
 from chess_engine.board_manager import BoardManager
+from chess_engine.engine_pool import EnginePool
+from chess_engine.engine_service import EngineService
+from chess_engine.eval_cache import EvalCache
 from chess_engine.imagine_simulator import ImagineSimulator
-from chess_engine.stockfish_engine import StockfishEngine
+from chess_engine.journal import SessionJournal
+from chess_engine.opening_book import OpeningBook
 from fsm.fsm_controller import FSMController
 from input.wake_detector_mock import WakeDetectorMock
-from util.logger import Logger
+from util.logger import DEBUG, Logger
+from util.scheduler import DeadlineScheduler
 from util.timer import Timer
+from util.tk_dispatch import TkDispatcher
+from util.trace import TRACER
+
+# CHESS_TRACE=trace.json: record per-command latency spans and write a Chrome trace on exit.
+TRACE_PATH = os.environ.get("CHESS_TRACE")
+# CHESS_LOG_LEVEL=DEBUG also logs boards and speech partials; CHESS_LOG_FILE=chess.jsonl adds a JSONL sink.
+LOG_LEVEL = os.environ.get("CHESS_LOG_LEVEL", "INFO")
+LOG_FILE = os.environ.get("CHESS_LOG_FILE")
+# CHESS_JOURNAL=path: session journal for crash recovery (default .journal/session next to this file, '' disables).
+JOURNAL_PATH = os.environ.get(
+    "CHESS_JOURNAL", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".journal", "session")
+)
+
+
+def _open_journal(logger):
+    if not JOURNAL_PATH:
+        return None
+    try:
+        journal = SessionJournal(JOURNAL_PATH)
+    except (OSError, ValueError) as e:
+        logger.write(f"Journal disabled: {e}", tag="JOURNAL")
+        return None
+    if journal.recovered.game_over:
+        # The saved game is finished: start a new one instead of resuming it.
+        journal.reset()
+        return journal
+    logger.write(f"Journal replayed in {journal.replay_ms:.1f} ms", tag="JOURNAL", level=DEBUG)
+    return journal
 
 
 def main():
     import tkinter as tk
     from gui.gui_tk import ChessGUI
 
-    logger = Logger()
-    engine = StockfishEngine()
-    board = BoardManager(engine=engine)
-    imagine = ImagineSimulator(engine=engine)
-    timer = Timer(max_time=5.0)
+    if TRACE_PATH:
+        TRACER.enable()
+    logger = Logger(level=LOG_LEVEL, jsonl_path=LOG_FILE)
+    # Two UCI processes: player-facing searches never queue behind background work.
+    # books/book.bin (Polyglot) is optional; without it every position goes to Stockfish.
+    engine = EnginePool(size=2, threads=1, hash_mb=64, cache=EvalCache(), book=OpeningBook.load(), logger=logger)
+    journal = _open_journal(logger)
+    board = BoardManager(engine=engine, journal=journal)
+    imagine = ImagineSimulator(engine=engine, journal=journal)
     wake_detector = WakeDetectorMock()
-    fsm = FSMController(board, imagine, logger, timer, wake_detector)
 
     root = tk.Tk()
+    # Engine searches run on a worker thread; results come back on the Tk thread.
+    dispatcher = TkDispatcher(root)
+    # ROOT/IMAGINE timeouts and engine deadlines fire on the Tk thread too.
+    scheduler = DeadlineScheduler(dispatch=dispatcher.post)
+    timer = Timer(max_time=5.0, scheduler=scheduler)
+    engine_service = EngineService(engine, dispatch=dispatcher.post)
+    fsm = FSMController(board, imagine, logger, timer, wake_detector, engine_service=engine_service, journal=journal)
+
     gui = ChessGUI(root, fsm, timer)
-    logger.attach_gui(gui)
+    logger.attach_gui(gui, dispatch=dispatcher.post)
+    if journal is not None and not journal.recovered.empty:
+        fsm.restore(journal.recovered)
 
     voice_bridge = None
     try:
         from voice_bridge import VoiceBridge
 
-        voice_bridge = VoiceBridge(root, gui, fsm, logger)
+        voice_bridge = VoiceBridge(root, gui, fsm, logger, dispatch=dispatcher.post)
         voice_bridge.start()
     except Exception as e:
         logger.write(f"Voice bridge disabled: {e}", tag="VOICE")
@@ -35,6 +83,16 @@ def main():
     def _on_close():
         if voice_bridge:
             voice_bridge.stop()
+        engine_service.shutdown()
+        scheduler.close()
+        dispatcher.stop()
+        if journal is not None:
+            journal.close()
+        if TRACE_PATH:
+            TRACER.export_chrome(TRACE_PATH)
+            for name, stats in TRACER.percentiles().items():
+                print(f"[TRACE] {name}: {stats}")
+        logger.close()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", _on_close)
@@ -0,0 +1,398 @@
+"""
+Multi-session game server on a local socket.
+
+Every connection is an isolated session with its own BoardManager,
+ImagineSimulator, FSMController, Timer and Logger; all sessions run on one
+asyncio loop and share one EnginePool (fair across sessions, see
+engine_pool.py) and one DeadlineScheduler thread. Only engine searches leave
+the loop thread; their results and every timeout come back through
+`loop.call_soon_threadsafe`.
+
+Protocol: the client sends one command per line, as typed in the GUI
+("hey chess", "play e4", "imagine", ...). The server answers with one JSON
+object per line:
+    {"type": "msg", "tag": "FSM", "text": "State → ROOT"}
+    {"type": "state", "state": "ROOT", "fen": "...", "thinking": false}
+    {"type": "stats", ...}              reply to "/stats"
+    {"type": "bye", "reason": "idle"}   before the server closes the session
+Commands of one session run one at a time; a command that starts an engine
+search completes when its reply has been applied.
+
+Backpressure: each session queues at most `max_queued` commands; beyond that
+the server stops reading its socket, so a fast client is slowed down by TCP
+instead of growing memory. A client that stops reading its replies is
+dropped (connection aborted) once `max_output` bytes are buffered for it or
+its replies could not be sent for `write_timeout` seconds.
+
+    python server.py --port 8765              # 127.0.0.1 only
+    python server.py --unix /tmp/chess.sock --engines 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import OrderedDict, deque
+
+from chess_engine.board_manager import BoardManager
+from chess_engine.engine_pool import EnginePool
+from chess_engine.engine_service import EngineService
+from chess_engine.eval_cache import EvalCache
+from chess_engine.imagine_simulator import ImagineSimulator
+from fsm.fsm_controller import FSMController
+from input.wake_detector_mock import WakeDetectorMock
+from util.logger import Logger
+from util.scheduler import DeadlineScheduler
+from util.timer import Timer
+from util.trace import summarize
+
+
+# (Zobrist key, halfmove clock, fullmove number) -> FEN, shared by all sessions:
+# FEN building is the costliest part of a state update, and most sessions
+# pass through the same opening positions.
+_FENS: OrderedDict[tuple, str] = OrderedDict()
+_FENS_MAX = 4096
+
+
+def _fen(board, key: int) -> str:
+    cache_key = (key, board.halfmove_clock, board.fullmove_number)
+    fen = _FENS.get(cache_key)
+    if fen is None:
+        fen = _FENS[cache_key] = board.fen()
+        if len(_FENS) > _FENS_MAX:
+            _FENS.popitem(last=False)
+    return fen
+
+
+class Session:
+    """One player's FSM, driven by its connection. Everything here runs on the loop thread."""
+
+    def __init__(self, sid: int, server: "GameServer", reader, writer):
+        self.id = sid
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.started = time.monotonic()
+        self.last_active = self.started
+        self.commands = 0
+        self.latencies: deque[int] = deque(maxlen=1024)  # ns per command, most recent
+        self.inbox: asyncio.Queue[str] = asyncio.Queue(maxsize=server.max_queued)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._pending_start = None  # perf_counter_ns of a command waiting for its engine reply
+        self._state_sent = False
+        self._closed = False
+        self._out: list[bytes] = []
+
+        self.scheduler = server.scheduler.scoped(f"{sid}:")
+        self.timer = Timer(max_time=5.0, scheduler=self.scheduler)
+        # No sinks: the logger only keeps history and forwards GUI-level messages to us.
+        self.log = Logger(history_limit=50, stdout=False)
+        self.log.attach_gui(self)
+        self.engine_service = EngineService(server.pool, dispatch=server.loop.call_soon_threadsafe, owner=sid)
+        self.board = BoardManager(engine=server.pool)
+        self.imagine = ImagineSimulator(engine=server.pool)
+        self.fsm = FSMController(
+            self.board, self.imagine, self.log, self.timer, WakeDetectorMock(), engine_service=self.engine_service
+        )
+        self.fsm.on_update(self._on_update)
+
+    # -----------------------------------------------------
+    # Logger "GUI"
+    # -----------------------------------------------------
+    def show_fsm_message(self, text: str, tag: str = "FSM"):
+        self.send({"type": "msg", "tag": tag, "text": text})
+
+    def refresh_history(self):
+        pass  # moves are reported through messages and state updates
+
+    # -----------------------------------------------------
+    # Connection
+    # -----------------------------------------------------
+    def send(self, message: dict):
+        """Queue a message; everything sent in one loop iteration goes out in one write."""
+        if self._closed:
+            return
+        if not self._out:
+            self.server.loop.call_soon(self.flush)
+        self._out.append(json.dumps(message, ensure_ascii=False).encode())
+
+    def flush(self):
+        if self._closed or not self._out:
+            return
+        self._out.append(b"")
+        self.writer.write(b"\n".join(self._out))
+        self._out = []
+        if self.writer.transport.get_write_buffer_size() > self.server.max_output:
+            self.close("slow client", abort=True)
+
+    def send_state(self):
+        self.send(
+            {
+                "type": "state",
+                "state": self.fsm.get_state().name,
+                "fen": _fen(self.fsm.get_display_board(), self.fsm.get_display_key()),
+                "thinking": self.fsm.is_thinking(),
+            }
+        )
+
+    async def read_loop(self):
+        try:
+            while not self._closed:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                text = line.decode("utf-8", "replace").strip()
+                if text:
+                    # Blocks while the inbox is full, which stops reading the socket.
+                    await self.inbox.put(text)
+        except (ConnectionError, ValueError):
+            pass  # reset, or a line longer than the stream limit
+        # Not reached when cancelled: then the command loop is being torn down too.
+        await self.inbox.put("/quit")
+
+    async def command_loop(self):
+        while not self._closed:
+            text = await self.inbox.get()
+            self.last_active = time.monotonic()
+            if text == "/quit":
+                break
+            if text == "/stats":
+                self.send({"type": "stats", **self.stats(), "server": self.server.stats()})
+            else:
+                self._run_command(text)
+                # Wait for the engine reply, if the command started a search.
+                await self._idle.wait()
+            self.flush()
+            if self._closed:
+                break
+            try:
+                # drain() blocks while the client is not reading; don't wait for it forever.
+                await asyncio.wait_for(self.writer.drain(), self.server.write_timeout)
+            except asyncio.TimeoutError:
+                self.close("slow client", abort=True)
+                break
+            except ConnectionError:
+                break
+        self.close()
+
+    def close(self, reason: str | None = None, abort: bool = False):
+        """
+        abort: drop the connection without sending what is still buffered
+               (writer.close() would wait for a client that is not reading).
+        """
+        if self._closed:
+            if abort:
+                self.writer.transport.abort()  # e.g. closed as idle, then timed out draining
+            return
+        if reason and not abort:
+            self.send({"type": "bye", "reason": reason})
+            self.flush()
+        self._closed = True
+        self.engine_service.cancel()
+        self.scheduler.cancel_all()
+        self.log.close()
+        if abort:
+            self.writer.transport.abort()
+        else:
+            self.writer.close()
+        self._idle.set()
+        self.server.sessions.pop(self.id, None)
+
+    def stats(self) -> dict:
+        return {
+            "session": self.id,
+            "state": self.fsm.get_state().name,
+            "commands": self.commands,
+            "age_s": round(time.monotonic() - self.started, 1),
+            "latency_ms": summarize(list(self.latencies)) if self.latencies else None,
+        }
+
+    # -----------------------------------------------------
+    # Internal
+    # -----------------------------------------------------
+    def _run_command(self, text: str):
+        start = time.perf_counter_ns()
+        self._state_sent = False
+        self.fsm.handle_input(text)
+        self.commands += 1
+        if self.fsm.is_thinking():
+            self._pending_start = start
+            self._idle.clear()
+        else:
+            self.latencies.append(time.perf_counter_ns() - start)
+            if not self._state_sent:
+                self.send_state()
+
+    def _on_update(self):
+        # State changes, timeouts and engine searches starting or finishing.
+        if self._closed:
+            return
+        if self._pending_start is not None and not self.fsm.is_thinking():
+            self.latencies.append(time.perf_counter_ns() - self._pending_start)
+            self._pending_start = None
+            self._idle.set()
+        self.send_state()
+        self._state_sent = True
+
+
+class GameServer:
+    def __init__(
+        self,
+        pool: EnginePool,
+        max_sessions: int = 1000,
+        idle_timeout: float = 600.0,
+        max_queued: int = 32,
+        max_output: int = 1 << 20,
+        write_timeout: float = 10.0,
+    ):
+        """
+        pool: engine processes shared by every session (not shut down by close()).
+        idle_timeout: sessions without a command for this long are closed.
+        max_queued: commands queued per session before its socket stops being read.
+        max_output: bytes buffered for a client before it is dropped as too slow.
+        write_timeout: seconds a session waits for its client to read before it is dropped.
+        """
+        self.pool = pool
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_queued = max_queued
+        self.max_output = max_output
+        self.write_timeout = write_timeout
+        self.sessions: dict[int, Session] = {}
+        self._connections: set[asyncio.Task] = set()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.scheduler: DeadlineScheduler | None = None
+        self._ids = itertools.count(1)
+        self._server: asyncio.AbstractServer | None = None
+        self._reaper: asyncio.Task | None = None
+        self.accepted = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    async def start(self, port: int | None = None, path: str | None = None):
+        """Listen on 127.0.0.1:`port`, or on the Unix socket `path`."""
+        self.loop = asyncio.get_running_loop()
+        self.scheduler = DeadlineScheduler(dispatch=self.loop.call_soon_threadsafe)
+        # Listen backlog sized for a burst of every allowed session connecting at once.
+        backlog = min(self.max_sessions, 4096)
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)
+            self._server = await asyncio.start_unix_server(self._on_connect, path=path, backlog=backlog)
+        else:
+            self._server = await asyncio.start_server(
+                self._on_connect, host="127.0.0.1", port=port, backlog=backlog
+            )
+        self._reaper = asyncio.create_task(self._reap_idle())
+        return self._server
+
+    async def close(self):
+        if self._reaper:
+            self._reaper.cancel()
+        if self._server:
+            self._server.close()
+        for session in list(self.sessions.values()):
+            session.close("shutdown")
+        # Connection handlers may still be waiting on a read or a drain.
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server:
+            await self._server.wait_closed()
+        if self.scheduler:
+            self.scheduler.close()
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self.sessions),
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "engines": len(self.pool.engines),
+        }
+
+    async def _on_connect(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            writer.write(json.dumps({"type": "bye", "reason": "server full"}).encode() + b"\n")
+            writer.close()
+            return
+        self.accepted += 1
+        task = asyncio.current_task()
+        self._connections.add(task)
+        session = Session(next(self._ids), self, reader, writer)
+        self.sessions[session.id] = session
+        session.send_state()
+        try:
+            await self._run_session(session)
+        except asyncio.CancelledError:
+            # Server shutdown. Don't end the handler cancelled: asyncio's stream
+            # server would log that as an error.
+            pass
+        finally:
+            self._connections.discard(task)
+
+    async def _run_session(self, session: Session):
+        reader_task = asyncio.create_task(session.read_loop())
+        try:
+            await session.command_loop()
+        finally:
+            session.close()
+            reader_task.cancel()
+            await asyncio.gather(reader_task, return_exceptions=True)
+
+    async def _reap_idle(self):
+        interval = min(self.idle_timeout / 4, 5.0)
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.monotonic() - self.idle_timeout
+            for session in [s for s in self.sessions.values() if s.last_active < cutoff]:
+                self.evicted += 1
+                session.close("idle")
+
+
+async def serve(options):
+    pool = EnginePool(size=options.engines, path=options.engine, depth=options.depth, cache=EvalCache())
+    server = GameServer(
+        pool,
+        max_sessions=options.max_sessions,
+        idle_timeout=options.idle_timeout,
+        max_queued=options.max_queued,
+        write_timeout=options.write_timeout,
+    )
+    await server.start(port=options.port, path=options.unix)
+    where = options.unix or f"127.0.0.1:{options.port}"
+    print(f"[SERVER] listening on {where} ({options.engines} engine processes)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        pool.shutdown()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Serve many chess sessions over a local socket.")
+    where = ap.add_mutually_exclusive_group()
+    where.add_argument("--port", type=int, default=8765, help="TCP port on 127.0.0.1")
+    where.add_argument("--unix", metavar="PATH", help="Unix socket path instead of TCP")
+    ap.add_argument("--engines", type=int, default=2, help="engine processes shared by all sessions")
+    ap.add_argument("--engine", default="/usr/games/stockfish", help="Stockfish path")
+    ap.add_argument("--depth", type=int, default=12)
+    ap.add_argument("--max-sessions", type=int, default=1000)
+    ap.add_argument("--idle-timeout", type=float, default=600.0, help="seconds without a command")
+    ap.add_argument("--max-queued", type=int, default=32, help="queued commands per session")
+    ap.add_argument("--write-timeout", type=float, default=10.0, help="seconds to wait for a client to read")
+    options = ap.parse_args(argv)
+    try:
+        asyncio.run(serve(options))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# The application imports its packages from chess_system/ (see main.py).
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def fake_uci():
+    """Command line of the deterministic fake engine; pass `--think-ms N` after it to slow it down."""
+    return [sys.executable, os.path.join(ROOT, "benchmarks", "fake_uci.py")]
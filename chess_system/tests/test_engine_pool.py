@@ -0,0 +1,128 @@
+import threading
+import time
+
+import chess
+import pytest
+
+from chess_engine.engine_pool import BACKGROUND, INTERACTIVE, EnginePool
+from chess_engine.stockfish_engine import StockfishEngine
+
+
+def position(*sans: str) -> chess.Board:
+    board = chess.Board()
+    for san in sans:
+        board.push_san(san)
+    return board
+
+
+# Distinct positions so every job is its own search.
+BOARDS = [position(), position("e4"), position("d4"), position("c4"), position("Nf3"), position("g3")]
+
+
+@pytest.fixture
+def make_pool(fake_uci):
+    pools = []
+
+    def make(think_ms: int, size: int = 1, depth: int = 8, **kwargs) -> EnginePool:
+        engines = [StockfishEngine(fake_uci + ["--think-ms", str(think_ms)], depth=depth) for _ in range(size)]
+        pool = EnginePool(engines=engines, depth=depth, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.002)
+
+
+def completion_log(futures: dict):
+    """Names of `futures` in the order they finish (one engine: the order they were served)."""
+    done = []
+    lock = threading.Lock()
+    for name, future in futures.items():
+
+        def record(_f, name=name):
+            with lock:
+                done.append(name)
+
+        future.add_done_callback(record)
+    return done
+
+
+def test_search_returns_a_legal_move(make_pool):
+    pool = make_pool(think_ms=0)
+    result = pool.search(BOARDS[1])
+    assert chess.Move.from_uci(result.move) in BOARDS[1].legal_moves
+
+
+def test_interactive_jumps_the_background_queue(make_pool):
+    pool = make_pool(think_ms=30)
+    futures = {"busy": pool.submit(BOARDS[0], priority=INTERACTIVE)}
+    wait_until(lambda: pool._running[0] is not None)
+    futures["bg1"] = pool.submit(BOARDS[1], priority=BACKGROUND)
+    futures["bg2"] = pool.submit(BOARDS[2], priority=BACKGROUND)
+    futures["fg"] = pool.submit(BOARDS[3], priority=INTERACTIVE)
+    done = completion_log(futures)
+    for future in futures.values():
+        future.result(timeout=5)
+    assert done == ["busy", "fg", "bg1", "bg2"]
+
+
+def test_owners_share_the_engine_fairly(make_pool):
+    pool = make_pool(think_ms=20)
+    futures = {"a0": pool.submit(BOARDS[0], owner="a")}
+    wait_until(lambda: pool._running[0] is not None)
+    # "a" queues a backlog before "b" submits anything.
+    for i in (1, 2, 3):
+        futures[f"a{i}"] = pool.submit(BOARDS[i], owner="a")
+    futures["b1"] = pool.submit(BOARDS[4], owner="b")
+    futures["b2"] = pool.submit(BOARDS[5], owner="b")
+    done = completion_log(futures)
+    for future in futures.values():
+        future.result(timeout=5)
+    # b's first job is tagged just behind the job being served, not behind a's whole backlog.
+    assert done == ["a0", "a1", "b1", "a2", "b2", "a3"]
+
+
+def test_preempted_background_job_is_requeued_and_finished(make_pool):
+    # Each fake "iteration" takes 10 ms, so depth 8 needs ~80 ms of the 200 ms think time.
+    pool = make_pool(think_ms=200, depth=8)
+    background = pool.submit(BOARDS[1], priority=BACKGROUND)
+    wait_until(lambda: pool._running[0] is not None)
+    time.sleep(0.03)
+    interactive = pool.submit(BOARDS[2], priority=INTERACTIVE)
+    done = completion_log({"bg": background, "fg": interactive})
+
+    fg = interactive.result(timeout=5)
+    bg = background.result(timeout=5)
+    # Without preemption the background search, started first, would finish first.
+    assert done == ["fg", "bg"]
+    # The stopped, shallow first run was thrown away: the rerun reached the target depth.
+    assert bg.depth >= 8 and fg.move is not None
+
+
+def test_user_stop_is_not_requeued(make_pool):
+    pool = make_pool(think_ms=2000, depth=8)
+    stop = threading.Event()
+    future = pool.submit(BOARDS[1], stop_event=stop, priority=BACKGROUND)
+    wait_until(lambda: pool._running[0] is not None)
+    stop.set()
+    result = future.result(timeout=1)
+    assert result.move is not None and result.depth < 8
+
+
+def test_shutdown_resolves_queued_jobs(fake_uci):
+    engine = StockfishEngine(fake_uci + ["--think-ms", "100"], depth=8)
+    pool = EnginePool(engines=[engine], depth=8)
+    running = pool.submit(BOARDS[0])
+    wait_until(lambda: pool._running[0] is not None)
+    queued = pool.submit(BOARDS[1])
+    pool.shutdown()
+    assert running.result(timeout=2).move is not None
+    assert queued.cancelled()
@@ -0,0 +1,91 @@
+import chess
+import chess.polyglot
+
+from chess_engine.engine_pool import EnginePool
+from chess_engine.eval_cache import EvalCache
+from chess_engine.stockfish_engine import SearchResult, StockfishEngine
+
+
+def result(move: str = "e2e4", depth: int = 10, score: int = 20) -> SearchResult:
+    return SearchResult(move=move, score=score, depth=depth)
+
+
+def test_deeper_entry_serves_shallower_requests():
+    cache = EvalCache()
+    cache.put(1, result(depth=10))
+    assert cache.get(1, 10) == result(depth=10)
+    assert cache.get(1, 6) == result(depth=10)
+    assert cache.get(1, 12) is None
+    assert cache.get(2, 1) is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_depth_replacement():
+    cache = EvalCache()
+    cache.put(1, result("e2e4", depth=10))
+    cache.put(1, result("d2d4", depth=6))  # shallower: kept out
+    assert cache.peek(1).move == "e2e4"
+    cache.put(1, result("c2c4", depth=10))  # same depth: newer wins
+    assert cache.peek(1).move == "c2c4"
+    cache.put(1, result("g1f3", depth=14))
+    assert cache.get(1, 12).move == "g1f3"
+    assert len(cache) == 1
+
+
+def test_results_without_a_move_are_not_cached():
+    cache = EvalCache()
+    cache.put(1, SearchResult(move=None))
+    assert len(cache) == 0 and cache.peek(1) is None
+
+
+def test_eviction_by_entries_is_lru():
+    cache = EvalCache(max_entries=3)
+    for key in (1, 2, 3):
+        cache.put(key, result())
+    cache.get(1, 1)  # refresh 1: 2 is now the oldest
+    cache.put(4, result())
+    assert cache.peek(2) is None
+    assert all(cache.peek(k) is not None for k in (1, 3, 4))
+    cache.peek(3)  # peek does not refresh: 3 goes next
+    cache.put(5, result())
+    assert cache.peek(3) is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_eviction_by_bytes():
+    probe = EvalCache()
+    probe.put(1, result())
+    entry_bytes = probe.stats()["bytes"]
+
+    cache = EvalCache(max_entries=1000, max_bytes=entry_bytes * 4)
+    for key in range(1, 11):
+        cache.put(key, result())
+    assert len(cache) == 4
+    assert cache.stats()["bytes"] <= entry_bytes * 4
+    assert [k for k in range(1, 11) if cache.peek(k) is not None] == [7, 8, 9, 10]
+
+    # Replacing an entry does not count its old size twice.
+    cache.put(10, result(depth=20))
+    assert cache.stats()["bytes"] == entry_bytes * 4
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_pool_caches_finished_searches(fake_uci):
+    # 50 ms of 10 ms "iterations" gets past the requested depth 3.
+    engine = StockfishEngine(fake_uci + ["--think-ms", "50"], depth=3)
+    cache = EvalCache()
+    pool = EnginePool(engines=[engine], depth=3, cache=cache)
+    try:
+        board = chess.Board()
+        first = pool.search(board)
+        assert first.depth >= 3
+        key = chess.polyglot.zobrist_hash(board)
+        assert cache.peek(key).move == first.move
+
+        again = pool.submit(board)
+        assert again.done()  # answered from the cache, no engine round trip
+        assert again.result().move == first.move
+        assert not pool.submit(board, depth=first.depth + 1).done()  # deeper request misses
+    finally:
+        pool.shutdown()
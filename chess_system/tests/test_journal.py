@@ -0,0 +1,243 @@
+import os
+import random
+
+import chess
+import pytest
+
+from chess_engine.board_manager import BoardManager
+from chess_engine.imagine_simulator import ImagineSimulator
+from chess_engine.journal import _HEADER, _RECORD, SessionJournal
+from chess_engine.move_codec import decode_move, encode_move
+from chess_engine.stockfish_engine import StockfishEngine
+from fsm.fsm_controller import FSMController
+from headless import VirtualClock
+from input.wake_detector_mock import WakeDetectorMock
+from util.logger import Logger
+from util.scheduler import DeadlineScheduler
+from util.timer import Timer
+
+
+def random_game(n: int, seed: int = 1) -> list[chess.Move]:
+    board = chess.Board()
+    rng = random.Random(seed)
+    moves = []
+    while len(moves) < n and not board.is_game_over():
+        move = rng.choice(list(board.legal_moves))
+        board.push(move)
+        moves.append(move)
+    return moves
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal" / "session")
+
+
+def reopen(path, **kwargs) -> SessionJournal:
+    """Open the journal again as a new process would after a crash."""
+    return SessionJournal(path, commit_interval=0.001, **kwargs)
+
+
+@pytest.mark.parametrize("uci", ["e2e4", "a7a8q", "h2h1n", "e1g1", "b7a8r"])
+def test_move_codec_round_trip(uci):
+    move = chess.Move.from_uci(uci)
+    assert decode_move(encode_move(move)) == move
+
+
+def test_round_trip_without_close(path):
+    moves = random_game(40)
+    journal = reopen(path)
+    assert journal.recovered.empty
+    journal.state(2)
+    for move in moves:
+        journal.main_push(move)
+    journal.state(3)
+    journal.imagine_start()
+    journal.imagine_push(chess.Move.from_uci("a2a3"))
+    journal.imagine_push(chess.Move.from_uci("a7a6"))
+    journal.imagine_pop()
+    journal.flush()
+
+    recovered = reopen(path).recovered
+    assert recovered.main_moves == moves
+    assert recovered.imagine_moves == [chess.Move.from_uci("a2a3")]
+    assert recovered.state == 3
+
+
+def test_imagine_reset_empties_the_line(path):
+    journal = reopen(path)
+    journal.imagine_start()
+    journal.imagine_push(chess.Move.from_uci("e2e4"))
+    journal.imagine_reset()
+    journal.close()
+
+    recovered = reopen(path).recovered
+    assert recovered.imagine_moves == []
+    assert recovered.main_moves == []
+
+
+def test_torn_tail_is_truncated(path):
+    moves, extra = random_game(21)[:20], random_game(21)[20]
+    journal = reopen(path)
+    for move in moves:
+        journal.main_push(move)
+    journal.close()
+    size = os.path.getsize(path)
+    assert size == _HEADER.size + len(moves) * _RECORD.size
+
+    with open(path, "ab") as f:
+        f.write(b"\x01\x00\x12")  # half a record
+    journal = reopen(path)
+    assert journal.recovered.main_moves == moves
+    assert os.path.getsize(path) == size
+
+    # Records appended after the cut continue the CRC sequence.
+    journal.main_push(extra)
+    journal.close()
+    assert reopen(path).recovered.main_moves == moves + [extra]
+
+
+def test_corrupt_record_drops_it_and_everything_after(path):
+    moves = random_game(10)
+    journal = reopen(path)
+    for move in moves:
+        journal.main_push(move)
+    journal.close()
+
+    offset = _HEADER.size + 6 * _RECORD.size
+    with open(path, "r+b") as f:
+        f.seek(offset + 2)
+        f.write(b"\xff\xff")
+    journal = reopen(path)
+    assert journal.recovered.main_moves == moves[:6]
+    assert os.path.getsize(path) == offset
+
+
+def test_snapshot_rotation(path):
+    moves = random_game(100)
+    journal = reopen(path, snapshot_every=16)
+    for i, move in enumerate(moves):
+        journal.main_push(move)
+        if i % 7 == 0:
+            journal.flush()
+    journal.state(4)
+    journal.flush()
+
+    assert os.path.exists(journal.snap_path)
+    # The journal restarted after the last snapshot instead of growing.
+    assert os.path.getsize(path) <= _HEADER.size + 16 * _RECORD.size
+    journal.close()
+
+    recovered = reopen(path, snapshot_every=16).recovered
+    assert recovered.main_moves == moves
+    assert recovered.state == 4
+
+
+def test_stale_journal_after_crash_between_renames(path):
+    moves = random_game(8)
+    journal = reopen(path, snapshot_every=8)
+    for move in moves[:5]:
+        journal.main_push(move)
+    journal.flush()
+    with open(path, "rb") as f:
+        old_journal = f.read()
+
+    for move in moves[5:]:
+        journal.main_push(move)
+    journal.flush()  # the 8th record triggers a snapshot
+    journal.close()
+
+    # Crash after the snapshot rename, before the new journal replaced the old one.
+    with open(path, "wb") as f:
+        f.write(old_journal)
+
+    recovered = reopen(path, snapshot_every=8).recovered
+    # The snapshot already holds the old journal's records: nothing is replayed twice.
+    assert recovered.main_moves == moves
+
+
+def test_reset_forgets_the_session(path):
+    journal = reopen(path, snapshot_every=4)
+    for move in random_game(10):
+        journal.main_push(move)
+    journal.state(2)
+    journal.reset()
+    assert journal.recovered.empty
+    journal.main_push(chess.Move.from_uci("d2d4"))
+    journal.close()
+
+    recovered = reopen(path).recovered
+    assert recovered.main_moves == [chess.Move.from_uci("d2d4")]
+    assert recovered.state is None
+
+
+def build_fsm(path):
+    journal = reopen(path)
+    engine = StockfishEngine(path="/nonexistent/stockfish")  # random-move fallback
+    scheduler = DeadlineScheduler(clock=VirtualClock(), threaded=False)
+    board = BoardManager(engine=engine, journal=journal)
+    imagine = ImagineSimulator(engine=engine, journal=journal)
+    fsm = FSMController(
+        board,
+        imagine,
+        Logger(stdout=False),
+        Timer(max_time=5, scheduler=scheduler),
+        WakeDetectorMock(),
+        journal=journal,
+    )
+    return journal, fsm
+
+
+def test_fsm_restore_after_crash(path):
+    random.seed(3)
+    journal, fsm = build_fsm(path)
+    for command in ["hey chess", "play e4", "hey chess", "play d4", "hey chess", "imagine", "Nf3", "take", "back", "e3"]:
+        fsm.handle_input(command)
+    journal.flush()  # crash: no close()
+
+    journal2, restored = build_fsm(path)
+    restored.restore(journal2.recovered)
+    assert restored.state == fsm.state
+    assert restored.board.board.fen() == fsm.board.board.fen()
+    assert restored.imag.board.fen() == fsm.imag.board.fen()
+    journal2.close()
+
+
+def test_close_is_idempotent(path):
+    journal = reopen(path)
+    journal.main_push(chess.Move.from_uci("e2e4"))
+    journal.close()
+    journal.close()
+    assert reopen(path).recovered.main_moves == [chess.Move.from_uci("e2e4")]
+
+
+def test_recovered_board_and_game_over(path):
+    journal = reopen(path)
+    board = chess.Board()
+    for san in ("f3", "e5", "g4", "Qh4#"):
+        move = board.parse_san(san)
+        board.push(move)
+        journal.main_push(move)
+    journal.close()
+
+    recovered = reopen(path).recovered
+    assert recovered.board.fen() == board.fen()
+    assert recovered.game_over
+    assert not reopen(str(path) + "-other").recovered.game_over
+
+
+def test_illegal_recovered_move_ends_the_game_there(path):
+    moves = random_game(6)
+    journal = reopen(path)
+    for move in moves[:4]:
+        journal.main_push(move)
+    journal.main_push(chess.Move.from_uci("e1e8"))  # CRC-valid, but not a legal move
+    journal.main_push(moves[4])
+    journal.imagine_start()
+    journal.imagine_push(moves[5])
+    journal.close()
+
+    recovered = reopen(path).recovered
+    assert recovered.main_moves == moves[:4]
+    assert recovered.imagine_moves is None
+    assert recovered.board.move_stack == moves[:4]
@@ -0,0 +1,109 @@
+import json
+import threading
+
+from util.logger import DEBUG, ERROR, INFO, WARNING, Lazy, Logger, parse_level
+
+
+class FakeGui:
+    def __init__(self):
+        self.messages = []
+
+    def show_fsm_message(self, text, tag="FSM"):
+        self.messages.append((tag, text))
+
+    def refresh_history(self):
+        pass
+
+
+def test_parse_level():
+    assert parse_level("debug") == DEBUG
+    assert parse_level(WARNING) == WARNING
+
+
+def test_level_filter_and_history():
+    log = Logger(level=INFO, stdout=False)
+    log.write("hidden %s", 1, level=DEBUG)
+    log.write("shown %s", 2, tag="ENGINE")
+    assert not log.enabled(DEBUG) and log.enabled(ERROR)
+    history = log.get_history()
+    assert len(history) == 1 and history[0].endswith("[ENGINE] shown 2")
+
+
+def test_lazy_arguments_only_for_records_that_pass():
+    calls = []
+
+    def snapshot():
+        calls.append(1)
+        return "board"
+
+    log = Logger(level=INFO, stdout=False)
+    log.write("Board: %s", Lazy(snapshot), level=DEBUG)
+    assert calls == []
+    log.write("Board: %s", Lazy(snapshot))
+    assert calls == [1]
+    assert log.get_history()[-1].endswith("Board: board")
+
+
+def test_callable_values_are_not_called():
+    class Job:
+        def cancel(self):
+            raise AssertionError("called by the logger")
+
+    log = Logger(stdout=False)
+    job = Job()
+    log.write("cancelling %s", job.cancel)
+    assert "bound method" in log.get_history()[-1]
+
+
+def test_bad_format_arguments_do_not_raise():
+    log = Logger(stdout=False)
+    log.write("%d moves", "many")
+    assert log.get_history()[-1].endswith("%d moves many")
+
+
+def test_background_writer_flushes_everything_on_close(capsys):
+    log = Logger(level=INFO)
+    for i in range(1000):
+        log.write("line %d", i, tag="T")
+    log.close()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1000
+    assert lines[0].endswith("[T] line 0") and lines[-1].endswith("[T] line 999")
+
+
+def test_jsonl_sink_and_rotation(tmp_path):
+    path = tmp_path / "log.jsonl"
+    log = Logger(stdout=False, jsonl_path=path, max_bytes=2000, backups=2)
+    for i in range(100):
+        log.write("record %d", i, tag="JSON", level=WARNING)
+    log.close()
+
+    # Rotation happens between writer batches: keep the newest files, nothing out of order.
+    names = sorted(f.name for f in tmp_path.iterdir())
+    assert "log.jsonl.1" in names and len(names) <= 3
+    entries = []
+    for name in ("log.jsonl.2", "log.jsonl.1", "log.jsonl"):
+        if (tmp_path / name).exists():
+            entries += [json.loads(line) for line in (tmp_path / name).read_text(encoding="utf-8").splitlines()]
+    numbers = [int(e["msg"].split()[1]) for e in entries]
+    assert numbers == list(range(numbers[0], 100))
+    assert entries[-1]["level"] == "WARNING" and entries[-1]["tag"] == "JSON"
+
+
+def test_gui_messages_use_dispatch_off_the_gui_thread():
+    log = Logger(stdout=False, gui_level=WARNING)
+    gui = FakeGui()
+    posted = []
+    log.attach_gui(gui, dispatch=posted.append)
+
+    log.write("info only", level=INFO)
+    log.write("shown here", level=WARNING, tag="ENGINE")
+    log.write("not for the panel", level=ERROR, gui=False)
+    assert gui.messages == [("ENGINE", "shown here")]
+
+    thread = threading.Thread(target=lambda: log.write("from %s", "voice", level=ERROR, tag="ASR"))
+    thread.start()
+    thread.join()
+    assert len(posted) == 1 and len(gui.messages) == 1
+    posted[0]()
+    assert gui.messages[-1] == ("ASR", "from voice")
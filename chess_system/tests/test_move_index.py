@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import chess
+import chess.polyglot
+import pytest
+
+from chess_engine.eval_cache import EvalCache
+from chess_engine.move_index import AmbiguousMove, MoveIndex, MoveIndexCache, engine_preference
+from chess_engine.stockfish_engine import SearchResult
+
+# White knights on c3 and g3 can both reach e4; castling both ways is legal.
+KNIGHTS = "r3k2r/8/8/8/8/2N3N1/8/R3K2R w KQkq - 0 1"
+
+
+def uci(u: str) -> chess.Move:
+    return chess.Move.from_uci(u)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("e4", "e2e4"),
+        ("Nf3", "g1f3"),
+        ("g1f3", "g1f3"),
+        ("  E4 ", "e2e4"),
+        ("f3", "f2f3"),  # a pawn move wins over a piece move to the same square
+    ],
+)
+def test_resolve_spoken_forms(text, expected):
+    assert MoveIndex(chess.Board()).resolve(text) == uci(expected)
+
+
+def test_resolve_castling_and_promotion():
+    index = MoveIndex(chess.Board(KNIGHTS))
+    assert index.resolve("castle short") == uci("e1g1")
+    assert index.resolve("O-O-O") == uci("e1c1")
+    assert index.resolve("castle") == uci("e1g1")
+
+    promote = MoveIndex(chess.Board("8/4P3/8/8/8/8/k7/4K3 w - - 0 1"))
+    assert promote.resolve("e7e8") == uci("e7e8q")
+    assert promote.resolve("e8=N") == uci("e7e8n")
+    assert promote.resolve("e8") == uci("e7e8q")
+
+
+def test_illegal_move():
+    with pytest.raises(ValueError, match="Illegal"):
+        MoveIndex(chess.Board()).resolve("e5")
+
+
+def test_ambiguous_move_lists_candidates():
+    with pytest.raises(AmbiguousMove) as info:
+        MoveIndex(chess.Board(KNIGHTS)).resolve("Ne4")
+    assert set(info.value.candidates) == {uci("c3e4"), uci("g3e4")}
+    assert sorted(info.value.sans) == ["Nce4", "Nge4"]
+    # Full SAN with the from-file is not ambiguous.
+    assert MoveIndex(chess.Board(KNIGHTS)).resolve("Nge4") == uci("g3e4")
+
+
+def test_engine_preference_breaks_ties_without_touching_cache_stats():
+    board = chess.Board(KNIGHTS)
+    key = chess.polyglot.zobrist_hash(board)
+    cache = EvalCache()
+    engine = SimpleNamespace(cache=cache)
+    index = MoveIndex(board)
+
+    with pytest.raises(AmbiguousMove):
+        index.resolve("Ne4", prefer=engine_preference(engine, key))
+    cache.put(key, SearchResult(move="g3e4", score=10, depth=8))
+    assert index.resolve("Ne4", prefer=engine_preference(engine, key)) == uci("g3e4")
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    # A cached move that is not a candidate does not decide.
+    cache.put(key, SearchResult(move="a1a8", score=10, depth=9))
+    with pytest.raises(AmbiguousMove):
+        index.resolve("Ne4", prefer=engine_preference(engine, key))
+
+
+def test_cache_is_keyed_by_position_and_bounded():
+    cache = MoveIndexCache(max_entries=2)
+    board = chess.Board()
+    first = cache.get(board)
+    assert cache.get(board) is first
+    board.push_san("e4")
+    second = cache.get(board)
+    assert second is not first and uci("e7e5") in second
+    # The index keeps its own board: later pushes on the caller's board do not leak in.
+    board.push_san("e5")
+    assert uci("e7e5") in second
+
+    board.push_san("Nf3")
+    cache.get(board)
+    assert len(cache._entries) == 2
+    assert cache.get(chess.Board()) is not first  # evicted
+    assert (cache.hits, cache.misses) == (1, 4)
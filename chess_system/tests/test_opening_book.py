@@ -0,0 +1,54 @@
+import random
+import struct
+
+import chess
+import chess.polyglot
+
+from chess_engine.opening_book import OpeningBook
+
+
+def polyglot_move(move: chess.Move) -> int:
+    return move.to_square | (move.from_square << 6)
+
+
+def write_book(path, entries):
+    """entries: (board, uci, weight); Polyglot files are sorted by key."""
+    rows = sorted(
+        (chess.polyglot.zobrist_hash(board), polyglot_move(chess.Move.from_uci(uci)), weight)
+        for board, uci, weight in entries
+    )
+    with open(path, "wb") as f:
+        for key, move, weight in rows:
+            f.write(struct.pack(">QHHI", key, move, weight, 0))
+    return path
+
+
+def test_weighted_pick_skips_zero_weight_entries(tmp_path):
+    start = chess.Board()
+    path = write_book(tmp_path / "book.bin", [(start, "e2e4", 0), (start, "d2d4", 5), (start, "g1f3", 0)])
+    book = OpeningBook(path, rng=random.Random(1))
+    assert {book.pick(start).move for _ in range(20)} == {"d2d4"}
+
+
+def test_only_zero_weight_entries_is_a_miss(tmp_path):
+    start = chess.Board()
+    path = write_book(tmp_path / "book.bin", [(start, "e2e4", 0), (start, "d2d4", 0)])
+    for mode in ("weighted", "best"):
+        book = OpeningBook(path, mode=mode)
+        assert book.pick(start) is None
+        assert (book.hits, book.misses) == (0, 1)
+
+
+def test_best_mode_and_castling(tmp_path):
+    start = chess.Board()
+    castle = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    path = write_book(
+        tmp_path / "book.bin",
+        [(start, "e2e4", 3), (start, "d2d4", 7), (castle, "e1h1", 1)],  # Polyglot castles king-takes-rook
+    )
+    book = OpeningBook(path, mode="best")
+    assert book.pick(start).move == "d2d4"
+    assert book.pick(castle).move == "e1g1"
+    after = chess.Board()
+    after.push_san("e4")
+    assert book.pick(after) is None
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from headless import VirtualClock
+from util.scheduler import DeadlineScheduler
+from util.timer import Timer
+
+
+def make_scheduler(**kwargs):
+    clock = VirtualClock()
+    return clock, DeadlineScheduler(clock=clock, threaded=False, **kwargs)
+
+
+def test_fires_in_deadline_order_once():
+    clock, scheduler = make_scheduler()
+    fired = []
+    scheduler.schedule("b", 2.0, lambda: fired.append("b"))
+    scheduler.schedule("a", 1.0, lambda: fired.append("a"))
+    assert scheduler.next_deadline() == 1.0
+    assert scheduler.run_due() == 0
+
+    clock.advance_to(1.5)
+    assert scheduler.remaining("b") == 0.5
+    assert scheduler.run_due() == 1
+    clock.advance_to(5.0)
+    assert scheduler.run_due() == 1
+    assert scheduler.run_due() == 0
+    assert fired == ["a", "b"]
+    assert scheduler.remaining("a") is None
+
+
+def test_rescheduling_a_name_replaces_it():
+    clock, scheduler = make_scheduler()
+    fired = []
+    scheduler.schedule("state", 1.0, lambda: fired.append("old"))
+    clock.advance_to(0.9)
+    scheduler.schedule("state", 1.0, lambda: fired.append("new"))
+    clock.advance_to(1.5)
+    assert scheduler.run_due() == 0
+    clock.advance_to(1.9)
+    scheduler.run_due()
+    assert fired == ["new"]
+
+
+def test_cancel_and_close():
+    clock, scheduler = make_scheduler()
+    fired = []
+    scheduler.schedule("a", 1.0, lambda: fired.append("a"))
+    scheduler.schedule("b", 1.0, lambda: fired.append("b"))
+    scheduler.cancel("a")
+    assert scheduler.next_deadline() == 1.0
+    scheduler.close()
+    clock.advance_to(2.0)
+    assert scheduler.run_due() == 0
+    assert fired == []
+
+
+def test_dispatched_callback_skipped_if_rearmed_before_it_runs():
+    queue = []
+    clock, scheduler = make_scheduler(dispatch=queue.append)
+    fired = []
+    scheduler.schedule("state", 1.0, lambda: fired.append(1))
+    clock.advance_to(1.0)
+    scheduler.run_due()
+    assert len(queue) == 1 and fired == []
+    # The consumer thread rearms the timer before the queued callback runs.
+    scheduler.schedule("state", 1.0, lambda: fired.append(2))
+    queue.pop()()
+    assert fired == []
+    clock.advance_to(2.0)
+    scheduler.run_due()
+    queue.pop()()
+    assert fired == [2]
+
+
+def test_scoped_views_keep_names_apart():
+    clock, scheduler = make_scheduler()
+    fired = []
+    one, two = scheduler.scoped("1:"), scheduler.scoped("2:")
+    one.schedule("state", 1.0, lambda: fired.append("one"))
+    two.schedule("state", 1.0, lambda: fired.append("two"))
+    one.cancel_all()
+    clock.advance_to(1.0)
+    scheduler.run_due()
+    assert fired == ["two"]
+
+
+def test_threaded_scheduler_wakes_for_an_earlier_deadline():
+    scheduler = DeadlineScheduler()
+    done = threading.Event()
+    try:
+        scheduler.schedule("late", 60.0, lambda: None)
+        scheduler.schedule("soon", 0.01, done.set)
+        assert done.wait(2.0)
+    finally:
+        scheduler.close()
+
+
+def test_timer_pause_freezes_remaining_time():
+    clock, scheduler = make_scheduler()
+    timer = Timer(max_time=5.0, scheduler=scheduler)
+    timeouts = []
+    timer.on_timeout(lambda: timeouts.append(clock.now))
+    timer.arm()
+    clock.advance_to(2.0)
+    timer.pause()
+    clock.advance_to(10.0)
+    assert scheduler.run_due() == 0
+    assert timer.remaining == 3.0
+    timer.resume()
+    clock.advance_to(13.0)
+    scheduler.run_due()
+    assert timeouts == [13.0]
+
+
+def test_timer_requires_a_scheduler():
+    with pytest.raises(TypeError):
+        Timer(max_time=5.0)
+    with pytest.raises(TypeError):
+        Timer(max_time=5.0, scheduler=None)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from chess_engine.engine_pool import EnginePool
+from chess_engine.stockfish_engine import StockfishEngine
+from server import GameServer
+
+
+@pytest.fixture
+def make_pool(fake_uci):
+    pools = []
+
+    def make(think_ms: int = 0) -> EnginePool:
+        pool = EnginePool(engines=[StockfishEngine(fake_uci + ["--think-ms", str(think_ms)], depth=3)], depth=3)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def run(coro, timeout: float = 20.0):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+async def start(pool, **kwargs):
+    server = GameServer(pool, **kwargs)
+    listener = await server.start(port=0)
+    return server, listener.sockets[0].getsockname()[1]
+
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def is_state(message: dict) -> bool:
+    return message["type"] == "state"
+
+
+async def receive(reader) -> dict | None:
+    line = await reader.readline()
+    return json.loads(line) if line else None
+
+
+async def receive_until(reader, predicate) -> dict:
+    while True:
+        message = await receive(reader)
+        assert message is not None, "connection closed"
+        if predicate(message):
+            return message
+
+
+async def wait_for(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_concurrent_sessions_are_isolated(make_pool):
+    async def scenario():
+        server, port = await start(make_pool())
+        clients = [await asyncio.open_connection("127.0.0.1", port) for _ in range(3)]
+
+        async def play(reader, writer, move):
+            assert (await receive_until(reader, is_state))["state"] == "WAIT_WAKE"
+            writer.write(f"hey chess\nplay {move}\n".encode())
+            # The engine's reply has been played: White to move again, off the start position.
+            return await receive_until(
+                reader, lambda m: is_state(m) and not m["thinking"] and " w " in m["fen"] and m["fen"] != START
+            )
+
+        finals = await asyncio.gather(*(play(r, w, m) for (r, w), m in zip(clients, ("e4", "d4", "c4"))))
+        assert [f["state"] for f in finals] == ["ROOT"] * 3
+        assert len({f["fen"] for f in finals}) == 3  # each session has its own board
+        assert server.stats()["sessions"] == 3
+        for _, writer in clients:
+            writer.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_server_full_is_rejected(make_pool):
+    async def scenario():
+        server, port = await start(make_pool(), max_sessions=1)
+        reader1, writer1 = await asyncio.open_connection("127.0.0.1", port)
+        await receive_until(reader1, is_state)
+        reader2, writer2 = await asyncio.open_connection("127.0.0.1", port)
+        assert await receive(reader2) == {"type": "bye", "reason": "server full"}
+        assert await reader2.read() == b""
+        assert (server.accepted, server.rejected) == (1, 1)
+        writer1.close()
+        writer2.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_idle_sessions_are_evicted(make_pool):
+    async def scenario():
+        server, port = await start(make_pool(), idle_timeout=0.2)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        assert await receive_until(reader, lambda m: m["type"] == "bye") == {"type": "bye", "reason": "idle"}
+        assert await reader.read() == b""
+        assert server.evicted == 1 and not server.sessions
+        writer.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_queued_commands_are_bounded_and_all_answered(make_pool):
+    async def scenario():
+        server, port = await start(make_pool(think_ms=300), max_queued=2)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await receive_until(reader, is_state)
+        writer.write(b"hey chess\nplay e4\n" + b"/stats\n" * 20)
+        await writer.drain()
+        session = next(iter(server.sessions.values()))
+        await wait_for(lambda: session.fsm.is_thinking())
+        await asyncio.sleep(0.1)
+        # The command loop waits for the engine; the reader stops at max_queued.
+        assert session.inbox.qsize() == 2
+        stats = [await receive_until(reader, lambda m: m["type"] == "stats") for _ in range(20)]
+        assert stats[-1]["commands"] == 2  # nothing was dropped or reordered
+        writer.close()
+        await server.close()
+
+    run(scenario())
+
+
+@pytest.mark.parametrize("limits", [{"write_timeout": 0.5}, {"max_output": 64 * 1024, "write_timeout": 60.0}])
+def test_client_that_stops_reading_is_dropped(make_pool, limits):
+    async def scenario():
+        server, port = await start(make_pool(), **limits)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # Far more replies than the socket buffers hold, and never read.
+        writer.write(b"/stats\n" * 100_000)
+        await wait_for(lambda: server.accepted == 1 and not server.sessions, timeout=10.0)
+        assert not server._connections  # its handler has finished too
+        writer.close()
+        await server.close()
+
+    run(scenario())
+
+
+def test_shutdown_with_connected_clients(make_pool):
+    async def scenario():
+        server, port = await start(make_pool())
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await receive_until(reader, is_state)
+        await server.close()
+        assert await receive_until(reader, lambda m: m["type"] == "bye") == {"type": "bye", "reason": "shutdown"}
+        assert await reader.read() == b""
+        assert not server._connections
+        writer.close()
+
+    run(scenario())
@@ -0,0 +1,43 @@
+import chess
+import chess.engine
+
+from chess_engine.stockfish_engine import StockfishEngine
+from util.logger import WARNING
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def write(self, text, *args, tag="FSM", level=20, gui=True):
+        self.records.append((tag, level, text))
+
+
+def test_rejected_options_quit_the_process_and_are_logged(monkeypatch, fake_uci):
+    started = []
+    popen_uci = chess.engine.SimpleEngine.popen_uci
+
+    def spy(*args, **kwargs):
+        started.append(popen_uci(*args, **kwargs))
+        return started[-1]
+
+    monkeypatch.setattr(chess.engine.SimpleEngine, "popen_uci", spy)
+    logger = RecordingLogger()
+    engine = StockfishEngine(fake_uci, options={"Hash": 10**12}, logger=logger)
+
+    assert engine._engine is None
+    assert started[0].protocol.returncode.done()  # the spawned engine was quit
+    assert [(tag, level) for tag, level, _ in logger.records] == [("ENGINE", WARNING)]
+    # Still usable through the random-move fallback.
+    assert chess.Move.from_uci(engine.get_bestmove(chess.Board())) in chess.Board().legal_moves
+
+
+def test_accepted_options_keep_the_engine(fake_uci):
+    logger = RecordingLogger()
+    engine = StockfishEngine(fake_uci, depth=3, options={"Hash": 32, "Threads": 1}, logger=logger)
+    try:
+        assert engine._engine is not None
+        assert engine.search(chess.Board()).move is not None
+        assert logger.records == []
+    finally:
+        engine.close()
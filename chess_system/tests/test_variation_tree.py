@@ -0,0 +1,126 @@
+import random
+
+import chess
+import chess.polyglot
+import pytest
+
+from chess_engine.imagine_simulator import ImagineSimulator
+from chess_engine.move_history import MoveHistory
+from chess_engine.stockfish_engine import StockfishEngine
+from chess_engine.variation_tree import CHECKPOINT, NONE, ROOT, VariationTree
+
+
+def base_board() -> chess.Board:
+    board = chess.Board()
+    board.push_san("e4")
+    board.push_san("e5")
+    return board
+
+
+def assert_matches_replay(imagine: ImagineSimulator):
+    """Board, key, tree path and move list must equal a replay of the line from the base board."""
+    board = base_board()
+    for move in imagine._history:
+        board.push(move)
+    assert imagine.board.fen() == board.fen()
+    assert imagine.zobrist == chess.polyglot.zobrist_hash(board)
+    assert imagine.tree.moves(imagine.node) == imagine._history
+    assert imagine.tree.board_at(imagine.node).fen() == board.fen()
+    assert imagine.history.text() == MoveHistory.from_moves(base_board(), imagine._history).text()
+
+
+def test_shared_prefix_and_route():
+    board = base_board()
+    tree = VariationTree(board, chess.polyglot.zobrist_hash(board))
+
+    def add(parent, san):
+        b = tree.board_at(parent)
+        move = b.parse_san(san)
+        b.push(move)
+        return tree.add(parent, move, san, b, chess.polyglot.zobrist_hash(b))
+
+    nf3 = add(ROOT, "Nf3")
+    nc6 = add(nf3, "Nc6")
+    nf6 = add(nf3, "Nf6")
+    assert add(ROOT, "Nf3") == nf3  # existing child is reused
+    assert tree.children(nf3) == [nc6, nf6]
+    assert tree.last_child(ROOT) == nf3
+    assert tree.last_child(nf3) == nf6
+    assert tree.route(nc6, nf6) == (nf3, 1, [nf6])
+    assert tree.route(ROOT, nf6) == (ROOT, 0, [nf3, nf6])
+    assert tree.route(nf6, ROOT) == (ROOT, 2, [])
+    assert tree.child(nf3, chess.Move.from_uci("a2a3")) == NONE
+
+    tree.select(nc6)
+    assert tree.last_child(nf3) == nc6
+
+
+def test_long_line_crosses_checkpoints():
+    imagine = ImagineSimulator(engine=StockfishEngine(path="/nonexistent/stockfish"))
+    imagine.start(base_board())
+    rng = random.Random(7)
+    for _ in range(3 * CHECKPOINT + 5):
+        if imagine.board.is_game_over():
+            break
+        imagine._push(rng.choice(list(imagine.board.legal_moves)))
+    leaf = imagine.node
+    imagine.goto(ROOT)
+    assert_matches_replay(imagine)
+    imagine.goto(leaf)
+    assert_matches_replay(imagine)
+
+
+@pytest.mark.parametrize("seed", [1, 5, 11])
+def test_random_navigation_matches_replay(seed):
+    rng = random.Random(seed)
+    imagine = ImagineSimulator(engine=StockfishEngine(path="/nonexistent/stockfish"))
+    imagine.start(base_board())
+    for step in range(3000):
+        r = rng.random()
+        if r < 0.55 and not imagine.board.is_game_over():
+            imagine._push(rng.choice(list(imagine.board.legal_moves)))
+        elif r < 0.7:
+            imagine.back()
+        elif r < 0.8:
+            imagine.forward()
+        elif r < 0.9:
+            imagine.switch_line(rng.choice((1, -1)))
+        else:
+            imagine.goto(rng.randrange(len(imagine.tree)))
+        if step % 37 == 0:
+            assert_matches_replay(imagine)
+    assert_matches_replay(imagine)
+
+
+def test_back_forward_and_sibling_lines():
+    imagine = ImagineSimulator(engine=StockfishEngine(path="/nonexistent/stockfish"))
+    imagine.start(base_board())
+    for san in ("Nf3", "Nc6", "Bb5"):
+        imagine.move(san)
+    bb5 = imagine.node
+    assert imagine.back()
+    imagine.move("Bc4")  # a second line from the Nc6 position
+    bc4 = imagine.node
+    assert imagine.switch_line(-1) and imagine.node == bb5
+    assert_matches_replay(imagine)
+    assert imagine.switch_line(1) and imagine.node == bc4
+    assert imagine.back() and imagine.back()
+    assert imagine.forward() and imagine.forward()
+    assert imagine.node == bc4  # the line visited last
+    assert_matches_replay(imagine)
+
+
+def test_restart_from_same_position_keeps_the_tree():
+    imagine = ImagineSimulator(engine=StockfishEngine(path="/nonexistent/stockfish"))
+    imagine.start(base_board())
+    imagine.move("Nf3")
+    tree = imagine.tree
+    imagine.start(base_board())
+    assert imagine.tree is tree and imagine.node == ROOT
+    assert imagine.forward()
+    assert_matches_replay(imagine)
+
+    other = base_board()
+    other.push_san("Nf3")
+    imagine.start(other)
+    assert imagine.tree is not tree
@@ -1,32 +1,221 @@
+"""
+Level-filtered logger with a background writer.
+
+write() only checks the level and queues a record; the message is %-formatted,
+timestamped and written by the writer thread, which batches records to
+stdout and, optionally, to a size-rotated JSONL file. Arguments wrapped in
+Lazy are called at write() time (only if the record passes the filter), so
+callers can snapshot mutable state cheaply and leave string building to the
+writer; any other argument, callables included, is logged as it is:
+
+    log.write("Board:\\n%s", Lazy(self._board_snapshot), tag="BOARD", level=DEBUG)
+
+The GUI message panel is updated from the calling thread only when that is
+the thread the GUI was attached on; other threads go through `dispatch`.
+A logger without sinks (stdout=False, no jsonl_path) starts no thread, so
+many can be created cheaply (one per game-server session).
+"""
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
 from collections import deque
 from datetime import datetime
 
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# Queued records are (created, level, tag, msg, args) tuples; _STOP ends the writer.
+_STOP = object()
+
+
+class Lazy:
+    """write() argument computed by calling `fn()`, only for records that pass the level filter."""
+
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+
+def parse_level(level) -> int:
+    if isinstance(level, int):
+        return level
+    for value, name in LEVEL_NAMES.items():
+        if name == str(level).upper():
+            return value
+    raise ValueError(f"Unknown log level: {level}")
+
+
+def _format(record) -> str:
+    _created, _level, _tag, msg, args = record
+    if not args:
+        return msg
+    try:
+        return msg % args
+    except (TypeError, ValueError):
+        return " ".join([msg, *map(str, args)])
+
+
+class StdoutSink:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write_batch(self, records, texts):
+        lines = []
+        for (created, _level, tag, _msg, _args), text in zip(records, texts):
+            stamp = datetime.fromtimestamp(created).strftime("%H:%M:%S")
+            lines.append(f"[{stamp}] [{tag}] {text}\n")
+        self.stream.write("".join(lines))
+        self.stream.flush()
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """One JSON object per line; rotates to path.1 … path.N once max_bytes is exceeded."""
+
+    def __init__(self, path, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write_batch(self, records, texts):
+        lines = []
+        for (created, level, tag, _msg, _args), text in zip(records, texts):
+            entry = {"ts": created, "level": LEVEL_NAMES.get(level, level), "tag": tag, "msg": text}
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.write("".join(lines))
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self):
+        self._file.close()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        self._file = open(self.path, "a", encoding="utf-8")
+
 
 class Logger:
-    def __init__(self, history_limit: int = 200):
+    def __init__(
+        self,
+        history_limit: int = 200,
+        level=INFO,
+        gui_level=INFO,
+        stdout: bool = True,
+        jsonl_path=None,
+        max_bytes: int = 5 * 1024 * 1024,
+        backups: int = 3,
+    ):
         self.gui = None
+        self.level = parse_level(level)
+        self.gui_level = parse_level(gui_level)
         self._history = deque(maxlen=history_limit)
+        self._gui_thread = None
+        self._dispatch = None
+
+        self._sinks = []
+        if stdout:
+            self._sinks.append(StdoutSink())
+        if jsonl_path:
+            self._sinks.append(JsonlSink(jsonl_path, max_bytes=max_bytes, backups=backups))
 
-    def attach_gui(self, gui):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = None
+        if self._sinks:
+            self._thread = threading.Thread(target=self._writer, daemon=True, name="log-writer")
+            self._thread.start()
+            atexit.register(self.close)
+
+    def attach_gui(self, gui, dispatch=None):
+        """dispatch: runs a callable on the GUI thread, for records written on other threads."""
         self.gui = gui
+        self._gui_thread = threading.get_ident()
+        self._dispatch = dispatch
 
-    def write(self, text: str, tag: str = "FSM"):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        entry = f"[{timestamp}] [{tag}] {text}"
-        self._history.append(entry)
-        print(entry)
-        if self.gui:
-            self.gui.show_fsm_message(text, tag=tag)
+    def enabled(self, level: int = DEBUG) -> bool:
+        return level >= self.level
+
+    def write(self, text: str, *args, tag: str = "FSM", level: int = INFO, gui: bool = True):
+        if level < self.level:
+            return
+        if args:
+            # Snapshot Lazy arguments now; %-formatting happens on the writer thread.
+            args = tuple(arg.fn() if isinstance(arg, Lazy) else arg for arg in args)
+        record = (time.time(), level, tag, text, args)
+        self._history.append(record)
+        if self._thread is not None:
+            self._queue.put(record)
+        if gui and self.gui and level >= self.gui_level:
+            self._show(record)
+
+    def debug(self, text: str, *args, tag: str = "FSM"):
+        self.write(text, *args, tag=tag, level=DEBUG)
 
     def write_move(self, text: str):
         """Log a move to history without cluttering the FSM message panel."""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        entry = f"[{timestamp}] [MOVE] {text}"
-        self._history.append(entry)
-        print(entry)
-        if self.gui:
+        self.write(text, tag="MOVE", gui=False)
+        if self.gui and threading.get_ident() == self._gui_thread:
             # Rebuild history in GUI so move list stays accurate (including undo).
             self.gui.refresh_history()
 
     def get_history(self):
-        return list(self._history)
+        return [
+            f"[{datetime.fromtimestamp(r[0]).strftime('%H:%M:%S')}] [{r[2]}] {_format(r)}"
+            for r in self._history
+        ]
+
+    def close(self):
+        """Write out queued records and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=2.0)
+        for sink in self._sinks:
+            sink.close()
+        self._sinks = []
+
+    # -----------------------------------------------------
+    # Internal
+    # -----------------------------------------------------
+    def _show(self, record):
+        text, tag = _format(record), record[2]
+        if threading.get_ident() == self._gui_thread:
+            self.gui.show_fsm_message(text, tag=tag)
+        elif self._dispatch is not None:
+            self._dispatch(lambda: self.gui.show_fsm_message(text, tag=tag))
+
+    def _writer(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take whatever else is already queued so bursts cost one write per sink.
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(r is _STOP for r in batch)
+            records = [r for r in batch if r is not _STOP]
+            if records:
+                texts = [_format(r) for r in records]
+                for sink in self._sinks:
+                    try:
+                        sink.write_batch(records, texts)
+                    except Exception as e:
+                        print(f"[LOG] sink {type(sink).__name__} failed: {e}", file=sys.stderr)
+            if stop:
+                return
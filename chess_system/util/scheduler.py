@@ -0,0 +1,170 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class _Deadline:
+    __slots__ = ("name", "deadline", "callback", "cancelled")
+
+    def __init__(self, name, deadline, callback):
+        self.name = name
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+
+class DeadlineScheduler:
+    """
+    Named one-shot timers on a monotonic clock.
+
+    Timers live in a heap ordered by deadline; one thread sleeps until the
+    earliest deadline (or indefinitely when none is set) instead of ticking,
+    so an idle application causes no wake-ups. Scheduling a name that is
+    already pending replaces it, which is how ROOT/IMAGINE timeouts and
+    engine deadlines are rearmed.
+
+    dispatch: runs due callbacks elsewhere (e.g. TkDispatcher.post); a timer
+              cancelled or replaced before its callback runs there is skipped.
+    clock:    seconds as a float; inject a virtual clock together with
+              threaded=False and drive it with run_due().
+    """
+
+    def __init__(self, dispatch=None, clock=time.monotonic, threaded: bool = True):
+        self.clock = clock
+        self._dispatch = dispatch
+        self._heap: list = []
+        self._pending: dict[str, _Deadline] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="deadlines")
+            self._thread.start()
+
+    def schedule(self, name: str, delay: float, callback):
+        """Call `callback()` once, `delay` seconds from now, replacing a pending `name`."""
+        entry = _Deadline(name, self.clock() + delay, callback)
+        with self._cond:
+            old = self._pending.get(name)
+            if old is not None:
+                old.cancelled = True
+            self._pending[name] = entry
+            heapq.heappush(self._heap, (entry.deadline, next(self._seq), entry))
+            self._cond.notify()
+
+    def cancel(self, name: str):
+        with self._cond:
+            entry = self._pending.pop(name, None)
+            if entry is not None:
+                entry.cancelled = True
+
+    def remaining(self, name: str) -> float | None:
+        """Seconds until `name` fires, or None if it is not pending."""
+        with self._cond:
+            entry = self._pending.get(name)
+        if entry is None:
+            return None
+        return max(0.0, entry.deadline - self.clock())
+
+    def next_deadline(self) -> float | None:
+        with self._cond:
+            self._drop_cancelled()
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self) -> int:
+        """Fire every timer whose deadline has passed; returns how many fired."""
+        with self._cond:
+            due = self._pop_due(self.clock())
+        for entry in due:
+            self._fire(entry)
+        return len(due)
+
+    def scoped(self, prefix: str) -> "ScopedScheduler":
+        """View whose timer names are prefixed, so many owners can share this thread."""
+        return ScopedScheduler(self, prefix)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._heap.clear()
+            self._cond.notify()
+
+    # ---------------------------------------------------------
+    # Internal
+    # ---------------------------------------------------------
+    def _loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    self._drop_cancelled()
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - self.clock()
+                    if delay > 0:
+                        self._cond.wait(delay)
+                        continue
+                    due = self._pop_due(self.clock())
+                    break
+            for entry in due:
+                self._fire(entry)
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    def _pop_due(self, now: float) -> list:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)[2]
+            if not entry.cancelled:
+                due.append(entry)
+        return due
+
+    def _fire(self, entry: _Deadline):
+        if self._dispatch is None:
+            self._run(entry)
+        else:
+            self._dispatch(lambda: self._run(entry))
+
+    def _run(self, entry: _Deadline):
+        # Re-check on the callback's thread: it may have been rearmed meanwhile.
+        with self._cond:
+            if entry.cancelled or self._pending.get(entry.name) is not entry:
+                return
+            del self._pending[entry.name]
+        entry.callback()
+
+
+class ScopedScheduler:
+    """
+    DeadlineScheduler API over a shared scheduler with names prefixed by `prefix`
+    (e.g. one per game-server session, so each session's "state" and "engine"
+    timers stay separate). cancel_all() drops every timer this view scheduled.
+    """
+
+    def __init__(self, scheduler: DeadlineScheduler, prefix: str):
+        self.scheduler = scheduler
+        self.prefix = prefix
+        self.clock = scheduler.clock
+        self._names: set[str] = set()
+
+    def schedule(self, name: str, delay: float, callback):
+        self._names.add(name)
+        self.scheduler.schedule(self.prefix + name, delay, callback)
+
+    def cancel(self, name: str):
+        self.scheduler.cancel(self.prefix + name)
+
+    def remaining(self, name: str) -> float | None:
+        return self.scheduler.remaining(self.prefix + name)
+
+    def cancel_all(self):
+        for name in self._names:
+            self.scheduler.cancel(self.prefix + name)
+        self._names.clear()
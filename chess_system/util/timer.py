@@ -1,24 +1,38 @@
 import threading
-import time
+
+from util.scheduler import DeadlineScheduler, ScopedScheduler
 
 
 class Timer:
     """
-    Simple countdown timer that can be driven manually (via tick)
-    or by the built-in auto tick thread. A single timeout callback
-    can be registered; it fires once per arm/reset cycle.
+    Countdown backed by a deadline on a DeadlineScheduler.
+    While running, the remaining time is computed from the monotonic clock
+    (deadline - now), so a busy GUI thread cannot stretch it; while paused the
+    remaining time is frozen. A single timeout callback can be registered; it
+    fires once per arm/reset cycle, on whatever thread the scheduler runs
+    callbacks on, which is why there is no default scheduler: the owner picks
+    one that dispatches to its own thread (or drives a non-threaded one).
     """
 
-    def __init__(self, max_time: float = 5.0):
+    def __init__(
+        self,
+        max_time: float = 5.0,
+        *,
+        scheduler: DeadlineScheduler | ScopedScheduler,
+        name: str = "state",
+    ):
+        if scheduler is None:
+            raise TypeError("Timer needs a scheduler (e.g. DeadlineScheduler(dispatch=TkDispatcher.post))")
         self.max_time = max_time
-        self._remaining = max_time
-        self._running = False
+        self.scheduler = scheduler
+        self.name = name
+        self._remaining = max_time  # frozen value while paused
+        self._deadline = None  # clock value at expiry while running
         self._timeout_fired = False
         self._timeout_cb = None
+        self._listeners = []
 
         self._lock = threading.Lock()
-        self._stop_event = threading.Event()
-        self._auto_thread = None
 
     # ------------------------------------------------------------------
     # Basic controls
@@ -29,70 +43,41 @@ class Timer:
             if duration is not None:
                 self.max_time = duration
             self._remaining = self.max_time
-            self._running = start
             self._timeout_fired = False
+            self._set_running(start)
+        self._notify()
 
     def reset(self, restart: bool | None = None):
         """Reset remaining time without changing duration."""
         with self._lock:
+            running = self._deadline is not None if restart is None else restart
             self._remaining = self.max_time
             self._timeout_fired = False
-            if restart is not None:
-                self._running = restart
+            self._set_running(running)
+        self._notify()
 
     def pause(self):
         with self._lock:
-            self._running = False
+            if self._deadline is not None:
+                self._remaining = self._left()
+            self._set_running(False)
+        self._notify()
 
     def resume(self):
         with self._lock:
-            if self._remaining <= 0:
-                self._remaining = self.max_time
-            self._running = True
-            self._timeout_fired = False
+            if self._deadline is None:
+                if self._remaining <= 0:
+                    self._remaining = self.max_time
+                self._timeout_fired = False
+                self._set_running(True)
+        self._notify()
 
     def on_timeout(self, callback):
         self._timeout_cb = callback
 
-    # ------------------------------------------------------------------
-    # Ticking
-    # ------------------------------------------------------------------
-    def tick(self, dt: float):
-        callback = None
-        with self._lock:
-            if not self._running or self._remaining <= 0:
-                return
-
-            self._remaining = max(0.0, self._remaining - dt)
-            if self._remaining == 0 and not self._timeout_fired:
-                self._timeout_fired = True
-                self._running = False
-                callback = self._timeout_cb
-        if callback:
-            callback()
-
-    def start_auto_tick(self, interval: float = 0.1):
-        """Start background ticking. No-op if already running."""
-        if self._auto_thread and self._auto_thread.is_alive():
-            return
-
-        self._stop_event.clear()
-        self._auto_thread = threading.Thread(
-            target=self._auto_loop, args=(interval,), daemon=True
-        )
-        self._auto_thread.start()
-
-    def stop_auto_tick(self):
-        if not self._auto_thread:
-            return
-        self._stop_event.set()
-        self._auto_thread.join(timeout=1.0)
-        self._auto_thread = None
-
-    def _auto_loop(self, interval):
-        while not self._stop_event.is_set():
-            time.sleep(interval)
-            self.tick(interval)
+    def subscribe(self, listener):
+        """listener() is called after every arm/reset/pause/resume and on expiry."""
+        self._listeners.append(listener)
 
     # ------------------------------------------------------------------
     # Properties
@@ -100,12 +85,39 @@ class Timer:
     @property
     def remaining(self) -> float:
         with self._lock:
-            return self._remaining
+            return self._left() if self._deadline is not None else self._remaining
 
     @property
     def running(self) -> bool:
         with self._lock:
-            return self._running
+            return self._deadline is not None
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+    def _left(self) -> float:
+        return max(0.0, self._deadline - self.scheduler.clock())
+
+    def _set_running(self, running: bool):
+        if running:
+            self._deadline = self.scheduler.clock() + self._remaining
+            self.scheduler.schedule(self.name, self._remaining, self._expire)
+        else:
+            self._deadline = None
+            self.scheduler.cancel(self.name)
+
+    def _expire(self):
+        with self._lock:
+            if self._deadline is None or self._timeout_fired:
+                return
+            self._deadline = None
+            self._remaining = 0.0
+            self._timeout_fired = True
+            callback = self._timeout_cb
+        self._notify()
+        if callback:
+            callback()
 
-    def __del__(self):
-        self.stop_auto_tick()
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
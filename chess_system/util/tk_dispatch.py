@@ -0,0 +1,98 @@
+import os
+import queue
+import sys
+import threading
+
+
+class TkDispatcher:
+    """
+    Thread-safe hand-off of callables to the Tk main loop.
+    Worker threads call `post(fn)`; the Tk thread drains the queue and runs them.
+
+    The Tk loop is woken through a self-pipe registered with createfilehandler,
+    so a posted callable runs as soon as Tk is idle and nothing polls while the
+    queue is empty. Posts made before the Tk thread gets to the pipe share one
+    wake-up and are drained in a single pass. Where file handlers are not
+    available (Tk on Windows) it falls back to polling every `interval_ms`.
+    """
+
+    def __init__(self, root, interval_ms: int = 20):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._queue: queue.Queue = queue.Queue()
+        self._running = True
+        self._signal_lock = threading.Lock()
+        self._signalled = False
+        self._rfd = self._wfd = None
+        try:
+            import tkinter
+
+            self._rfd, self._wfd = os.pipe()
+            os.set_blocking(self._rfd, False)
+            os.set_blocking(self._wfd, False)
+            root.tk.createfilehandler(self._rfd, tkinter.READABLE, self._on_readable)
+        except (AttributeError, OSError, ImportError):
+            self._close_pipe()
+            self._drain_polling()
+
+    def post(self, fn):
+        self._queue.put(fn)
+        if self._wfd is None:
+            return
+        with self._signal_lock:
+            if self._signalled or not self._running:
+                return
+            self._signalled = True
+            try:
+                os.write(self._wfd, b"\0")
+            except OSError:
+                pass  # pipe already holds a wake-up
+
+    def __call__(self, fn):
+        self.post(fn)
+
+    def stop(self):
+        with self._signal_lock:
+            self._running = False
+            if self._rfd is not None:
+                try:
+                    self.root.tk.deletefilehandler(self._rfd)
+                except Exception:
+                    pass
+                self._close_pipe()
+
+    def _on_readable(self, fd, mask):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except OSError:
+            pass
+        # Clear before draining: a post racing with the drain signals again.
+        with self._signal_lock:
+            self._signalled = False
+        self._drain()
+
+    def _drain_polling(self):
+        if not self._running:
+            return
+        # Reschedule first so a failing callback cannot stop the drain loop.
+        self.root.after(self.interval_ms, self._drain_polling)
+        self._drain()
+
+    def _drain(self):
+        while self._running:
+            try:
+                fn = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn()
+            except Exception:
+                # Report like any Tk callback error and keep draining.
+                self.root.report_callback_exception(*sys.exc_info())
+
+    def _close_pipe(self):
+        for fd in (self._rfd, self._wfd):
+            if fd is not None:
+                os.close(fd)
+        self._rfd = self._wfd = None
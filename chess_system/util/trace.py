@@ -0,0 +1,214 @@
+"""
+Span-based latency tracing for the voice → board path.
+
+Spans are (name, utterance id, start, duration, thread) tuples kept in a
+bounded in-memory ring. Each spoken command gets an utterance id on the
+decoder thread; code that hands work to another thread carries the id along
+and re-enters it with `TRACER.use(uid)`, so every stage of one command can
+be grouped afterwards.
+
+Tracing is off by default. While disabled, span()/use() return a shared
+no-op context manager and record() returns immediately, so the
+instrumentation left in hot paths costs one attribute check.
+
+    TRACER.enable()
+    with TRACER.span("asr.accept_waveform"):
+        ...
+    TRACER.percentiles()            # {"asr.accept_waveform": {"p50": ..}, ...}
+    TRACER.export_chrome("trace.json")   # open in Perfetto / chrome://tracing
+"""
+
+from __future__ import annotations
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+_NULL = nullcontext()
+
+# (name, uid, start_ns, dur_ns, thread_id)
+Span = tuple[str, "int | None", int, int, int]
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_uid", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str, uid: int | None):
+        self._tracer = tracer
+        self._name = name
+        self._uid = uid
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self._tracer.record(self._name, self._uid, self._start)
+        return False
+
+
+class _Use:
+    __slots__ = ("_local", "_uid", "_prev")
+
+    def __init__(self, local, uid):
+        self._local = local
+        self._uid = uid
+
+    def __enter__(self):
+        self._prev = getattr(self._local, "uid", None)
+        self._local.uid = self._uid
+        return self._uid
+
+    def __exit__(self, *exc):
+        self._local.uid = self._prev
+        return False
+
+
+class Tracer:
+    def __init__(self, capacity: int = 8192):
+        self.enabled = False
+        self._spans: deque[Span] = deque(maxlen=capacity)
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._threads: dict[int, str] = {}
+
+    def enable(self, capacity: int | None = None):
+        if capacity is not None:
+            self._spans = deque(self._spans, maxlen=capacity)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._spans.clear()
+
+    # ---------------------------------------------------------
+    # Recording
+    # ---------------------------------------------------------
+    def new_id(self) -> int | None:
+        """Fresh utterance id (None while disabled)."""
+        return next(self._ids) if self.enabled else None
+
+    def current(self) -> int | None:
+        """Utterance id entered with use() on this thread."""
+        if not self.enabled:
+            return None
+        return getattr(self._local, "uid", None)
+
+    def use(self, uid: int | None):
+        """Make `uid` the current utterance on this thread for the with-block."""
+        if not self.enabled or uid is None:
+            return _NULL
+        return _Use(self._local, uid)
+
+    def now(self) -> int:
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def span(self, name: str, uid: int | None = None):
+        """Time a with-block; `uid` defaults to the current utterance."""
+        if not self.enabled:
+            return _NULL
+        return _Span(self, name, uid if uid is not None else self.current())
+
+    def record(self, name: str, uid: int | None, start_ns: int, end_ns: int | None = None):
+        """Add a span measured elsewhere (e.g. a queue wait across threads)."""
+        if not self.enabled or not start_ns:
+            return
+        end_ns = end_ns or time.perf_counter_ns()
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._spans.append((name, uid, start_ns, end_ns - start_ns, tid))
+
+    # ---------------------------------------------------------
+    # Reporting
+    # ---------------------------------------------------------
+    def spans(self) -> list[Span]:
+        return list(self._spans)
+
+    def percentiles(self) -> dict[str, dict]:
+        """
+        p50/p95/p99/max in ms per span name, plus "utterance": first span start
+        to last span end of each utterance that has more than one span.
+        """
+        durations: dict[str, list[int]] = {}
+        bounds: dict[int, list[int]] = {}
+        for name, uid, start, dur, _tid in self.spans():
+            durations.setdefault(name, []).append(dur)
+            if uid is not None:
+                b = bounds.setdefault(uid, [start, start + dur, 0])
+                b[0] = min(b[0], start)
+                b[1] = max(b[1], start + dur)
+                b[2] += 1
+        utterances = [end - start for start, end, n in bounds.values() if n > 1]
+        if utterances:
+            durations["utterance"] = utterances
+        return {name: summarize(values) for name, values in sorted(durations.items())}
+
+    def export_chrome(self, path: str | os.PathLike):
+        """Write spans as Chrome trace JSON ("X" events, microseconds)."""
+        spans = self.spans()
+        origin = min((s[2] for s in spans), default=0)
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._threads.items()
+        ]
+        for name, uid, start, dur, tid in spans:
+            events.append(
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (start - origin) / 1000,
+                    "dur": dur / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"utterance": uid},
+                }
+            )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def summarize(values: list[int]) -> dict:
+    """count and p50/p95/p99/max in ms of durations given in ns."""
+    values = sorted(values)
+
+    def pct(p: float) -> float:
+        idx = min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))
+        return round(values[idx] / 1e6, 3)
+
+    return {
+        "count": len(values),
+        "p50": pct(50),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": round(values[-1] / 1e6, 3),
+    }
+
+
+def traced(name: str):
+    """Decorator form of TRACER.span(name) for whole methods."""
+
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with TRACER.span(name):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+# Process-wide tracer shared by the audio, bridge, FSM and GUI stages.
+TRACER = Tracer()
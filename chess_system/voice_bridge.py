@@ -1,24 +1,40 @@
 from __future__ import annotations
 
 import queue
+import threading
 
+from util.tk_dispatch import TkDispatcher
+from util.trace import TRACER
 from voice_recog.swith import SpeechRecognizer
 
-
 class VoiceBridge:
     """
     Connects the voice_recog SpeechRecognizer to the chess_system FSM/GUI.
     Commands recognized on the audio thread are queued and applied on the Tk
-    thread to avoid cross-thread Tk calls.
+    thread to avoid cross-thread Tk calls. The first command queued wakes
+    the Tk loop through `dispatch`; everything queued by the time it runs is
+    applied in one pass, and nothing runs while no commands arrive. In the
+    other direction the displayed position is pushed to the recognizer from
+    the FSM's update notifications, so the voice thread never asks for it.
     """
 
-    def __init__(self, root, gui, fsm, logger):
+    def __init__(self, root, gui, fsm, logger, dispatch=None):
+        """dispatch: runs a callable on the Tk thread (e.g. TkDispatcher.post)."""
         self.root = root
         self.gui = gui
         self.fsm = fsm
         self.logger = logger
-        self._queue: queue.Queue[str] = queue.Queue()
-        self._polling = False
+        # (text, utterance id, enqueue time) — the id/time are only set while tracing.
+        self._queue: queue.Queue[tuple[str, int | None, int]] = queue.Queue()
+        self._own_dispatcher = None
+        if dispatch is None:
+            self._own_dispatcher = TkDispatcher(root)
+            dispatch = self._own_dispatcher.post
+        self._dispatch = dispatch
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._running = False
+        self._pushed_position = None
 
         def state_provider():
             return self.fsm.get_state()
@@ -27,55 +43,79 @@ class VoiceBridge:
             on_command=self._enqueue_text,
             state_provider=state_provider,
             on_wake=self._enqueue_wake,
+            position_grammars=True,
+            logger=logger,
         )
+        self.fsm.on_update(self._push_position)
+        self._push_position()
 
     # -----------------------------------------------------
     # Public API
     # -----------------------------------------------------
     def start(self):
+        self._running = True
         self._recognizer.start()
-        self._start_polling()
 
     def stop(self):
-        self._polling = False
+        self._running = False
+        self._pushed_position = None
         self._recognizer.stop()
+        if self._own_dispatcher:
+            self._own_dispatcher.stop()
 
     # -----------------------------------------------------
     # Internal
     # -----------------------------------------------------
+    def _push_position(self):
+        """
+        Tk thread (FSM update): hand the recognizer a copy of the displayed board
+        with its Zobrist key. Both are read here, on the thread that owns the
+        boards, so the pair always describes one position.
+        """
+        state = self.fsm.get_state().name
+        key = self.fsm.get_display_key()
+        if (state, key) == self._pushed_position:
+            return
+        self._pushed_position = (state, key)
+        self._recognizer.set_position(state, self.fsm.get_display_board().copy(stack=False), key)
+
     def _enqueue_text(self, text: str):
-        self._queue.put(text)
+        self._put((text, TRACER.current(), TRACER.now()))
 
     def _enqueue_wake(self):
         """Send wake word to FSM so it transitions into ROOT."""
         try:
             if self.fsm.get_state().name != "ROOT":
-                self._queue.put("hey chess")
+                self._put(("hey chess", None, 0))
         except Exception:
-            self._queue.put("hey chess")
+            self._put(("hey chess", None, 0))
 
-    def _start_polling(self):
-        if self._polling:
-            return
-        self._polling = True
-        self._poll_queue()
+    def _put(self, item):
+        self._queue.put(item)
+        with self._lock:
+            # One pending drain covers every command queued before it runs.
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._dispatch(self._drain_queue)
 
-    def _poll_queue(self):
-        if not self._polling:
+    def _drain_queue(self):
+        with self._lock:
+            self._scheduled = False
+        if not self._running:
             return
         processed = False
         while True:
             try:
-                text = self._queue.get_nowait()
+                text, uid, queued_at = self._queue.get_nowait()
             except queue.Empty:
                 break
-            self.logger.write(text, tag="VOICE")
-            self.gui.process_text(text)
+            TRACER.record("bridge.queue_wait", uid, queued_at)
+            with TRACER.use(uid):
+                self.logger.write(text, tag="VOICE")
+                self.gui.process_text(text)
             processed = True
 
         if processed:
             self.gui.update_board()
             self.gui.refresh_history()
-
-        # Keep polling from Tk thread
-        self.root.after(100, self._poll_queue)
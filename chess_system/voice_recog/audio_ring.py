@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+import time
+
+
+class AudioRing:
+    """
+    Fixed-size ring of audio blocks between the PortAudio callback (producer)
+    and the decoder thread (consumer).
+
+    All storage is allocated up front; push() only copies into a free slot and
+    never blocks, so the callback stays cheap regardless of how slow decoding
+    is. With a single producer and a single consumer each index is written by
+    one side only, so no lock is taken on the data path.
+
+    Counters:
+      overflows  blocks dropped because the ring was full (decoder too slow)
+      underruns  times the decoder waited a full block period and found nothing
+      max_depth  highest number of queued blocks seen
+
+    `last_stamp` is the perf_counter_ns() at which the block most recently
+    returned by pop() was pushed (for latency tracing).
+    """
+
+    def __init__(self, block_bytes: int, capacity: int = 16):
+        self.block_bytes = block_bytes
+        self.capacity = capacity
+        self._buf = bytearray(block_bytes * capacity)
+        self._view = memoryview(self._buf)
+        self._lens = [0] * capacity
+        self._stamps = [0] * capacity
+        self.last_stamp = 0
+        self._head = 0  # next slot to write (producer only)
+        self._tail = 0  # next slot to read (consumer only)
+        self._ready = threading.Event()
+
+        self.pushed = 0
+        self.overflows = 0
+        self.underruns = 0
+        self.max_depth = 0
+
+    def depth(self) -> int:
+        return self._head - self._tail
+
+    def full(self) -> bool:
+        return self._head - self._tail >= self.capacity
+
+    def push(self, data) -> bool:
+        """Copy one block in; returns False (and counts an overflow) when full."""
+        depth = self._head - self._tail
+        if depth >= self.capacity:
+            self.overflows += 1
+            return False
+        n = min(len(data), self.block_bytes)
+        start = (self._head % self.capacity) * self.block_bytes
+        self._view[start : start + n] = memoryview(data).cast("B")[:n]
+        self._lens[self._head % self.capacity] = n
+        self._stamps[self._head % self.capacity] = time.perf_counter_ns()
+        self._head += 1
+        self.pushed += 1
+        if depth + 1 > self.max_depth:
+            self.max_depth = depth + 1
+        self._ready.set()
+        return True
+
+    def pop(self, timeout: float | None = None) -> bytes | None:
+        """Next block as bytes, waiting up to `timeout`; None if nothing arrived."""
+        if self._head == self._tail:
+            self._ready.clear()
+            # Re-check: the producer may have pushed between the test and clear().
+            if self._head == self._tail and not self._ready.wait(timeout):
+                self.underruns += 1
+                return None
+            if self._head == self._tail:
+                return None
+        slot = self._tail % self.capacity
+        start = slot * self.block_bytes
+        data = bytes(self._view[start : start + self._lens[slot]])
+        self.last_stamp = self._stamps[slot]
+        self._tail += 1
+        return data
+
+    def clear(self):
+        """Drop queued blocks (consumer side)."""
+        self._tail = self._head
+
+    def wake(self):
+        """Release a consumer blocked in pop() (e.g. on shutdown)."""
+        self._ready.set()
+
+    def stats(self) -> dict:
+        return {
+            "pushed": self.pushed,
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "overflows": self.overflows,
+            "underruns": self.underruns,
+        }
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, ContextManager
+
+# callback(int16 mono block, device_overflowed) -> False if the block was dropped
+BlockCallback = Callable[[object, bool], bool]
+
+
+class AudioSource(ABC):
+    """
+    Where SpeechRecognizer gets its int16 mono blocks from.
+
+    open() is a context manager that delivers blocks to `callback` from a
+    thread of its own until it exits. `live` sources talk to a person (the
+    recognizer may prompt on stdin); `lossless` sources retry a block the
+    recognizer could not take instead of dropping it; `exhausted` is set once
+    a finite source has delivered its last block.
+    """
+
+    live = True
+    lossless = False
+
+    def __init__(self):
+        self.exhausted = threading.Event()
+        self.samples = 0
+
+    @abstractmethod
+    def open(self, sample_rate: int, block_size: int, callback: BlockCallback) -> ContextManager[None]:
+        """Context manager (usually via @contextmanager) that delivers blocks while open."""
+
+
+class MicrophoneSource(AudioSource):
+    """Default input device through a PortAudio callback stream."""
+
+    @contextmanager
+    def open(self, sample_rate, block_size, callback):
+        import sounddevice as sd  # PortAudio is only needed for live capture
+
+        def _on_block(indata, frames, time_info, status):
+            self.samples += frames
+            callback(indata, status.input_overflow)
+
+        with sd.RawInputStream(
+            samplerate=sample_rate,
+            blocksize=block_size,
+            dtype="int16",
+            channels=1,
+            callback=_on_block,
+        ):
+            yield
+
+
+class FileSource(AudioSource):
+    """
+    Replays a recording: a 16-bit mono WAV file, or headerless int16 PCM
+    (`raw=True`, or any suffix other than .wav).
+
+    realtime=True paces blocks at the sample rate, like a microphone, and
+    drops blocks the recognizer cannot keep up with. realtime=False feeds as
+    fast as decoding allows and never drops: it waits while the recognizer's
+    buffer is full.
+    """
+
+    live = False
+
+    def __init__(self, path: str | Path, realtime: bool = True, raw: bool | None = None):
+        super().__init__()
+        self.path = Path(path)
+        self.realtime = realtime
+        self.raw = self.path.suffix.lower() != ".wav" if raw is None else raw
+        self.lossless = not realtime
+
+    @contextmanager
+    def open(self, sample_rate, block_size, callback):
+        stop = threading.Event()
+        reader = self._reader(sample_rate)
+        self.exhausted.clear()
+        thread = threading.Thread(
+            target=self._feed, args=(reader, sample_rate, block_size, callback, stop), daemon=True
+        )
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join(timeout=1.0)
+            reader.close()
+
+    def _reader(self, sample_rate: int):
+        if self.raw:
+            return open(self.path, "rb")
+        wav = wave.open(str(self.path), "rb")
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getframerate() != sample_rate:
+            wav.close()
+            raise ValueError(f"{self.path}: expected 16-bit mono {sample_rate} Hz WAV")
+        return wav
+
+    def _feed(self, reader, sample_rate, block_size, callback, stop):
+        period = block_size / sample_rate
+        read = reader.read if self.raw else reader.readframes
+        n = block_size * 2 if self.raw else block_size
+        deadline = time.monotonic()
+        while not stop.is_set():
+            data = read(n)
+            if len(data) < 2:
+                break
+            data = data[: len(data) // 2 * 2]
+            if self.realtime:
+                deadline += period
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                callback(data, False)
+            else:
+                while not callback(data, False):
+                    if stop.wait(period / 8):
+                        return
+            self.samples += len(data) // 2
+        self.exhausted.set()
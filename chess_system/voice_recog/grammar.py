@@ -1,3 +1,13 @@
+import hashlib
+import json
+from pathlib import Path
+
+import chess
+
+# JSON grammars for the static per-state phrase lists, cached across runs.
+GRAMMAR_CACHE_DIR = Path(__file__).parent / ".grammar_cache"
+
+
 def load_grammar_for(st):
     pieces = ["pawn", "knight", "bishop", "rook", "queen", "king"]
     files = ["a", "b", "c", "d", "e", "f", "g", "h"]
@@ -14,7 +24,7 @@ def load_grammar_for(st):
                 for f2 in files:
                     for r2 in ranks:
                         commands.append(f"{f1} {r1} {f2} {r2}")
-        commands.extend(["return", "take", "explain", "evaluate", "back", "castle"])
+        commands.extend(["return", "take", "explain", "evaluate", "back", "forward", "next", "previous", "castle"])
         return commands
 
     if st == "ROOT":
@@ -43,3 +53,79 @@ def load_grammar_for(st):
         return ["hey chess"]
 
     return []
+
+
+def load_grammar_json(st):
+    """
+    json.dumps(load_grammar_for(st)), read from the on-disk cache when possible.
+    The cache key hashes the state name and this module's source, so editing
+    the grammar invalidates old files automatically.
+    """
+    digest = hashlib.sha1(st.encode() + b"\0" + Path(__file__).read_bytes()).hexdigest()[:16]
+    path = GRAMMAR_CACHE_DIR / f"{st}-{digest}.json"
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        pass
+
+    text = json.dumps(load_grammar_for(st))
+    try:
+        GRAMMAR_CACHE_DIR.mkdir(exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(path)
+    except OSError:
+        pass  # read-only checkout: just rebuild next time
+    return text
+
+
+#############################################
+# Position-restricted grammar
+#############################################
+
+_PIECE_WORDS = {
+    chess.PAWN: "pawn",
+    chess.KNIGHT: "knight",
+    chess.BISHOP: "bishop",
+    chess.ROOK: "rook",
+    chess.QUEEN: "queen",
+    chess.KING: "king",
+}
+_RANK_WORDS = ["one", "two", "three", "four", "five", "six", "seven", "eight"]
+
+
+def _square_words(square):
+    return f"{chess.FILE_NAMES[chess.square_file(square)]} {_RANK_WORDS[chess.square_rank(square)]}"
+
+
+def load_grammar_for_position(st, board):
+    """
+    Same phrase shapes as load_grammar_for, but only for the legal moves of
+    `board` (a few dozen phrases instead of thousands).
+    """
+    if st not in ("ROOT", "IMAGINE"):
+        return load_grammar_for(st)
+
+    moves = []
+    for move in board.legal_moves:
+        if board.is_castling(move):
+            continue  # covered by "castle"
+        piece = _PIECE_WORDS[board.piece_type_at(move.from_square)]
+        to_sq = _square_words(move.to_square)
+        moves.append(f"{piece} {to_sq}")
+        moves.append(f"{_square_words(move.from_square)} {to_sq}")
+        if st == "ROOT" and piece == "pawn":
+            moves.append(to_sq)
+    # Promotions and captures can repeat a phrase; keep the first occurrence.
+    moves = list(dict.fromkeys(moves))
+
+    if st == "IMAGINE":
+        return moves + ["return", "take", "explain", "evaluate", "back", "forward", "next", "previous", "castle"]
+
+    # ROOT keeps the bare forms too, so a move said without "play" decodes
+    # to a phrase the parser ignores instead of being forced onto "play …".
+    commands = ["play", "imagine", "evaluate", "explain", "play castle"]
+    for phrase in moves:
+        commands.append(f"play {phrase}")
+        commands.append(phrase)
+    return commands
@@ -1,11 +1,13 @@
 # parser.py
 from __future__ import annotations
 
+from chess_engine.move_index import MOVE_INDEXES
+
 pieces = ["pawn", "knight", "bishop", "rook", "queen", "king"]
 files = ["a", "b", "c", "d", "e", "f", "g", "h"]
 ranks = ["one", "two", "three", "four", "five", "six", "seven", "eight"]
 
-common_cmds_imagine = ["return", "take", "explain", "evaluate", "back"]
+common_cmds_imagine = ["return", "take", "explain", "evaluate", "back", "forward", "next", "previous"]
 common_cmds_root = ["play", "imagine", "evaluate", "explain"]
 wake_word = ["hey chess"]
 
@@ -156,3 +158,37 @@ def extract_command(text: str, state: str):
     # どれにも該当しない場合
     # ======================================================
     return None
+
+
+# ======================================================
+# N-best: pick the hypothesis that is legal on the board
+# ======================================================
+def command_move(cmd: str, board, key: int | None = None):
+    """
+    Legal moves a command can mean on `board` (looked up in the shared
+    spoken-move index; `key` is the board's Zobrist key if known).
+    Returns True for commands that are not moves (imagine / take / back ...).
+    """
+    text = cmd[5:] if cmd.startswith("play ") else cmd
+    if text in common_cmds_root or text in common_cmds_imagine or text in wake_word:
+        return True
+    return MOVE_INDEXES.get(board, key).candidates(text)
+
+
+def pick_command(hypotheses: list[str], state: str, board=None, key: int | None = None):
+    """
+    Parse every N-best hypothesis (best first) and return (text, command) for the
+    first one whose command names a legal move on `board` (or is not a move). Falls back to the first
+    hypothesis that parses at all, so an illegal move is still reported.
+    Returns (None, None) if none parse.
+    """
+    fallback = (None, None)
+    for text in hypotheses:
+        cmd = extract_command(text, state)
+        if not cmd:
+            continue
+        if board is None or command_move(cmd, board, key):
+            return text, cmd
+        if fallback[1] is None:
+            fallback = (text, cmd)
+    return fallback
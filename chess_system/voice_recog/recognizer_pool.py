@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from vosk import KaldiRecognizer
+
+from util.logger import WARNING
+
+
+class RecognizerPool:
+    """
+    LRU of KaldiRecognizers keyed by position (e.g. (state, zobrist key)).
+    Grammars are compiled on a worker thread, so neither the audio callback
+    nor the listener loop waits on a rebuild. Only the most recent request is
+    built; positions that were skipped past are never compiled.
+    logger: util.logger.Logger for build failures (tag "ASR"); stdout if None.
+    """
+
+    def __init__(self, model, sample_rate: int = 16000, max_size: int = 32, max_alternatives: int = 0, logger=None):
+        self._model = model
+        self._logger = logger
+        self._sample_rate = sample_rate
+        self.max_alternatives = max_alternatives
+        self.max_size = max_size
+        self._ready: OrderedDict[Hashable, KaldiRecognizer] = OrderedDict()
+        self._lock = threading.Lock()
+        self._wanted: tuple[Hashable, Callable[[], str]] | None = None
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        self.builds = 0
+
+    def get(self, key: Hashable) -> KaldiRecognizer | None:
+        """Recognizer for `key` if it has been built, else None."""
+        with self._lock:
+            rec = self._ready.get(key)
+            if rec is not None:
+                self._ready.move_to_end(key)
+            return rec
+
+    def request(self, key: Hashable, grammar_fn: Callable[[], str]):
+        """Build a recognizer for `key` in the background; grammar_fn returns the JSON grammar."""
+        with self._lock:
+            if key in self._ready:
+                return
+            self._wanted = (key, grammar_fn)
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                wanted, self._wanted = self._wanted, None
+                self._wake.clear()
+            if wanted is None:
+                continue
+            key, grammar_fn = wanted
+            try:
+                rec = KaldiRecognizer(self._model, self._sample_rate, grammar_fn())
+                if self.max_alternatives:
+                    rec.SetMaxAlternatives(self.max_alternatives)
+            except Exception as e:
+                self._warn("[LOAD] position grammar build failed for %s: %r", key, e)
+                continue
+            with self._lock:
+                self._ready[key] = rec
+                self.builds += 1
+                while len(self._ready) > self.max_size:
+                    self._ready.popitem(last=False)
+
+    def _warn(self, text: str, *args):
+        if self._logger is not None:
+            self._logger.write(text, *args, tag="ASR", level=WARNING, gui=False)
+        else:
+            print(text % args)
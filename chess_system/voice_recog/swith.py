@@ -1,17 +1,27 @@
 from __future__ import annotations
 
 import json
+import math
+import sys
 import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Hashable
 
 import lwake
-import sounddevice as sd
 from vosk import KaldiRecognizer, Model
 
-from voice_recog.grammar import load_grammar_for
-from voice_recog.parser import extract_command
+from util.logger import DEBUG, ERROR, INFO, Lazy
+from util.trace import TRACER
+from voice_recog.audio_ring import AudioRing
+from voice_recog.audio_source import AudioSource, FileSource, MicrophoneSource
+from voice_recog.grammar import load_grammar_for_position, load_grammar_json
+from voice_recog.parser import pick_command
+from voice_recog.recognizer_pool import RecognizerPool
+from voice_recog.vad import EnergyVAD
+from voice_recog.wake_detector import WakeDetector
 
 
 # Directory to store the recorded wake sample for lWake
@@ -19,6 +29,37 @@ BASE_DIR = Path(__file__).parent
 WAKE_REF_DIR = BASE_DIR / "ref"
 WAKE_SAMPLE = WAKE_REF_DIR / "sample.wav"
 
+MODEL_PATH = "vosk-model-small-en-us-0.15"
+SAMPLE_RATE = 16000
+# Half a second of silence decoded once per new recognizer so the first real
+# utterance does not pay for lazy allocations inside Kaldi.
+WARMUP_AUDIO = bytes(SAMPLE_RATE)
+# Samples per capture block (4000 = 250 ms). Smaller blocks cut latency but
+# cost more callbacks and decoder calls per second.
+BLOCK_SIZE = 4000
+# Audio the ring can hold before blocks are dropped.
+RING_SECONDS = 4.0
+# Audio kept from before the wake word fires and replayed into the recognizer,
+# so a command spoken in the same breath as "hey chess" is not lost.
+PREROLL_SECONDS = 1.0
+# N-best hypotheses per utterance; the best one that is a legal move wins.
+MAX_ALTERNATIVES = 5
+WAKE_THRESHOLD = 0.08
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _rss_mb() -> float:
+    """Peak resident set size of this process in MB (0 where unavailable)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
 
 #############################################
 # Wake word recording & detection (lWake)
@@ -45,44 +86,6 @@ def record_wake_sample(force: bool = False):
     print(f"[WAKE] Sample saved to {WAKE_SAMPLE}")
 
 
-def wait_for_wake_word(stop_event: threading.Event | None = None):
-    """
-    Block until lWake detects the wake word using the recorded sample.wav.
-    Runs lWake in a thread so we can return to the main loop after detection.
-    """
-    detected = threading.Event()
-
-    def handle_detection(detection, stream):
-        print(f"[WAKE] Detected '{detection['wakeword']}' at {detection['timestamp']}")
-        detected.set()
-        # Stop the listen loop by raising, caught in the worker thread.
-        raise SystemExit
-
-    print("Listening for wake word with lWake (say 'hey chess')…")
-
-    def worker():
-        try:
-            lwake.listen(
-                str(WAKE_REF_DIR),
-                threshold=0.08,
-                method="embedding",
-                callback=handle_detection,
-            )
-        except SystemExit:
-            pass
-        except Exception as e:
-            if not (stop_event and stop_event.is_set()):
-                print(f"[WAKE] listener error: {e}")
-
-    t = threading.Thread(target=worker, daemon=True)
-    t.start()
-    while not detected.is_set():
-        if stop_event and stop_event.is_set():
-            break
-        detected.wait(timeout=0.1)
-    t.join(timeout=2.0)
-
-
 #############################################
 # Speech recognizer wrapper
 #############################################
@@ -91,8 +94,13 @@ def wait_for_wake_word(stop_event: threading.Event | None = None):
 class SpeechRecognizer:
     """
     Background speech listener that emits normalized commands via callback.
-    - Uses lWake for wake word detection.
+    - One capture stream stays open for the whole session; its blocks go to
+      the lWake detector while waiting for the wake word and to the active
+      KaldiRecognizer afterwards.
     - Uses Vosk grammar per FSM state (ROOT / PLAY / IMAGINE).
+    - With position_grammars, ROOT/IMAGINE switch to a grammar built from the
+      legal moves of the board last passed to set_position() once it has been
+      compiled.
     """
 
     def __init__(
@@ -100,109 +108,396 @@ class SpeechRecognizer:
         on_command: Callable[[str], None],
         state_provider: Callable[[], str | None] | None = None,
         on_wake: Callable[[], None] | None = None,
+        position_grammars: bool = False,
+        block_size: int = BLOCK_SIZE,
+        preroll_seconds: float = PREROLL_SECONDS,
+        vad: bool = True,
+        source: AudioSource | None = None,
+        logger=None,
     ):
+        """
+        position_grammars: build per-position grammars from the boards pushed with
+                           set_position() (needs the app to push them).
+        block_size: samples per capture block; trades latency against CPU.
+        preroll_seconds: audio before the wake detection replayed into the recognizer.
+        vad: skip decoding of silent blocks and finalize at the end of speech.
+        source: where audio comes from; the default input device if omitted.
+        logger: util.logger.Logger for status lines (tag "ASR", never shown in the
+                GUI); stdout if omitted. Partial hypotheses are only produced at DEBUG.
+        """
         self._on_command = on_command
         self._state_provider = state_provider or (lambda: "ROOT")
         self._on_wake = on_wake or (lambda: None)
+        self._position_grammars = position_grammars
+        # (FSM state name, board copy, position key) from set_position(); replaced whole.
+        self._position: tuple[str, object, Hashable] | None = None
+        self._logger = logger
 
         self.recognizers: dict[str, KaldiRecognizer] = {}
         self._active_rec: KaldiRecognizer | None = None
+        self._pool: RecognizerPool | None = None
+        self._requested_position = None
         self.current_state = "WAIT_WAKE"
         self._last_state_change = time.time()
         self._stop = threading.Event()
         self._thread: threading.Thread | None = None
+        self._source = source or MicrophoneSource()
+
+        # The PortAudio callback only copies blocks into the ring; decoding
+        # runs on its own thread so a slow decode never stalls capture.
+        self.block_size = block_size
+        capacity = max(2, round(RING_SECONDS * SAMPLE_RATE / block_size))
+        self._ring = AudioRing(block_size * 2, capacity)  # int16 mono
+        self.input_overflows = 0  # reported by PortAudio itself
+
+        # Decoder-thread routing: "wake" feeds the wake detector, "armed" holds
+        # audio until the recognizer is ready, "asr" decodes.
+        self._wake: WakeDetector | None = None
+        self._route = "wake"
+        self._preroll: deque[bytes] = deque(maxlen=max(1, math.ceil(preroll_seconds * SAMPLE_RATE / block_size)))
+        self._backlog: list[bytes] = []
+        self._woke = threading.Event()
+
+        # Voice-activity gate in front of the recognizer, plus the cost it saves:
+        # decoder-thread CPU seconds per minute of audio routed to ASR.
+        self._vad = EnergyVAD(SAMPLE_RATE) if vad else None
+        self._vad_lead: bytes | None = None
+        self.vad_skipped = 0
+        self._asr_audio_s = 0.0
+        self._asr_cpu_s = 0.0
+        # Utterance being decoded, for latency tracing (None between utterances).
+        self._utt: int | None = None
+        self._block_stamp = 0
+
+        # One model shared by every recognizer. Loading and grammar compilation
+        # happen on this thread so construction returns immediately.
+        # A missing model fails here, so the caller can report voice as disabled.
+        if not Path(MODEL_PATH).is_dir():
+            raise FileNotFoundError(f"Vosk model not found: {MODEL_PATH}")
+        self._model: Model | None = None
+        self.load_error: BaseException | None = None
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vosk-load")
+        self._building: set[str] = set()
+        self._created_at = time.perf_counter()
+        self._loader.submit(self._load_model).add_done_callback(self._on_model_loaded)
+
+    def _load_model(self):
+        t0 = time.perf_counter()
+        self._model = Model(MODEL_PATH)
+        self._log("[LOAD] Model ready in %.2fs (peak RSS %.0f MB)", time.perf_counter() - t0, _rss_mb())
+        if self._position_grammars:
+            # Full-state grammars stay as the fallback while a position grammar compiles.
+            self._pool = RecognizerPool(
+                self._model, SAMPLE_RATE, max_alternatives=MAX_ALTERNATIVES, logger=self._logger
+            )
 
-        self._load_recognizers()
+    def _on_model_loaded(self, future):
+        # Loader thread. Nobody waits on the future, so a failure is only seen here.
+        error = future.exception()
+        if error is None:
+            return
+        self.load_error = error
+        self._log("[LOAD] Speech model failed to load, voice input disabled: %r", error, level=ERROR, gui=True)
 
-    def _load_recognizers(self):
-        for st in ["ROOT", "IMAGINE"]:
-            print(f"[LOAD] Loading recognizer for state: {st}")
-            model = Model("vosk-model-small-en-us-0.15")
-            grammar = load_grammar_for(st)
-            self.recognizers[st] = KaldiRecognizer(model, 16000, json.dumps(grammar))
+    def _ensure_recognizer(self, st: str):
+        """Build the recognizer for `st` in the background on first use."""
+        if st in self.recognizers or st in self._building or st not in ("ROOT", "IMAGINE"):
+            return
+        if self.load_error is not None:
+            return
+        self._building.add(st)
+        self._loader.submit(self._build_recognizer, st)
+
+    def _build_recognizer(self, st: str):
+        t0 = time.perf_counter()
+        try:
+            rec = KaldiRecognizer(self._model, SAMPLE_RATE, load_grammar_json(st))
+            rec.SetMaxAlternatives(MAX_ALTERNATIVES)
+            rec.AcceptWaveform(WARMUP_AUDIO)
+            rec.Reset()
+        except Exception as e:
+            self._building.discard(st)
+            self._log("[LOAD] recognizer for %s failed: %s", st, e, level=ERROR)
+            return
+        # Publish before clearing `_building`, or _ensure_recognizer could build it twice.
+        self.recognizers[st] = rec
+        self._building.discard(st)
+        now = time.perf_counter()
+        self._log(
+            "[LOAD] Recognizer for %s ready in %.2fs (%.2fs since start, peak RSS %.0f MB)",
+            st, now - t0, now - self._created_at, _rss_mb(),
+        )
+        if self.current_state == st and self._active_rec is None:
+            self._active_rec = rec
 
     def start(self):
         if self._thread and self._thread.is_alive():
             return
-        _wait_for_m("Press 'm' and Enter to start the speech listener.")
-        record_wake_sample(force=False)
+        if self._source.live:
+            _wait_for_m("Press 'm' and Enter to start the speech listener.")
+            record_wake_sample(force=False)
+        # Built here so a missing wake sample fails the caller, not the thread.
+        self._wake = WakeDetector(
+            WAKE_REF_DIR,
+            threshold=WAKE_THRESHOLD,
+            sample_rate=SAMPLE_RATE,
+            on_error=lambda e: self._log("[WAKE] matching failed, window skipped: %r", e, level=ERROR),
+        )
         self._stop.clear()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
 
     def stop(self):
         self._stop.set()
+        self._ring.wake()
         if self._thread:
             self._thread.join(timeout=1.0)
             self._thread = None
 
+    def join(self, timeout: float | None = None):
+        """Wait for the listener to end (a FileSource ends after its last block)."""
+        if self._thread:
+            self._thread.join(timeout)
+
+    def set_position(self, state: str, board, key: Hashable):
+        """
+        Called by the thread that owns the board whenever the displayed position
+        changes. `board` must be a copy this object may keep, `key` its position
+        key; the listener reads the latest one without calling back.
+        """
+        self._position = (state, board, key)
+
     # =============================================
     # Internal loops
     # =============================================
     def _loop(self):
+        self._ring.clear()
+        decoder = threading.Thread(target=self._decode_loop, daemon=True)
+        decoder.start()
+        with self._source.open(SAMPLE_RATE, self.block_size, self._audio_callback):
+            while not self._stop.is_set():
+                self._woke.clear()
+                self._change_state("WAIT_WAKE")
+                # ROOT always follows the wake word; have it compiled by then.
+                self._ensure_recognizer("ROOT")
+                self._log("Listening for wake word with lWake (say 'hey chess')…")
+                while not self._woke.wait(timeout=0.1):
+                    if self._stop.is_set():
+                        break
+                if self._stop.is_set():
+                    break
+                self._log("Listening…  (Ctrl+C to stop)")
+                self._listen_loop()
+                self._log("[AUDIO] %s", Lazy(self.audio_stats))
+        self._ring.wake()
+        decoder.join(timeout=1.0)
+
+    def _listen_loop(self):
+        waiting_for_app_root = True
+        while not self._stop.is_set():
+            app_state = self._state_from_app()
+            if app_state:
+                # Wait until the app actually enters ROOT once before re-arming wake
+                if waiting_for_app_root:
+                    if app_state != "WAIT_WAKE":
+                        waiting_for_app_root = False
+                        self._change_state(app_state)
+                else:
+                    if app_state != self.current_state:
+                        self._change_state(app_state)
+                    if self.current_state == "WAIT_WAKE":
+                        break
+            self._sync_position()
+            time.sleep(0.1)
+
+    # =============================================
+    # Helpers
+    # =============================================
+    def audio_stats(self) -> dict:
+        """Ring counters, PortAudio-reported input overflows and ASR cost."""
+        minutes = self._asr_audio_s / 60
+        return {
+            **self._ring.stats(),
+            "input_overflows": self.input_overflows,
+            "vad": self._vad is not None,
+            "vad_skipped": self.vad_skipped,
+            "asr_audio_s": round(self._asr_audio_s, 1),
+            "asr_cpu_s_per_min": round(self._asr_cpu_s / minutes, 3) if minutes else 0.0,
+        }
+
+    def _audio_callback(self, indata, overflowed: bool) -> bool:
+        # Source thread (PortAudio callback for the mic): no allocation,
+        # decoding or printing here.
+        if overflowed:
+            self.input_overflows += 1
+        if self._source.lossless and self._ring.full():
+            return False  # the source waits and retries; nothing is lost
+        return self._ring.push(indata)
+
+    def _decode_loop(self):
+        period = self.block_size / SAMPLE_RATE
         while not self._stop.is_set():
-            self._change_state("WAIT_WAKE")
-            wait_for_wake_word(stop_event=self._stop)
-            if self._stop.is_set():
-                break
+            data = self._ring.pop(timeout=2 * period)
+            if data is not None:
+                self._block_stamp = self._ring.last_stamp
+                try:
+                    self._route_block(data)
+                except Exception as e:
+                    # One bad block must not end voice input for the session.
+                    self._log("[AUDIO] block dropped (%s route): %r", self._route, e, level=ERROR)
+            elif self._source.exhausted.is_set() and self._ring.depth() == 0:
+                # End of a recording: emit the last utterance and wind down.
+                if self._route == "asr":
+                    self._finalize()
+                self._stop.set()
+
+    def _route_block(self, data: bytes):
+        if self._route == "asr":
+            if self.current_state != "WAIT_WAKE":
+                self._asr_block(data)
+                return
+            # App went back to sleep: listen for the wake word again.
+            self._wake.reset()
+            self._route = "wake"
+
+        if self._route == "wake":
+            self._preroll.append(data)
+            detection = self._wake.feed(data)
+            if detection is None:
+                return
+            self._log("[WAKE] Detected '%s' at %s", detection["wakeword"], detection["timestamp"])
+            # Notify before replaying so the wake reaches the app ahead of any command.
             self._on_wake()
-            # align with app state right after wake
             target_state = self._state_from_app(default="ROOT")
             if target_state == "WAIT_WAKE":
                 target_state = "ROOT"
             self._change_state(target_state)
-            self._listen_until_app_wait_wake()
-
-    def _listen_until_app_wait_wake(self):
-        print("Listening…  (Ctrl+C to stop)")
-        waiting_for_app_root = True
-        with sd.RawInputStream(
-            samplerate=16000,
-            blocksize=4000,
-            dtype="int16",
-            channels=1,
-            callback=self._audio_callback,
-        ):
-            while not self._stop.is_set():
-                app_state = self._state_from_app()
-                if app_state:
-                    # Wait until the app actually enters ROOT once before re-arming wake
-                    if waiting_for_app_root:
-                        if app_state != "WAIT_WAKE":
-                            waiting_for_app_root = False
-                            self._change_state(app_state)
-                    else:
-                        if app_state != self.current_state:
-                            self._change_state(app_state)
-                        if self.current_state == "WAIT_WAKE":
-                            break
-                time.sleep(0.1)
-
-    # =============================================
-    # Helpers
-    # =============================================
-    def _audio_callback(self, indata, frames, time_info, status):
-        if self._active_rec is None:
+            self._backlog = list(self._preroll)
+            self._preroll.clear()
+            self._route = "armed"
+            self._woke.set()
+        elif self.current_state == "WAIT_WAKE":
+            # Back to sleep before a recognizer was ready; drop the held audio.
+            self._backlog = []
+            self._wake.reset()
+            self._route = "wake"
             return
+        else:
+            self._backlog.append(data)
 
-        data = bytes(indata)
-        if self._active_rec.AcceptWaveform(data):
-            res = json.loads(self._active_rec.Result())
-            text = res.get("text", "").strip()
-
-            if not text:
-                return
-
-            cmd = extract_command(text, self.current_state)
-            if cmd:
-                print(f"[RECOG:{self.current_state}] {text} → {cmd}")
-                self._on_command(cmd)
-            self._last_state_change = time.time()
+        # armed: replay everything since the pre-roll once a recognizer is active.
+        if self._active_rec is None or self.current_state == "WAIT_WAKE":
+            return
+        backlog, self._backlog = self._backlog, []
+        self._route = "asr"
+        if self._vad is not None:
+            self._vad.reset()
+            self._vad_lead = None
+        for block in backlog:
+            self._asr_block(block)
+
+    def _asr_block(self, data: bytes):
+        t0 = time.thread_time()
+        self._asr_audio_s += len(data) / (2 * SAMPLE_RATE)
+        if self._vad is None:
+            self._decode(data)
         else:
+            active, ended = self._vad.process(data)
+            if active:
+                # One block of lead-in so the first phoneme is not clipped.
+                if self._vad_lead is not None:
+                    self._decode(self._vad_lead)
+                    self._vad_lead = None
+                self._decode(data)
+            else:
+                self._vad_lead = data
+                self.vad_skipped += 1
+            if ended:
+                self._finalize()
+        self._asr_cpu_s += time.thread_time() - t0
+
+    def _decode(self, data: bytes):
+        rec = self._active_rec
+        if rec is None:
+            return
+
+        if TRACER.enabled:
+            if self._utt is None:
+                self._utt = TRACER.new_id()
+            TRACER.record("audio.ring_wait", self._utt, self._block_stamp)
+        with TRACER.span("asr.accept_waveform", self._utt):
+            final = rec.AcceptWaveform(data)
+        if final:
+            self._handle_result(rec.Result())
+        elif self._log_enabled(DEBUG):
             # Partial (debug 用)
-            pres = json.loads(self._active_rec.PartialResult())
+            pres = json.loads(rec.PartialResult())
             if pres.get("partial"):
-                print(f"[PARTIAL:{self.current_state}] {pres['partial']}")
+                self._log("[PARTIAL:%s] %s", self.current_state, pres["partial"], level=DEBUG)
+
+    def _finalize(self):
+        """End of speech: flush whatever the recognizer still holds."""
+        rec = self._active_rec
+        if rec is not None:
+            with TRACER.span("asr.final_result", self._utt):
+                result = rec.FinalResult()
+            self._handle_result(result)
+
+    def _handle_result(self, result: str):
+        uid, self._utt = self._utt, None
+        res = json.loads(result)
+        # With SetMaxAlternatives the result is {"alternatives": [{"text", "confidence"}, ...]}.
+        alternatives = res.get("alternatives") or [res]
+        hypotheses = [alt.get("text", "").strip() for alt in alternatives]
+        hypotheses = [h for h in hypotheses if h]
+
+        if not hypotheses:
+            return
+
+        with TRACER.span("asr.extract_command", uid):
+            board, key = self._display_position()
+            text, cmd = pick_command(hypotheses, self.current_state, board, key)
+        if cmd:
+            self._log("[RECOG:%s] %s → %s", self.current_state, text, cmd)
+            with TRACER.use(uid):
+                self._on_command(cmd)
+        self._last_state_change = time.time()
+
+    def _display_position(self):
+        """(displayed board snapshot, its Zobrist key) for ranking hypotheses; (None, None) if unknown."""
+        position = self._position
+        if position is None or position[0] != self.current_state or position[0] not in ("ROOT", "IMAGINE"):
+            return None, None
+        return position[1], position[2]
+
+    def _log(self, text: str, *args, level: int = INFO, gui: bool = False):
+        """gui: also show the line in the GUI message panel (for failures the user must see)."""
+        if self._logger is not None:
+            self._logger.write(text, *args, tag="ASR", level=level, gui=gui)
+        elif level >= INFO:
+            print(text % tuple(a.fn() if isinstance(a, Lazy) else a for a in args) if args else text)
+
+    def _log_enabled(self, level: int) -> bool:
+        return self._logger.enabled(level) if self._logger is not None else level >= INFO
+
+    def _sync_position(self):
+        """Use the grammar of the displayed position once built; full grammar until then."""
+        if self._pool is None or self.current_state not in self.recognizers:
+            return
+        state = self.current_state
+        board, key = self._display_position()
+        rec = None
+        if board is not None:
+            position = (state, key)
+            rec = self._pool.get(position)
+            if rec is None and position != self._requested_position:
+                # `board` is the pushed copy of exactly this key, ours to keep.
+                self._pool.request(position, lambda: json.dumps(load_grammar_for_position(state, board)))
+                self._requested_position = position
+        rec = rec or self.recognizers[state]
+        if rec is not self._active_rec:
+            rec.Reset()
+            self._active_rec = rec
 
     def _sync_with_app_state(self):
         target = self._state_from_app()
@@ -231,6 +526,7 @@ class SpeechRecognizer:
             self._active_rec.Reset()
         else:
             self._active_rec = None
+            self._ensure_recognizer(new_state)
         # keep quiet; main FSM handles user-facing state logs
 
 
@@ -243,9 +539,41 @@ def _print_command(cmd: str):
     print(f"CMD: {cmd}")
 
 
-def main():
-    listener = SpeechRecognizer(on_command=_print_command)
+def main(argv: list[str] | None = None):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Run the speech recognizer standalone.")
+    ap.add_argument("--file", help="replay a 16-bit mono 16 kHz WAV (or raw PCM) instead of the mic")
+    ap.add_argument("--fast", action="store_true", help="replay the file as fast as it decodes")
+    ap.add_argument("--state", default="ROOT", help="app state to assume (ROOT / IMAGINE)")
+    ap.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    ap.add_argument("--no-vad", action="store_true")
+    ap.add_argument("--trace", help="write a Chrome trace (JSON) of decoding latency here")
+    args = ap.parse_args(argv)
+    if args.trace:
+        TRACER.enable()
+
+    source = FileSource(args.file, realtime=not args.fast) if args.file else None
+    listener = SpeechRecognizer(
+        on_command=_print_command,
+        state_provider=lambda: args.state,
+        on_wake=lambda: print("WAKE"),
+        block_size=args.block_size,
+        vad=not args.no_vad,
+        source=source,
+    )
+    t0 = time.perf_counter()
     listener.start()
+    if source is not None:
+        listener.join()
+        elapsed = time.perf_counter() - t0
+        audio_s = source.samples / SAMPLE_RATE
+        print(f"[AUDIO] {listener.audio_stats()}")
+        print(f"Replayed {audio_s:.1f}s of audio in {elapsed:.2f}s ({audio_s / elapsed:.1f}x real time)")
+        if args.trace:
+            TRACER.export_chrome(args.trace)
+            print(f"[TRACE] {TRACER.percentiles()}")
+        return
     print("Speech recognizer running. Press Ctrl+C to exit.")
     try:
         while True:
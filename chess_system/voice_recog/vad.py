@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class EnergyVAD:
+    """
+    Cheap voice-activity detector in front of the recognizer.
+
+    Each capture block is split into short frames and, in one vectorized pass,
+    every frame gets its energy (dBFS) and zero-crossing rate. A frame counts as
+    speech when it is loud enough, or slightly quieter but noisy like a
+    fricative ("s", "f", "th" — high zero-crossing rate, low energy). Speech
+    stays "on" for `hangover_ms` after the last speech frame so pauses between
+    words do not split an utterance.
+
+    With `adaptive=True` the energy threshold follows the noise floor (a slow
+    average of non-speech frames) plus `margin_db`, never below `min_db`.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 10,
+        threshold_db: float = -45.0,
+        margin_db: float = 12.0,
+        min_db: float = -60.0,
+        fricative_db: float = 6.0,
+        zcr_threshold: float = 0.3,
+        hangover_ms: int = 400,
+        adaptive: bool = True,
+        noise_alpha: float = 0.05,
+    ):
+        self.frame = max(1, sample_rate * frame_ms // 1000)
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.fricative_db = fricative_db
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = hangover_ms // frame_ms
+        self.adaptive = adaptive
+        self.noise_alpha = noise_alpha
+        self.noise_floor_db = threshold_db - margin_db
+
+        self.in_speech = False
+        self._quiet_frames = 0
+
+    def reset(self):
+        self.in_speech = False
+        self._quiet_frames = 0
+
+    def threshold(self) -> float:
+        if not self.adaptive:
+            return self.threshold_db
+        return max(self.min_db, self.noise_floor_db + self.margin_db)
+
+    def process(self, block: bytes) -> tuple[bool, bool]:
+        """
+        Classify one int16 mono block.
+        Returns (active, ended): active means the block should be decoded;
+        ended means speech just finished and the recognizer should be finalized.
+        """
+        samples = np.frombuffer(block, dtype=np.int16)
+        n = len(samples) // self.frame * self.frame
+        if n == 0:
+            return self.in_speech, False
+        frames = samples[:n].reshape(-1, self.frame).astype(np.float32) / 32768.0
+
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame - 1)
+
+        thr = self.threshold()
+        speech = (energy_db > thr) | (
+            (energy_db > thr - self.fricative_db) & (zcr > self.zcr_threshold)
+        )
+
+        if self.adaptive and not speech.all():
+            quiet = float(np.mean(energy_db[~speech]))
+            self.noise_floor_db += self.noise_alpha * (quiet - self.noise_floor_db)
+
+        was_speech = self.in_speech
+        heard = bool(speech.any())
+        if heard:
+            # Frames after the last speech frame already count toward the hangover.
+            self._quiet_frames = len(speech) - 1 - int(np.flatnonzero(speech)[-1])
+            self.in_speech = True
+        elif self.in_speech:
+            self._quiet_frames += len(speech)
+        if self.in_speech and self._quiet_frames > self.hangover_frames:
+            self.in_speech = False
+        return heard or was_speech or self.in_speech, (heard or was_speech) and not self.in_speech
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from lwake.features import (
+    dtw_cosine_normalized_distance,
+    extract_embedding_features,
+    extract_mfcc_features,
+)
+from lwake.listen import load_support_set
+
+
+class WakeDetector:
+    """
+    lWake matching driven by frames we already capture, instead of
+    lwake.listen() opening a stream of its own.
+
+    feed() takes int16 mono blocks of any size; every `slide_seconds` of new
+    audio the last `buffer_seconds` are compared against the reference
+    samples, exactly as lwake.listen() does. Like lwake.listen(), a window
+    whose features or distances fail to compute is skipped (and reported to
+    `on_error`) instead of ending detection.
+    """
+
+    def __init__(
+        self,
+        ref_dir: Path,
+        threshold: float = 0.08,
+        method: str = "embedding",
+        buffer_seconds: float = 2.0,
+        slide_seconds: float = 0.25,
+        sample_rate: int = 16000,
+        on_error: Callable[[Exception], None] | None = None,
+    ):
+        """on_error(exc): called when matching one window failed."""
+        self.threshold = threshold
+        self._on_error = on_error
+        self.method = method
+        self.sample_rate = sample_rate
+        self._support = load_support_set(str(ref_dir), method=method)
+        if not self._support:
+            raise FileNotFoundError(f"No wake word samples (*.wav) in {ref_dir}")
+        self._buffer = np.zeros(int(buffer_seconds * sample_rate), dtype=np.float32)
+        self._slide = int(slide_seconds * sample_rate)
+        self._pending = 0
+
+    def reset(self):
+        """Forget buffered audio so an earlier utterance cannot trigger again."""
+        self._buffer[:] = 0.0
+        self._pending = 0
+
+    def feed(self, block: bytes) -> dict | None:
+        """Append one block; returns the detection dict when the wake word matched."""
+        chunk = np.frombuffer(block, dtype=np.int16).astype(np.float32) / 32768.0
+        n = min(len(chunk), len(self._buffer))
+        self._buffer[:-n] = self._buffer[n:]
+        self._buffer[-n:] = chunk[-n:]
+        self._pending += len(chunk)
+        if self._pending < self._slide:
+            return None
+        self._pending = 0
+        return self._match()
+
+    def _match(self) -> dict | None:
+        try:
+            if self.method == "mfcc":
+                features = extract_mfcc_features(y=self._buffer, sample_rate=self.sample_rate)
+            else:
+                features = extract_embedding_features(y=self._buffer, sample_rate=self.sample_rate)
+            if features is None:
+                return None
+            distances = [
+                (filename, dtw_cosine_normalized_distance(features, ref_features))
+                for filename, ref_features in self._support
+            ]
+        except Exception as e:
+            if self._on_error is not None:
+                self._on_error(e)
+            return None
+        for filename, distance in distances:
+            if distance < self.threshold:
+                self.reset()
+                return {
+                    "timestamp": int(time.time() * 1000),
+                    "wakeword": filename,
+                    "distance": distance,
+                }
+        return None